@@ -1,107 +1,25 @@
 import itertools
+import zlib
 from typing import Set, List, Tuple, Dict, Optional
 
-# Your existing dictionaries
-rule_to_classes = {
-    15: {"II", "III", "VI"},
-    20: {"III"},
-    23: {"III"},
-    27: {"III"},
-    30: {"II"},
-    39: {"III"},
-    43: {"III"},
-    45: {"II"},
-    51: {"I", "III", "V"},
-    53: {"I"},
-    54: {"I"},
-    57: {"I"},
-    58: {"I"},
-    60: {"I", "II", "IV"},
-    65: {"III"},
-    68: {"III"},
-    75: {"II"},
-    77: {"III"},
-    78: {"III"},
-    80: {"III"},
-    83: {"I"},
-    85: {"I", "II", "III", "V"},
-    86: {"I", "III", "V"},
-    89: {"I", "III", "V"},
-    90: {"I", "II", "III", "IV", "V", "VI"},
-    92: {"I"},
-    99: {"I"},
-    101: {"I", "III", "V"},
-    102: {"I", "III", "V"},
-    105: {"I", "III", "IV", "V", "VI"},
-    106: {"I", "III", "V"},
-    108: {"I"},
-    113: {"III"},
-    114: {"III"},
-    120: {"II"},
-    135: {"II"},
-    141: {"III"},
-    142: {"III"},
-    147: {"I"},
-    149: {"I", "III", "V"},
-    150: {"II", "III", "IV", "V", "VI"},
-    153: {"I", "III", "V"},
-    154: {"I", "III", "V"},
-    156: {"I"},
-    163: {"I"},
-    165: {"I", "II", "III", "V", "VI"},
-    166: {"I", "III", "V"},
-    169: {"I", "III", "V"},
-    170: {"I", "II", "V"},
-    172: {"I"},
-    177: {"III"},
-    178: {"III"},
-    180: {"II"},
-    195: {"I", "IV"},
-    196: {"III"},
-    197: {"I"},
-    198: {"I"},
-    201: {"I", "V"},
-    202: {"I"},
-    204: {"I", "III"},
-    210: {"II"},
-    212: {"III"},
-    216: {"III"},
-    225: {"II"},
-    228: {"III"},
-    232: {"III"},
-    240: {"II", "III", "VI"},
-    5: {"II", "III", "VI"},
-    17: {"I", "V"},
-    # Note: 20, 65, 68, 80 already exist above
-}
+import numpy as np
 
-rule_to_nextclass = {
-    15: "II", 20: "III", 23: "III", 27: "III", 30: "II", 39: "III", 43: "III", 45: "II",
-    51: "I", 53: "I", 54: "I", 57: "I", 58: "I", 60: "IV", 65: "III", 68: "III",
-    75: "II", 77: "III", 78: "III", 80: "III", 83: "I", 85: "II", 86: "I", 89: "I",
-    90: "IV", 92: "I", 99: "I", 101: "I", 102: "III", 105: "IV", 106: "I", 108: "I",
-    113: "III", 114: "III", 120: "II", 135: "II", 141: "III", 142: "III", 147: "I",
-    149: "I", 150: "IV", 153: "III", 154: "I", 156: "I", 163: "I", 165: "II",
-    166: "I", 169: "I", 170: "II", 172: "I", 177: "III", 178: "III", 180: "II",
-    195: "IV", 196: "III", 197: "I", 198: "I", 201: "I", 202: "I", 204: "I",
-    210: "II", 212: "III", 216: "III", 225: "II", 228: "III", 232: "III", 240: "II",
-    5: "II", 17: "I"
-}
-
-last_rule_table = {
-    "I": [17, 20, 65, 68],
-    "II": [5, 20, 65, 80],
-    "III": [5, 17, 68, 80],
-    "IV": [20, 65],
-    "V": [17, 68],
-    "VI": [5, 80],
-}
+from ca_kernels import elementary_table, step_table
+from classRules import last_rule_table
+from instrumentation import Instrumentation
+from inverse import compile_inverse
+from rule_tables import (GENERATOR_CLASS_TO_CANDIDATES as class_to_candidates,
+                         GENERATOR_RULE_TO_CLASSES as rule_to_classes,
+                         GENERATOR_RULE_TO_NEXTCLASS as rule_to_nextclass)
+from scoring_params import ScoringParams
 
 class MaximalRCAGenerator:
     def __init__(self, n_cells: int, n_bits: int = 1, 
                  coverage_bonus: float = 2.0, 
                  diversity_weight: float = 0.1,
-                 aim_for_full_coverage: bool = None):
+                 aim_for_full_coverage: bool = None,
+                 params: Optional[ScoringParams] = None,
+                 instrumentation: Optional[Instrumentation] = None):
         """
         Initialize maximal-length RCA generator.
         
@@ -111,6 +29,8 @@ class MaximalRCAGenerator:
             coverage_bonus: Weight for unvisited states (higher = prioritize exploration)
             diversity_weight: Weight for state diversity (higher = more variety)
             aim_for_full_coverage: Whether to aim for full state space coverage (auto-detect if None)
+            params: Scoring constants and stopping limits (defaults if None)
+            instrumentation: Logging, progress events and phase timers (verbosity 1 if None)
         """
         self.n_cells = n_cells
         self.n_bits = n_bits
@@ -121,6 +41,9 @@ class MaximalRCAGenerator:
         # Configurable scoring weights
         self.coverage_bonus = coverage_bonus
         self.diversity_weight = diversity_weight
+        self.params = params or ScoringParams()
+        self.instr = instrumentation or Instrumentation()
+        self._inverses = {}  # (rule, n) -> compiled inverse, built on first use
         
         # Auto-determine if we should aim for full coverage
         if aim_for_full_coverage is None:
@@ -129,10 +52,10 @@ class MaximalRCAGenerator:
         else:
             self.aim_for_full_coverage = aim_for_full_coverage
         
-        print(f"Initialized RCA generator:")
-        print(f"  State space: {self.max_states} possible states")
-        print(f"  Full coverage mode: {self.aim_for_full_coverage}")
-        print(f"  Scoring: coverage_bonus={coverage_bonus}, diversity_weight={diversity_weight}")
+        self.instr.log(1, f"Initialized RCA generator:")
+        self.instr.log(1, f"  State space: {self.max_states} possible states")
+        self.instr.log(1, f"  Full coverage mode: {self.aim_for_full_coverage}")
+        self.instr.log(1, f"  Scoring: coverage_bonus={coverage_bonus}, diversity_weight={diversity_weight}")
         
     def ca_step(self, state: List[int], rule: int) -> List[int]:
         """Apply CA rule to current state."""
@@ -154,6 +77,28 @@ class MaximalRCAGenerator:
             
         return new_state
     
+    def ca_step_inverse(self, state: List[int], rule: int) -> List[int]:
+        """
+        Undo ca_step: return the state that ca_step(., rule) maps to state.
+        
+        Raises:
+            ValueError: if rule is not reversible on a ring of len(state) cells
+        """
+        key = (rule, len(state))
+        inv = self._inverses.get(key)
+        if inv is None:
+            inv = self._inverses[key] = compile_inverse([rule] * len(state), boundary="periodic")
+        return inv.step(state)
+    
+    def ca_step_batch(self, states: np.ndarray, rule: int) -> np.ndarray:
+        """
+        Vectorized ca_step for a uint8 state (n,) or batch of states (batch, n).
+        
+        Returns:
+            uint8 array with the same shape as states
+        """
+        return step_table(states, elementary_table(rule), radius=1)
+    
     def state_to_tuple(self, state: List[int]) -> Tuple[int, ...]:
         """Convert state list to hashable tuple."""
         return tuple(state)
@@ -192,7 +137,7 @@ class MaximalRCAGenerator:
             state = []
             for i in range(self.n_cells):
                 # Use position-dependent pattern for diversity
-                val = (i * 3 + hash(R1_class)) % 2
+                val = (i * 3 + zlib.crc32(R1_class.encode())) % 2
                 state.append(val)
             return state
         
@@ -217,93 +162,102 @@ class MaximalRCAGenerator:
         """
         Pick next rule to maximize state space coverage with improved scoring.
         """
-        next_class = rule_to_nextclass[prev_rule]
-        candidates = [r for r, classes in rule_to_classes.items() if next_class in classes]
+        instr = self.instr
+        with instr.phase("candidate_generation"):
+            next_class = rule_to_nextclass[prev_rule]
+            candidates = class_to_candidates.get(next_class, [])
         
         if not candidates:
             raise ValueError(f"No candidate rules for next_class {next_class} after rule {prev_rule}")
         
+        p = self.params
         best_rule = None
         best_score = -float('inf')
         
-        # Debug info
+        # Debug info (only collected when the table will be printed)
+        detailed = instr.verbosity >= 2 and len(sequence) < 10
         debug_scores = {}
         
         for candidate_rule in candidates:
             # Test what new state this rule would produce
-            test_state = self.ca_step(current_state, candidate_rule)
-            state_tuple = self.state_to_tuple(test_state)
-            
-            score = 0
-            score_breakdown = {}
-            
-            # 1. Coverage bonus (MUCH stronger emphasis on unvisited states)
-            if state_tuple not in self.visited_states:
-                coverage_score = self.coverage_bonus * 10.0  # Much higher bonus
-                score += coverage_score
-                score_breakdown['coverage'] = coverage_score
-            else:
-                # Heavy penalty for revisited states
-                revisit_count = self.state_history.count(state_tuple)
-                coverage_score = -self.coverage_bonus * revisit_count  # Negative score for repeats
-                score += coverage_score
-                score_breakdown['coverage'] = coverage_score
+            with instr.phase("stepping"):
+                test_state = self.ca_step(current_state, candidate_rule)
+                state_tuple = self.state_to_tuple(test_state)
             
-            # 2. Diversity score (Hamming distance from recent states)
-            if len(self.state_history) > 0:
-                diversity_score = 0
-                history_len = min(10, len(self.state_history))
-                for prev_state in self.state_history[-history_len:]:
-                    hamming_dist = sum(a != b for a, b in zip(state_tuple, prev_state))
-                    diversity_score += hamming_dist
+            with instr.phase("scoring"):
+                score = 0
+                score_breakdown = {}
                 
-                # Normalize and weight
-                avg_diversity = diversity_score / (history_len * self.n_cells)
-                diversity_weighted = self.diversity_weight * avg_diversity * 5.0  # Increase weight
-                score += diversity_weighted
-                score_breakdown['diversity'] = diversity_weighted
-            
-            # 3. Rule repetition penalty (strongly discourage rule repetition)
-            recent_rules = sequence[-5:]  # Check last 5 rules
-            rule_repeat_count = recent_rules.count(candidate_rule)
-            if rule_repeat_count > 0:
-                repeat_penalty = -self.coverage_bonus * rule_repeat_count * 2.0
-                score += repeat_penalty
-                score_breakdown['rule_repeat'] = repeat_penalty
-            
-            # 4. Consecutive rule penalty (avoid immediate repetition)
-            if len(sequence) > 0 and sequence[-1] == candidate_rule:
-                consecutive_penalty = -self.coverage_bonus * 3.0
-                score += consecutive_penalty
-                score_breakdown['consecutive'] = consecutive_penalty
-            
-            # 5. Rule diversity bonus
-            rule_usage_in_sequence = sequence.count(candidate_rule)
-            if rule_usage_in_sequence == 0:
-                rule_diversity_score = self.coverage_bonus * 0.5  # Bonus for unused rules
-            else:
-                rule_diversity_score = -0.1 * rule_usage_in_sequence  # Small penalty for overused rules
-            score += rule_diversity_score
-            score_breakdown['rule_diversity'] = rule_diversity_score
+                # 1. Coverage bonus (MUCH stronger emphasis on unvisited states)
+                if state_tuple not in self.visited_states:
+                    coverage_score = self.coverage_bonus * p.new_state_bonus  # Much higher bonus
+                    score += coverage_score
+                    score_breakdown['coverage'] = coverage_score
+                else:
+                    # Heavy penalty for revisited states
+                    revisit_count = self.state_history.count(state_tuple)
+                    coverage_score = -self.coverage_bonus * revisit_count  # Negative score for repeats
+                    score += coverage_score
+                    score_breakdown['coverage'] = coverage_score
+                
+                # 2. Diversity score (Hamming distance from recent states)
+                if len(self.state_history) > 0:
+                    diversity_score = 0
+                    history_len = min(p.history_window, len(self.state_history))
+                    for prev_state in self.state_history[-history_len:]:
+                        hamming_dist = sum(a != b for a, b in zip(state_tuple, prev_state))
+                        diversity_score += hamming_dist
+                    
+                    # Normalize and weight
+                    avg_diversity = diversity_score / (history_len * self.n_cells)
+                    diversity_weighted = self.diversity_weight * avg_diversity * p.diversity_scale  # Increase weight
+                    score += diversity_weighted
+                    score_breakdown['diversity'] = diversity_weighted
+                
+                # 3. Rule repetition penalty (strongly discourage rule repetition)
+                recent_rules = sequence[-5:]  # Check last 5 rules
+                rule_repeat_count = recent_rules.count(candidate_rule)
+                if rule_repeat_count > 0:
+                    repeat_penalty = -self.coverage_bonus * rule_repeat_count * p.repeat_penalty
+                    score += repeat_penalty
+                    score_breakdown['rule_repeat'] = repeat_penalty
+                
+                # 4. Consecutive rule penalty (avoid immediate repetition)
+                if len(sequence) > 0 and sequence[-1] == candidate_rule:
+                    consecutive_penalty = -self.coverage_bonus * p.consecutive_penalty
+                    score += consecutive_penalty
+                    score_breakdown['consecutive'] = consecutive_penalty
+                
+                # 5. Rule diversity bonus
+                rule_usage_in_sequence = sequence.count(candidate_rule)
+                if rule_usage_in_sequence == 0:
+                    rule_diversity_score = self.coverage_bonus * p.unused_rule_bonus  # Bonus for unused rules
+                else:
+                    rule_diversity_score = -p.overuse_penalty * rule_usage_in_sequence  # Small penalty for overused rules
+                score += rule_diversity_score
+                score_breakdown['rule_diversity'] = rule_diversity_score
             
-            debug_scores[candidate_rule] = {
-                'total_score': score,
-                'breakdown': score_breakdown,
-                'leads_to_new_state': state_tuple not in self.visited_states
-            }
+            if detailed:
+                debug_scores[candidate_rule] = {
+                    'total_score': score,
+                    'breakdown': score_breakdown,
+                    'leads_to_new_state': state_tuple not in self.visited_states
+                }
             
             if score > best_score:
                 best_score = score
                 best_rule = candidate_rule
         
+        instr.count("candidates_evaluated", len(candidates))
+        
         # Debug output for the first few iterations
-        if len(sequence) < 10:
-            print(f"\nRule selection after rule {prev_rule} (class -> {next_class}):")
+        if detailed:
+            instr.log(2, f"\nRule selection after rule {prev_rule} (class -> {next_class}):")
             for rule, info in sorted(debug_scores.items()):
                 new_state_marker = "🆕" if info['leads_to_new_state'] else "🔄"
-                print(f"  Rule {rule}: {info['total_score']:.2f} {new_state_marker}")
+                instr.log(2, f"  Rule {rule}: {info['total_score']:.2f} {new_state_marker}")
                 if rule == best_rule:
-                    print(f"    ★ SELECTED: {info['breakdown']}")
+                    instr.log(2, f"    ★ SELECTED: {info['breakdown']}")
         
         return best_rule or min(candidates)
     
@@ -329,14 +283,17 @@ class MaximalRCAGenerator:
                 # For partial coverage, use reasonable default
                 max_length = min(1000, self.max_states // 10)
         
-        print(f"Target max_length: {max_length}")
+        instr = self.instr
+        instr.log(1, f"Target max_length: {max_length}")
         
         # Generate better initial state
         current_state = self.generate_initial_state(R1_class, initial_strategy)
-        print(f"Initial state ({initial_strategy}): {current_state}")
+        instr.log(1, f"Initial state ({initial_strategy}): {current_state}")
+        instr.event("start", generator="linear", n_cells=self.n_cells,
+                    R1_class=R1_class, max_length=max_length)
         
         # Step 1: Pick first rule deterministically
-        R0_candidates = [r for r, classes in rule_to_classes.items() if R1_class in classes]
+        R0_candidates = class_to_candidates.get(R1_class, [])
         if not R0_candidates:
             raise ValueError(f"No candidates for R0 with R1_class={R1_class}")
         R0 = min(R0_candidates)
@@ -355,6 +312,14 @@ class MaximalRCAGenerator:
         last_coverage = 0
         best_coverage = 0
         no_progress_counter = 0
+        if self.aim_for_full_coverage:
+            stagnation_limit = self.params.stagnation_limit_full
+            no_progress_limit = self.params.no_progress_limit_full
+        else:
+            stagnation_limit = self.params.stagnation_limit_partial
+            no_progress_limit = self.params.no_progress_limit_partial
+        progress_every = 25 if self.aim_for_full_coverage else 50
+        stop_reason = "max_length"
         
         for i in range(1, max_length - 1):
             try:
@@ -362,51 +327,64 @@ class MaximalRCAGenerator:
                 sequence.append(next_rule)
                 
                 # Update state
-                current_state = self.ca_step(current_state, next_rule)
-                state_tuple = self.state_to_tuple(current_state)
-                
-                # Coverage tracking
-                current_coverage = len(self.visited_states) / (self.max_states if self.aim_for_full_coverage else min(self.max_states, 10000))
+                with instr.phase("stepping"):
+                    current_state = self.ca_step(current_state, next_rule)
+                    state_tuple = self.state_to_tuple(current_state)
                 
-                # Improved stagnation detection
-                if state_tuple in self.visited_states:
-                    stagnation_counter += 1
-                else:
-                    stagnation_counter = max(0, stagnation_counter - 2)  # Reduce stagnation faster for progress
-                    best_coverage = max(best_coverage, current_coverage)
-                    no_progress_counter = 0  # Reset no progress counter
-                
-                # Track no progress in coverage
-                if current_coverage == last_coverage:
-                    no_progress_counter += 1
-                else:
-                    no_progress_counter = 0
+                with instr.phase("bookkeeping"):
+                    # Coverage tracking
+                    current_coverage = len(self.visited_states) / (self.max_states if self.aim_for_full_coverage else min(self.max_states, 10000))
+                    
+                    # Improved stagnation detection
+                    if state_tuple in self.visited_states:
+                        stagnation_counter += 1
+                        instr.count("revisits")
+                    else:
+                        stagnation_counter = max(0, stagnation_counter - 2)  # Reduce stagnation faster for progress
+                        best_coverage = max(best_coverage, current_coverage)
+                        no_progress_counter = 0  # Reset no progress counter
+                        instr.count("new_states")
+                    
+                    # Track no progress in coverage
+                    if current_coverage == last_coverage:
+                        no_progress_counter += 1
+                    else:
+                        no_progress_counter = 0
                 
                 # More lenient break conditions
                 if self.aim_for_full_coverage and len(self.visited_states) == self.max_states:
-                    print(f"🎉 FULL STATE SPACE COVERAGE achieved at length {len(sequence)}!")
+                    instr.log(1, f"🎉 FULL STATE SPACE COVERAGE achieved at length {len(sequence)}!")
+                    stop_reason = "full_coverage"
                     break
-                elif stagnation_counter > (200 if self.aim_for_full_coverage else 100):
-                    print(f"Breaking due to state stagnation at length {len(sequence)} (coverage: {current_coverage:.4f})")
+                elif stagnation_counter > stagnation_limit:
+                    instr.log(1, f"Breaking due to state stagnation at length {len(sequence)} (coverage: {current_coverage:.4f})")
+                    stop_reason = "stagnation"
                     break
-                elif no_progress_counter > (150 if self.aim_for_full_coverage else 75):
-                    print(f"Breaking due to no coverage progress at length {len(sequence)} (coverage: {current_coverage:.4f})")
+                elif no_progress_counter > no_progress_limit:
+                    instr.log(1, f"Breaking due to no coverage progress at length {len(sequence)} (coverage: {current_coverage:.4f})")
+                    stop_reason = "no_progress"
                     break
                 
-                self.visited_states.add(state_tuple)
-                self.state_history.append(state_tuple)
-                prev_rule = next_rule
-                last_coverage = current_coverage
+                with instr.phase("bookkeeping"):
+                    self.visited_states.add(state_tuple)
+                    self.state_history.append(state_tuple)
+                    prev_rule = next_rule
+                    last_coverage = current_coverage
+                instr.count("steps")
                 
                 # Progress reporting with better metrics
-                if i % (25 if self.aim_for_full_coverage else 50) == 0:
+                if i % progress_every == 0:
                     unique_rules = len(set(sequence))
                     rule_diversity = unique_rules / len(sequence)
-                    print(f"Length {i}: Coverage {current_coverage:.4f} ({len(self.visited_states)}/{self.max_states if self.aim_for_full_coverage else 'target'}), "
-                          f"Rule diversity: {rule_diversity:.3f}, Stagnation: {stagnation_counter}")
+                    instr.event("progress", generator="linear", length=i,
+                                coverage=current_coverage, visited=len(self.visited_states),
+                                rule_diversity=rule_diversity, stagnation=stagnation_counter)
+                    instr.log(1, f"Length {i}: Coverage {current_coverage:.4f} ({len(self.visited_states)}/{self.max_states if self.aim_for_full_coverage else 'target'}), "
+                                 f"Rule diversity: {rule_diversity:.3f}, Stagnation: {stagnation_counter}")
                 
             except ValueError as e:
-                print(f"Stopping early due to: {e}")
+                instr.log(1, f"Stopping early due to: {e}")
+                stop_reason = "error"
                 break
         
         # Step 3: Add final rule using last_rule_table
@@ -421,13 +399,15 @@ class MaximalRCAGenerator:
                 sequence.append(Rn)
         
         final_coverage = len(self.visited_states) / (self.max_states if self.aim_for_full_coverage else min(self.max_states, 10000))
+        instr.event("done", generator="linear", length=len(sequence), reason=stop_reason,
+                    visited=len(self.visited_states), coverage=final_coverage)
         
-        print(f"\n🏁 Generated maximal RCA sequence:")
-        print(f"   Length: {len(sequence)}")
-        print(f"   Unique states visited: {len(self.visited_states)}")
-        print(f"   State space coverage: {final_coverage:.6f}")
+        instr.log(1, f"\n🏁 Generated maximal RCA sequence:")
+        instr.log(1, f"   Length: {len(sequence)}")
+        instr.log(1, f"   Unique states visited: {len(self.visited_states)}")
+        instr.log(1, f"   State space coverage: {final_coverage:.6f}")
         if self.aim_for_full_coverage:
-            print(f"   Full coverage: {'✅ YES' if len(self.visited_states) == self.max_states else '❌ NO'}")
+            instr.log(1, f"   Full coverage: {'✅ YES' if len(self.visited_states) == self.max_states else '❌ NO'}")
         
         return sequence
     
@@ -459,7 +439,8 @@ if __name__ == "__main__":
     # Example 1: Small state space with debugging
     print("Example 1: Small state space with enhanced scoring")
     print("-" * 50)
-    small_generator = MaximalRCAGenerator(n_cells=3, coverage_bonus=5.0, diversity_weight=0.2)
+    small_generator = MaximalRCAGenerator(n_cells=3, coverage_bonus=5.0, diversity_weight=0.2,
+                                          instrumentation=Instrumentation(verbosity=2))
     sequence = small_generator.generate_maximal_rca("III", initial_strategy="diverse", max_length=150)
     
     properties = small_generator.analyze_sequence_properties(sequence)
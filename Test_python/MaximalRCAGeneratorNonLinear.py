@@ -1,45 +1,65 @@
 import itertools
 import random
 import math
-from typing import Set, List, Tuple, Dict, Optional, Union
+import zlib
+from typing import Set, List, Tuple, Dict, Optional, Union, NamedTuple
 
-# Your existing dictionaries
-rule_to_classes = {
-    15: {"II", "III", "VI"}, 20: {"III"}, 23: {"III"}, 27: {"III"}, 30: {"II"}, 39: {"III"}, 43: {"III"}, 45: {"II"},
-    51: {"I", "III", "V"}, 53: {"I"}, 54: {"I"}, 57: {"I"}, 58: {"I"}, 60: {"I", "II", "IV"}, 65: {"III"}, 68: {"III"},
-    75: {"II"}, 77: {"III"}, 78: {"III"}, 80: {"III"}, 83: {"I"}, 85: {"I", "II", "III", "V"}, 86: {"I", "III", "V"}, 89: {"I", "III", "V"},
-    90: {"I", "II", "III", "IV", "V", "VI"}, 92: {"I"}, 99: {"I"}, 101: {"I", "III", "V"}, 102: {"I", "III", "V"}, 105: {"I", "III", "IV", "V", "VI"},
-    106: {"I", "III", "V"}, 108: {"I"}, 113: {"III"}, 114: {"III"}, 120: {"II"}, 135: {"II"}, 141: {"III"}, 142: {"III"},
-    147: {"I"}, 149: {"I", "III", "V"}, 150: {"II", "III", "IV", "V", "VI"}, 153: {"I", "III", "V"}, 154: {"I", "III", "V"},
-    156: {"I"}, 163: {"I"}, 165: {"I", "II", "III", "V", "VI"}, 166: {"I", "III", "V"}, 169: {"I", "III", "V"},
-    170: {"I", "II", "V"}, 172: {"I"}, 177: {"III"}, 178: {"III"}, 180: {"II"}, 195: {"I", "IV"}, 196: {"III"},
-    197: {"I"}, 198: {"I"}, 201: {"I", "V"}, 202: {"I"}, 204: {"I", "III"}, 210: {"II"}, 212: {"III"}, 216: {"III"},
-    225: {"II"}, 228: {"III"}, 232: {"III"}, 240: {"II", "III", "VI"}, 5: {"II", "III", "VI"}, 17: {"I", "V"},
-}
+import numpy as np
 
-rule_to_nextclass = {
-    15: "II", 20: "III", 23: "III", 27: "III", 30: "II", 39: "III", 43: "III", 45: "II",
-    51: "I", 53: "I", 54: "I", 57: "I", 58: "I", 60: "IV", 65: "III", 68: "III",
-    75: "II", 77: "III", 78: "III", 80: "III", 83: "I", 85: "II", 86: "I", 89: "I",
-    90: "IV", 92: "I", 99: "I", 101: "I", 102: "III", 105: "IV", 106: "I", 108: "I",
-    113: "III", 114: "III", 120: "II", 135: "II", 141: "III", 142: "III", 147: "I",
-    149: "I", 150: "IV", 153: "III", 154: "I", 156: "I", 163: "I", 165: "II",
-    166: "I", 169: "I", 170: "II", 172: "I", 177: "III", 178: "III", 180: "II",
-    195: "IV", 196: "III", 197: "I", 198: "I", 201: "I", 202: "I", 204: "I",
-    210: "II", 212: "III", 216: "III", 225: "II", 228: "III", 232: "III", 240: "II",
-    5: "II", 17: "I"
-}
+from ca_kernels import neighborhood_index, table_array, widen_mask, widen_table
+from classRules import last_rule_table
+from instrumentation import Instrumentation
+from rule_tables import (GENERATOR_CLASS_TO_CANDIDATES as class_to_candidates,
+                         GENERATOR_RULE_TO_CLASSES as rule_to_classes,
+                         GENERATOR_RULE_TO_NEXTCLASS as rule_to_nextclass)
+from scoring_params import ScoringParams
 
-last_rule_table = {
-    "I": [17, 20, 65, 68], "II": [5, 20, 65, 80], "III": [5, 17, 68, 80],
-    "IV": [20, 65], "V": [17, 68], "VI": [5, 80],
-}
+class CompiledRule(NamedTuple):
+    """
+    A rule compiled to a neighborhood lookup table.
+
+    The table index packs the 2*radius+1 cells left to right, most significant
+    bit first (the elementary-rule convention), so radius 1 gives 8 entries and
+    radius 2 gives 32. Bit k of random_mask marks neighborhood k as a random
+    tie: its table entry is unused and the output is drawn from the engine rng.
+    """
+    radius: int
+    table: Tuple[int, ...]
+    random_mask: int = 0
+
+class CandidateBatch(NamedTuple):
+    """Candidate rules for one class, stacked for batched evaluation."""
+    rules: List[int]
+    tables: np.ndarray          # (candidates, 2**(2*radius+1)) uint8
+    radius: int                 # shared radius all tables were widened to
+    random_masks: List[int]     # per candidate, widened to radius
+    rule_types: List[str]
+    is_nonlinear: np.ndarray    # (candidates,) bool
 
 class NonLinearRuleEngine:
     """Handles all non-linear CA rule types."""
     
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Args:
+            seed: Seed for the random tie-breaking path (None = global random
+                module; the batch path's NumPy generator is then seeded from it
+                on first use, so random.seed() makes both paths reproducible
+                and scalar-only callers never draw from the global stream)
+        """
         self.global_state_info = {}  # For context-dependent rules
+        self.rng = random.Random(seed) if seed is not None else random
+        self._seed = seed
+        self._np_rng: Optional[np.random.Generator] = None
+        self._compiled: Dict[Tuple[int, int], CompiledRule] = {}
+
+    @property
+    def np_rng(self) -> np.random.Generator:
+        """NumPy generator for batch ties, created on first use."""
+        if self._np_rng is None:
+            seed = self._seed if self._seed is not None else random.getrandbits(64)
+            self._np_rng = np.random.default_rng(seed)
+        return self._np_rng
         
     def get_rule_type_and_params(self, rule_num: int) -> Tuple[str, int]:
         """Determine rule type and extract parameters from rule number."""
@@ -177,8 +197,118 @@ class NonLinearRuleEngine:
             # Variance-based rules
             return 1 if pattern_variance > 1.0 else 0
     
+    def rule_radius(self, rule_num: int, n: int) -> int:
+        """Neighborhood radius a rule uses on a ring of n cells."""
+        rule_type, _ = self.get_rule_type_and_params(rule_num)
+        if rule_type == "Threshold":
+            return 2 if n > 3 else 1
+        if rule_type == "Extended":
+            return 2 if n >= 5 else 1
+        return 1
+    
+    def compile_rule(self, rule_num: int, n: int) -> CompiledRule:
+        """
+        Compile a rule into a lookup table for rings of n cells.
+        
+        Tables depend on n only through the radius, so they are cached by
+        (rule_num, radius) and each rule is built at most twice.
+        """
+        radius = self.rule_radius(rule_num, n)
+        key = (rule_num, radius)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+        
+        rule_type, param = self.get_rule_type_and_params(rule_num)
+        width = 2 * radius + 1
+        table = []
+        random_mask = 0
+        for idx in range(1 << width):
+            cells = [(idx >> (width - 1 - k)) & 1 for k in range(width)]
+            if rule_type == "Elementary":
+                out = (param >> idx) & 1
+            elif rule_type == "Majority":
+                if sum(cells) == 1 and (param // 10) % 10 > 2:
+                    random_mask |= 1 << idx
+                    out = 0
+                else:
+                    out = self.majority_rule(cells, param)
+            elif rule_type == "XOR":
+                out = self.xor_rule(cells, param)
+            elif rule_type == "Totalistic":
+                out = self.totalistic_rule(cells, param)
+            elif rule_type == "Threshold":
+                out = self.threshold_rule(cells, param)
+            elif radius == 2:
+                out = self.extended_rule(cells, 2, param)
+            else:
+                # extended_rule falls back to XOR on rings shorter than 5
+                out = self.xor_rule(cells, param)
+            table.append(int(out))
+        
+        compiled = CompiledRule(radius, tuple(table), random_mask)
+        self._compiled[key] = compiled
+        return compiled
+    
+    def apply_compiled(self, state: List[int], compiled: CompiledRule) -> List[int]:
+        """Apply a compiled rule to a periodic state with one table lookup per cell."""
+        n = len(state)
+        r = compiled.radius
+        table = compiled.table
+        width_mask = (1 << (2 * r + 1)) - 1
+        
+        # Sliding window over the periodically padded state
+        padded = state[n - r:] + state + state[:r]
+        idx = 0
+        for k in range(2 * r):
+            idx = (idx << 1) | padded[k]
+        
+        new_state = [0] * n
+        for i in range(n):
+            idx = ((idx << 1) & width_mask) | padded[i + 2 * r]
+            new_state[i] = table[idx]
+        
+        if compiled.random_mask:
+            # Random ties are resolved separately so the table path stays deterministic
+            self._resolve_random_ties(state, new_state, compiled)
+        return new_state
+    
+    def _resolve_random_ties(self, state: List[int], new_state: List[int],
+                             compiled: CompiledRule):
+        n = len(state)
+        r = compiled.radius
+        for i in range(n):
+            idx = 0
+            for offset in range(-r, r + 1):
+                idx = (idx << 1) | state[(i + offset) % n]
+            if (compiled.random_mask >> idx) & 1:
+                new_state[i] = self.rng.randint(0, 1)
+    
     def apply_rule(self, state: List[int], rule_num: int) -> List[int]:
-        """Apply any rule type to the current state."""
+        """Apply any rule type to the current state via its compiled table."""
+        return self.apply_compiled(state, self.compile_rule(rule_num, len(state)))
+    
+    def apply_rule_batch(self, states: np.ndarray, rule_num: int) -> np.ndarray:
+        """
+        Vectorized apply_rule for one state (n,) or a batch of states (batch, n).
+        
+        Neighborhood indices are built with np.roll and mapped through the
+        compiled table; random ties draw from the engine's NumPy generator.
+        
+        Returns:
+            uint8 array with the same shape as states
+        """
+        states = np.asarray(states, dtype=np.uint8)
+        compiled = self.compile_rule(rule_num, states.shape[-1])
+        idx = neighborhood_index(states, compiled.radius)
+        new_states = table_array(compiled.table)[idx]
+        if compiled.random_mask:
+            ties = ((compiled.random_mask >> idx.astype(np.int64)) & 1).astype(bool)
+            new_states[ties] = self.np_rng.integers(0, 2, size=int(ties.sum()), dtype=np.uint8)
+        return new_states
+    
+    def apply_rule_reference(self, state: List[int], rule_num: int) -> List[int]:
+        """Uncompiled per-cell implementation, kept as the reference for apply_rule."""
         rule_type, param = self.get_rule_type_and_params(rule_num)
         n = len(state)
         new_state = [0] * n
@@ -229,7 +359,9 @@ class EnhancedMaximalRCAGenerator:
                  diversity_weight: float = 0.1,
                  nonlinear_weight: float = 1.0,
                  aim_for_full_coverage: bool = None,
-                 enable_nonlinear: bool = True):
+                 enable_nonlinear: bool = True,
+                 params: Optional[ScoringParams] = None,
+                 instrumentation: Optional[Instrumentation] = None):
         """
         Enhanced RCA generator with non-linear rules.
         
@@ -241,21 +373,28 @@ class EnhancedMaximalRCAGenerator:
             nonlinear_weight: Weight bonus for non-linear rules
             aim_for_full_coverage: Whether to aim for full state space coverage
             enable_nonlinear: Whether to use non-linear rules
+            params: Scoring constants and stopping limits (defaults if None)
+            instrumentation: Logging, progress events and phase timers (verbosity 1 if None)
         """
         self.n_cells = n_cells
         self.n_bits = n_bits
         self.max_states = 2 ** (n_cells * n_bits)
         self.visited_states: Set[Tuple[int, ...]] = set()
         self.state_history: List[Tuple[int, ...]] = []
+        self.visit_counts: Dict[Tuple[int, ...], int] = {}  # state -> occurrences in state_history
         
         # Configurable scoring weights
         self.coverage_bonus = coverage_bonus
         self.diversity_weight = diversity_weight
         self.nonlinear_weight = nonlinear_weight
         self.enable_nonlinear = enable_nonlinear
+        self.params = params or ScoringParams()
+        self.instr = instrumentation or Instrumentation()
         
         # Rule engine for non-linear rules
         self.rule_engine = NonLinearRuleEngine()
+        self._candidate_batches: Dict[str, CandidateBatch] = {}
+        self._inverses = {}  # (rule, n) -> compiled inverse, built on first use
         
         # Rule usage tracking
         self.rule_usage = {}
@@ -270,20 +409,37 @@ class EnhancedMaximalRCAGenerator:
         else:
             self.aim_for_full_coverage = aim_for_full_coverage
         
-        print(f"🚀 Enhanced RCA Generator with Non-Linear Rules:")
-        print(f"   State space: {self.max_states} possible states")
-        print(f"   Full coverage mode: {self.aim_for_full_coverage}")
-        print(f"   Non-linear rules: {'✅ Enabled' if enable_nonlinear else '❌ Disabled'}")
-        print(f"   Scoring: coverage={coverage_bonus}, diversity={diversity_weight}, nonlinear={nonlinear_weight}")
+        self.instr.log(1, f"🚀 Enhanced RCA Generator with Non-Linear Rules:")
+        self.instr.log(1, f"   State space: {self.max_states} possible states")
+        self.instr.log(1, f"   Full coverage mode: {self.aim_for_full_coverage}")
+        self.instr.log(1, f"   Non-linear rules: {'✅ Enabled' if enable_nonlinear else '❌ Disabled'}")
+        self.instr.log(1, f"   Scoring: coverage={coverage_bonus}, diversity={diversity_weight}, nonlinear={nonlinear_weight}")
         
     def ca_step(self, state: List[int], rule: int) -> List[int]:
         """Apply CA rule (linear or non-linear) to current state."""
         return self.rule_engine.apply_rule(state, rule)
     
+    def ca_step_inverse(self, state: List[int], rule: int) -> List[int]:
+        """
+        Undo ca_step for a deterministic reversible rule.
+        
+        Raises:
+            ValueError: if rule breaks ties randomly or is not reversible on
+                a ring of len(state) cells
+        """
+        # inverse builds on reversibility, which imports this module
+        from inverse import compile_inverse
+        
+        key = (rule, len(state))
+        inv = self._inverses.get(key)
+        if inv is None:
+            inv = self._inverses[key] = compile_inverse([rule] * len(state), boundary="periodic")
+        return inv.step(state)
+    
     def get_available_rules(self, next_class: str) -> List[int]:
         """Get all available rules (linear + non-linear) for given class."""
         # Start with elementary rules
-        elementary_rules = [r for r, classes in rule_to_classes.items() if next_class in classes]
+        elementary_rules = list(class_to_candidates.get(next_class, []))
         
         if not self.enable_nonlinear:
             return elementary_rules
@@ -313,19 +469,20 @@ class EnhancedMaximalRCAGenerator:
     def score_rule_candidate(self, candidate_rule: int, test_state: List[int], 
                            state_tuple: Tuple[int, ...]) -> float:
         """Enhanced scoring with non-linear rule bonuses."""
+        p = self.params
         score = 0
         
         # 1. Coverage bonus
         if state_tuple not in self.visited_states:
             score += self.coverage_bonus
         else:
-            revisit_count = self.state_history.count(state_tuple)
-            score += self.coverage_bonus * (0.1 / (1 + revisit_count))
+            revisit_count = self.visit_counts.get(state_tuple, 0)
+            score += self.coverage_bonus * (p.nl_revisit_bonus / (1 + revisit_count))
         
         # 2. Diversity score
         if self.state_history:
             diversity_score = 0
-            history_len = min(20, len(self.state_history))
+            history_len = min(p.nl_history_window, len(self.state_history))
             for prev_state in self.state_history[-history_len:]:
                 hamming_dist = sum(a != b for a, b in zip(state_tuple, prev_state))
                 diversity_score += hamming_dist / self.n_cells
@@ -341,56 +498,135 @@ class EnhancedMaximalRCAGenerator:
                 
                 # Extra bonus for underused rule types
                 type_usage = self.rule_type_counts.get(rule_type, 0)
-                type_diversity_bonus = 0.5 / (1 + type_usage)
+                type_diversity_bonus = p.nl_type_diversity_bonus / (1 + type_usage)
                 score += type_diversity_bonus
         
         # 4. Rule usage penalty
         rule_usage = self.rule_usage.get(candidate_rule, 0)
-        usage_penalty = 0.1 * rule_usage
+        usage_penalty = p.nl_usage_penalty * rule_usage
         score -= usage_penalty
         
         # 5. Full coverage bonus
         if self.aim_for_full_coverage:
             coverage_ratio = len(self.visited_states) / self.max_states
-            if coverage_ratio > 0.8:
-                full_coverage_bonus = (1 - coverage_ratio) * 2.0
+            if coverage_ratio > p.nl_coverage_threshold:
+                full_coverage_bonus = (1 - coverage_ratio) * p.nl_full_coverage_weight
                 score += full_coverage_bonus
         
         return score
     
-    def pick_next_rule_enhanced(self, prev_rule: int, current_state: List[int]) -> int:
-        """Enhanced rule selection with non-linear options."""
-        next_class = rule_to_nextclass.get(prev_rule, "I")  # Default fallback
-        candidates = self.get_available_rules(next_class)
+    def _record_state(self, state_tuple: Tuple[int, ...]):
+        """Add a state to the visited set, history and visit counts."""
+        self.visited_states.add(state_tuple)
+        self.state_history.append(state_tuple)
+        self.visit_counts[state_tuple] = self.visit_counts.get(state_tuple, 0) + 1
+    
+    def get_candidate_batch(self, next_class: str) -> CandidateBatch:
+        """Compiled and stacked candidate tables for a class (cached)."""
+        batch = self._candidate_batches.get(next_class)
+        if batch is not None:
+            return batch
+        
+        rules = self.get_available_rules(next_class)
+        if not rules:
+            self.instr.log(1, f"⚠️  No candidates for next_class {next_class}, using fallback")
+            rules = list(rule_to_classes.keys())[:10]  # Fallback
+        
+        compiled = [self.rule_engine.compile_rule(r, self.n_cells) for r in rules]
+        radius = max(c.radius for c in compiled)
+        tables = np.array([widen_table(c.table, c.radius, radius) for c in compiled], dtype=np.uint8)
+        random_masks = [widen_mask(c.random_mask, c.radius, radius) for c in compiled]
+        rule_types = [self.rule_engine.get_rule_type_and_params(r)[0] for r in rules]
+        is_nonlinear = np.array([t != "Elementary" for t in rule_types])
+        
+        batch = CandidateBatch(rules, tables, radius, random_masks, rule_types, is_nonlinear)
+        self._candidate_batches[next_class] = batch
+        return batch
+    
+    def score_candidate_batch(self, batch: CandidateBatch, next_states: np.ndarray) -> np.ndarray:
+        """
+        Vectorized score_rule_candidate over all candidates of a batch.
         
-        if not candidates:
-            print(f"⚠️  No candidates for next_class {next_class}, using fallback")
-            candidates = list(rule_to_classes.keys())[:10]  # Fallback
+        Terms are accumulated in the same order as the scalar version, so the
+        scores (and therefore tie-breaking) match it exactly.
         
-        best_rule = None
-        best_score = -float('inf')
+        Args:
+            batch: Candidates, in the same order as the rows of next_states
+            next_states: (candidates, n_cells) uint8 successor states
         
-        for candidate_rule in candidates:
-            try:
-                # Test what new state this rule would produce
-                test_state = self.ca_step(current_state, candidate_rule)
-                state_tuple = tuple(test_state)
-                
-                score = self.score_rule_candidate(candidate_rule, test_state, state_tuple)
-                
-                if score > best_score:
-                    best_score = score
-                    best_rule = candidate_rule
-                    
-            except Exception as e:
-                # Skip problematic rules
-                continue
+        Returns:
+            float array of scores, one per candidate
+        """
+        p = self.params
+        state_tuples = [tuple(row) for row in next_states.tolist()]
+        
+        # 1. Coverage bonus
+        is_new = np.array([t not in self.visited_states for t in state_tuples])
+        revisits = np.array([self.visit_counts.get(t, 0) for t in state_tuples])
+        scores = np.where(is_new, float(self.coverage_bonus),
+                          self.coverage_bonus * (p.nl_revisit_bonus / (1 + revisits)))
+        
+        # 2. Diversity score
+        if self.state_history:
+            history_len = min(p.nl_history_window, len(self.state_history))
+            history = np.array(self.state_history[-history_len:], dtype=np.uint8)
+            hamming = (next_states[:, None, :] != history[None, :, :]).sum(axis=2)
+            diversity = np.zeros(len(batch.rules))
+            for k in range(history_len):
+                diversity += hamming[:, k] / self.n_cells
+            scores += self.diversity_weight * (diversity / history_len)
+        
+        # 3. Non-linear rule bonus (+ extra bonus for underused rule types)
+        if self.enable_nonlinear:
+            type_usage = np.array([self.rule_type_counts.get(t, 0) for t in batch.rule_types])
+            scores += np.where(batch.is_nonlinear, self.nonlinear_weight, 0.0)
+            scores += np.where(batch.is_nonlinear, p.nl_type_diversity_bonus / (1 + type_usage), 0.0)
         
-        return best_rule or min(candidates)
+        # 4. Rule usage penalty
+        usage = np.array([self.rule_usage.get(r, 0) for r in batch.rules])
+        scores -= p.nl_usage_penalty * usage
+        
+        # 5. Full coverage bonus
+        if self.aim_for_full_coverage:
+            coverage_ratio = len(self.visited_states) / self.max_states
+            if coverage_ratio > p.nl_coverage_threshold:
+                scores += (1 - coverage_ratio) * p.nl_full_coverage_weight
+        
+        return scores
+    
+    def pick_next_rule_enhanced(self, prev_rule: int, current_state: List[int]) -> int:
+        """
+        Enhanced rule selection with non-linear options.
+        
+        All candidates are stepped in one gather over their stacked tables and
+        scored as arrays, so the cost per step barely grows with the number of
+        candidates.
+        """
+        instr = self.instr
+        with instr.phase("candidate_generation"):
+            next_class = rule_to_nextclass.get(prev_rule, "I")  # Default fallback
+            batch = self.get_candidate_batch(next_class)
+        
+        with instr.phase("stepping"):
+            idx = neighborhood_index(np.asarray(current_state, dtype=np.uint8), batch.radius)
+            next_states = batch.tables[:, idx]
+            # Random ties use the engine rng in candidate then cell order,
+            # exactly as stepping the candidates one by one would
+            for k, mask in enumerate(batch.random_masks):
+                if mask:
+                    for i in np.flatnonzero((mask >> idx.astype(np.int64)) & 1):
+                        next_states[k, i] = self.rule_engine.rng.randint(0, 1)
+        
+        with instr.phase("scoring"):
+            scores = self.score_candidate_batch(batch, next_states)
+            best_rule = batch.rules[int(np.argmax(scores))]
+        
+        instr.count("candidates_evaluated", len(batch.rules))
+        return best_rule or min(batch.rules)
     
     def generate_enhanced_rca(self, R1_class: str, max_length: Optional[int] = None, 
                             initial_strategy: str = "class_based",
-                            debug_level: int = 1) -> List[int]:
+                            debug_level: Optional[int] = None) -> List[int]:
         """
         Generate enhanced RCA sequence with non-linear rules.
         
@@ -398,11 +634,24 @@ class EnhancedMaximalRCAGenerator:
             R1_class: Starting class for R1
             max_length: Maximum sequence length
             initial_strategy: Strategy for initial state generation
-            debug_level: 0=quiet, 1=progress, 2=detailed
+            debug_level: 0=quiet, 1=progress, 2=detailed; overrides the
+                instrumentation verbosity for this call when given
         
         Returns:
             List of CA rules forming maximal-length sequence
         """
+        if debug_level is None:
+            return self._generate_enhanced_rca(R1_class, max_length, initial_strategy)
+        # The instrumentation may be shared with other generators, so put its level back
+        saved = self.instr.verbosity
+        self.instr.verbosity = debug_level
+        try:
+            return self._generate_enhanced_rca(R1_class, max_length, initial_strategy)
+        finally:
+            self.instr.verbosity = saved
+    
+    def _generate_enhanced_rca(self, R1_class: str, max_length: Optional[int],
+                               initial_strategy: str) -> List[int]:
         # Auto-determine max_length
         if max_length is None:
             if self.aim_for_full_coverage:
@@ -410,16 +659,17 @@ class EnhancedMaximalRCAGenerator:
             else:
                 max_length = min(2000, self.max_states // 5)
         
-        if debug_level >= 1:
-            print(f"🎯 Target max_length: {max_length}")
+        instr = self.instr
+        instr.log(1, f"🎯 Target max_length: {max_length}")
         
         # Generate initial state
         current_state = self.generate_initial_state(R1_class, initial_strategy)
-        if debug_level >= 1:
-            print(f"🏁 Initial state ({initial_strategy}): {current_state}")
+        instr.log(1, f"🏁 Initial state ({initial_strategy}): {current_state}")
+        instr.event("start", generator="nonlinear", n_cells=self.n_cells,
+                    R1_class=R1_class, max_length=max_length)
         
         # Pick first rule
-        R0_candidates = [r for r, classes in rule_to_classes.items() if R1_class in classes]
+        R0_candidates = class_to_candidates.get(R1_class, [])
         if not R0_candidates:
             raise ValueError(f"No candidates for R0 with R1_class={R1_class}")
         R0 = min(R0_candidates)
@@ -430,8 +680,7 @@ class EnhancedMaximalRCAGenerator:
         # Apply first rule and track
         current_state = self.ca_step(current_state, R0)
         state_tuple = tuple(current_state)
-        self.visited_states.add(state_tuple)
-        self.state_history.append(state_tuple)
+        self._record_state(state_tuple)
         
         # Update tracking
         rule_type, _ = self.rule_engine.get_rule_type_and_params(R0)
@@ -441,6 +690,11 @@ class EnhancedMaximalRCAGenerator:
         # Generate sequence with enhanced selection
         stagnation_counter = 0
         last_coverage = 0
+        if self.aim_for_full_coverage:
+            stagnation_limit = self.params.nl_stagnation_limit_full
+        else:
+            stagnation_limit = self.params.nl_stagnation_limit_partial
+        stop_reason = "max_length"
         
         for i in range(1, max_length - 1):
             try:
@@ -448,52 +702,61 @@ class EnhancedMaximalRCAGenerator:
                 sequence.append(next_rule)
                 
                 # Update state and tracking
-                current_state = self.ca_step(current_state, next_rule)
-                state_tuple = tuple(current_state)
-                
-                # Update rule tracking
-                rule_type, _ = self.rule_engine.get_rule_type_and_params(next_rule)
-                self.rule_type_counts[rule_type] += 1
-                self.rule_usage[next_rule] = self.rule_usage.get(next_rule, 0) + 1
+                with instr.phase("stepping"):
+                    current_state = self.ca_step(current_state, next_rule)
+                    state_tuple = tuple(current_state)
                 
-                # Stagnation and coverage tracking
-                current_coverage = len(self.visited_states) / (self.max_states if self.aim_for_full_coverage else min(self.max_states, 10000))
-                
-                if state_tuple in self.visited_states:
-                    stagnation_counter += 1
-                    if current_coverage == last_coverage:
-                        stagnation_counter += 2
-                else:
-                    stagnation_counter = max(0, stagnation_counter - 1)
+                with instr.phase("bookkeeping"):
+                    # Update rule tracking
+                    rule_type, _ = self.rule_engine.get_rule_type_and_params(next_rule)
+                    self.rule_type_counts[rule_type] += 1
+                    self.rule_usage[next_rule] = self.rule_usage.get(next_rule, 0) + 1
+                    
+                    # Stagnation and coverage tracking
+                    current_coverage = len(self.visited_states) / (self.max_states if self.aim_for_full_coverage else min(self.max_states, 10000))
+                    
+                    if state_tuple in self.visited_states:
+                        stagnation_counter += 1
+                        if current_coverage == last_coverage:
+                            stagnation_counter += 2
+                        instr.count("revisits")
+                    else:
+                        stagnation_counter = max(0, stagnation_counter - 1)
+                        instr.count("new_states")
                 
                 # Break conditions
                 if self.aim_for_full_coverage and len(self.visited_states) == self.max_states:
-                    if debug_level >= 1:
-                        print(f"🎉 FULL COVERAGE achieved at length {len(sequence)}!")
+                    instr.log(1, f"🎉 FULL COVERAGE achieved at length {len(sequence)}!")
+                    stop_reason = "full_coverage"
                     break
-                elif stagnation_counter > (150 if self.aim_for_full_coverage else 75):
-                    if debug_level >= 1:
-                        print(f"🛑 Breaking due to stagnation at length {len(sequence)}")
+                elif stagnation_counter > stagnation_limit:
+                    instr.log(1, f"🛑 Breaking due to stagnation at length {len(sequence)}")
+                    stop_reason = "stagnation"
                     break
                 
-                self.visited_states.add(state_tuple)
-                self.state_history.append(state_tuple)
-                prev_rule = next_rule
-                last_coverage = current_coverage
+                with instr.phase("bookkeeping"):
+                    self._record_state(state_tuple)
+                    prev_rule = next_rule
+                    last_coverage = current_coverage
+                instr.count("steps")
                 
                 # Progress reporting
-                if debug_level >= 1 and i % 100 == 0:
-                    rule_desc = self.rule_engine.get_rule_description(next_rule)
-                    print(f"📊 Length {i}: Coverage {current_coverage:.4f}, "
-                          f"Last rule: {rule_desc}, Stagnation: {stagnation_counter}")
+                if i % 100 == 0:
+                    instr.event("progress", generator="nonlinear", length=i,
+                                coverage=current_coverage, visited=len(self.visited_states),
+                                last_rule=next_rule, stagnation=stagnation_counter)
+                    if instr.verbosity >= 1:
+                        rule_desc = self.rule_engine.get_rule_description(next_rule)
+                        instr.log(1, f"📊 Length {i}: Coverage {current_coverage:.4f}, "
+                                     f"Last rule: {rule_desc}, Stagnation: {stagnation_counter}")
                 
                 # Detailed debugging
-                if debug_level >= 2 and i % 50 == 0:
-                    print(f"🔍 Rule types used: {dict(self.rule_type_counts)}")
+                if i % 50 == 0:
+                    instr.log(2, f"🔍 Rule types used: {dict(self.rule_type_counts)}")
                 
             except Exception as e:
-                if debug_level >= 1:
-                    print(f"⚠️  Stopping early due to: {e}")
+                instr.log(1, f"⚠️  Stopping early due to: {e}")
+                stop_reason = "error"
                 break
         
         # Add final rule
@@ -507,16 +770,17 @@ class EnhancedMaximalRCAGenerator:
         
         # Final reporting
         final_coverage = len(self.visited_states) / (self.max_states if self.aim_for_full_coverage else min(self.max_states, 10000))
-        
-        if debug_level >= 1:
-            print(f"\n🏆 Enhanced RCA Sequence Generated:")
-            print(f"   Length: {len(sequence)}")
-            print(f"   States visited: {len(self.visited_states)}")
-            print(f"   Coverage: {final_coverage:.6f}")
-            print(f"   Rule types: {dict(self.rule_type_counts)}")
-            if self.enable_nonlinear:
-                nonlinear_count = sum(self.rule_type_counts.values()) - self.rule_type_counts["Elementary"]
-                print(f"   Non-linear rules: {nonlinear_count}/{len(sequence)} ({nonlinear_count/len(sequence)*100:.1f}%)")
+        instr.event("done", generator="nonlinear", length=len(sequence), reason=stop_reason,
+                    visited=len(self.visited_states), coverage=final_coverage)
+        
+        instr.log(1, f"\n🏆 Enhanced RCA Sequence Generated:")
+        instr.log(1, f"   Length: {len(sequence)}")
+        instr.log(1, f"   States visited: {len(self.visited_states)}")
+        instr.log(1, f"   Coverage: {final_coverage:.6f}")
+        instr.log(1, f"   Rule types: {dict(self.rule_type_counts)}")
+        if self.enable_nonlinear:
+            nonlinear_count = sum(self.rule_type_counts.values()) - self.rule_type_counts["Elementary"]
+            instr.log(1, f"   Non-linear rules: {nonlinear_count}/{len(sequence)} ({nonlinear_count/len(sequence)*100:.1f}%)")
         
         return sequence
     
@@ -536,7 +800,7 @@ class EnhancedMaximalRCAGenerator:
         elif strategy == "diverse":
             state = []
             for i in range(self.n_cells):
-                val = (i * 3 + hash(R1_class)) % 2
+                val = (i * 3 + zlib.crc32(R1_class.encode())) % 2
                 state.append(val)
             return state
         else:
@@ -0,0 +1,235 @@
+"""
+Batch experiment runner for the maximal RCA generators.
+
+Fans a grid of generator configurations out over a process pool and streams
+one JSON line per finished run to disk, so large sweeps use every core and
+survive being interrupted half way: a rerun into the same file skips every
+config that already has a result row there. Generators run with verbosity 0 and each
+row carries the run's instrumentation snapshot under "profile".
+
+Usage:
+    grid = make_grid(n_cells=[4, 5, 6], R1_class=["I", "III"],
+                     initial_strategy=["class_based", "diverse"],
+                     coverage_bonus=[2.0, 4.0], seed=range(10))
+    run_batch(grid, "sweep.jsonl")
+    rows = load_results("sweep.jsonl")
+"""
+
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import MaximalRCAGenerator as linear_module
+import MaximalRCAGeneratorNonLinear as nonlinear_module
+from instrumentation import Instrumentation
+from scoring_params import ScoringParams
+
+# Defaults used for any grid axis that is not given explicitly
+DEFAULT_CONFIG = {
+    "generator": "nonlinear",       # "linear" or "nonlinear"
+    "n_cells": 5,
+    "R1_class": "I",
+    "initial_strategy": "class_based",
+    "coverage_bonus": 2.0,
+    "diversity_weight": 0.1,
+    "nonlinear_weight": 1.0,
+    "max_length": None,
+    "seed": 0,
+    "params": None,                 # ScoringParams.to_dict() overrides, or None
+}
+
+GRID_AXES = tuple(DEFAULT_CONFIG.keys())
+
+
+def make_grid(**axes: Iterable) -> List[Dict]:
+    """
+    Build the cartesian product of the given parameter axes.
+
+    Args:
+        **axes: Iterable of values per config key (see DEFAULT_CONFIG);
+            missing keys fall back to their default
+
+    Returns:
+        List of config dicts, one per grid point
+    """
+    unknown = set(axes) - set(GRID_AXES)
+    if unknown:
+        raise ValueError(f"Unknown grid axes: {sorted(unknown)}")
+
+    keys = list(axes.keys())
+    values = [list(axes[k]) for k in keys]
+    grid = []
+    for combo in itertools.product(*values):
+        config = dict(DEFAULT_CONFIG)
+        config.update(zip(keys, combo))
+        grid.append(config)
+    return grid
+
+
+def run_config(config: Dict) -> Dict:
+    """
+    Run a single generator configuration and return one flat result row.
+
+    Args:
+        config: Config dict as produced by make_grid
+
+    Returns:
+        The config merged with the sequence analysis and wall-clock time
+    """
+    random.seed(config["seed"])
+    params = ScoringParams.from_dict(config["params"]) if config.get("params") else None
+    instr = Instrumentation(verbosity=0)
+    start = time.perf_counter()
+
+    if config["generator"] == "linear":
+        gen = linear_module.MaximalRCAGenerator(
+            n_cells=config["n_cells"],
+            coverage_bonus=config["coverage_bonus"],
+            diversity_weight=config["diversity_weight"],
+            params=params,
+            instrumentation=instr,
+        )
+        sequence = gen.generate_maximal_rca(
+            config["R1_class"],
+            max_length=config["max_length"],
+            initial_strategy=config["initial_strategy"],
+        )
+        analysis = gen.analyze_sequence_properties(sequence)
+    elif config["generator"] == "nonlinear":
+        gen = nonlinear_module.EnhancedMaximalRCAGenerator(
+            n_cells=config["n_cells"],
+            coverage_bonus=config["coverage_bonus"],
+            diversity_weight=config["diversity_weight"],
+            nonlinear_weight=config["nonlinear_weight"],
+            params=params,
+            instrumentation=instr,
+        )
+        sequence = gen.generate_enhanced_rca(
+            config["R1_class"],
+            max_length=config["max_length"],
+            initial_strategy=config["initial_strategy"],
+        )
+        analysis = gen.analyze_enhanced_sequence(sequence)
+    else:
+        raise ValueError(f"Unknown generator: {config['generator']}")
+
+    row = dict(config)
+    row.update(analysis)
+    row["elapsed_s"] = time.perf_counter() - start
+    row["sequence"] = sequence
+    row["profile"] = instr.snapshot()
+    return row
+
+
+def run_configs(configs: List[Dict],
+                max_workers: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Run configs on a process pool, yielding rows as they finish.
+
+    A failed config yields its config with an "error" field instead of
+    aborting the rest of the batch.
+
+    Args:
+        configs: Config dicts, e.g. from make_grid
+        max_workers: Pool size (None = os.cpu_count())
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(run_config, config): config for config in configs}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                row = dict(futures[future])
+                row["error"] = repr(e)
+                yield row
+
+
+def config_key(config: Dict) -> str:
+    """Canonical JSON of the grid fields of a config or result row."""
+    return json.dumps({k: config.get(k) for k in GRID_AXES}, sort_keys=True)
+
+
+def load_done(path: str) -> Set[str]:
+    """config_key of every config with a result row in path (errors are retried)."""
+    if not os.path.exists(path):
+        return set()
+    return {config_key(row) for row in load_results(path) if "error" not in row}
+
+
+def run_batch(grid: List[Dict], out_path: str,
+              max_workers: Optional[int] = None) -> int:
+    """
+    Run every config in the grid on a process pool, streaming rows to disk.
+
+    Rows are appended to out_path as JSON lines in completion order. Configs
+    that already have a result row in out_path are skipped, so an interrupted
+    sweep resumes where it stopped.
+
+    Args:
+        grid: Config dicts, e.g. from make_grid
+        out_path: JSON-lines file to append results to
+        max_workers: Pool size (None = os.cpu_count())
+
+    Returns:
+        Number of rows written
+    """
+    done = load_done(out_path)
+    todo = [config for config in grid if config_key(config) not in done]
+    # Start on a fresh line if an interrupted write left a partial one
+    partial = False
+    if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
+        with open(out_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            partial = f.read(1) != b"\n"
+    written = 0
+    with open(out_path, "a") as out:
+        if partial:
+            out.write("\n")
+        for row in run_configs(todo, max_workers):
+            out.write(json.dumps(row) + "\n")
+            out.flush()
+            written += 1
+    return written
+
+
+def load_results(path: str) -> List[Dict]:
+    """
+    Read a JSON-lines result file written by run_batch.
+
+    A line cut short by an interrupted write is skipped.
+    """
+    rows = []
+    with open(path) as f:
+        for line in f:
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return rows
+
+
+if __name__ == "__main__":
+    grid = make_grid(
+        generator=["linear", "nonlinear"],
+        n_cells=[4, 5, 6],
+        R1_class=["I", "II", "III"],
+        initial_strategy=["class_based", "diverse"],
+        coverage_bonus=[2.0, 4.0],
+        seed=range(3),
+    )
+    out_path = "batch_results.jsonl"
+    print(f"Running {len(grid)} configurations on {os.cpu_count()} cores -> {out_path}")
+    start = time.perf_counter()
+    count = run_batch(grid, out_path)
+    print(f"Wrote {count} rows in {time.perf_counter() - start:.1f}s")
+
+    rows = [r for r in load_results(out_path) if "error" not in r]
+    print(f"\n{'Generator':<10} {'Cells':<6} {'Class':<6} {'Strategy':<12} {'Coverage':<10}")
+    print("-" * 48)
+    for r in sorted(rows, key=lambda r: -r["state_coverage"])[:10]:
+        print(f"{r['generator']:<10} {r['n_cells']:<6} {r['R1_class']:<6} "
+              f"{r['initial_strategy']:<12} {r['state_coverage']:<10.4f}")
@@ -0,0 +1,468 @@
+"""
+Micro and macro benchmarks for the engines' hot paths.
+
+Every case is a (group, backend) pair registered with @benchmark. Backends
+in one group do the same work on the same seeded input, so their rates can
+be compared directly:
+
+    elementary-step    one n-cell state, rule 30 on a ring
+                       (ca_step, evolve_once, apply_rule, apply_rule_reference,
+                       ca_step_batch)
+    elementary-batch   4096 states at once (ca_step in a loop, ca_step_batch,
+                       apply_rule_batch, BitSlicedCA.step)
+    nonlinear-step     rule 5050 (Extended, radius 2) through NonLinearRuleEngine
+    pick-next-rule     one rule choice after 200 generated steps (linear and
+                       non-linear generators)
+    generate           a 300-rule sequence (generate_maximal_rca,
+                       generate_enhanced_rca)
+    state-graph        every state of rule 30 on a ring (transitionGraph,
+                       hybrid.analyze_cycles, results_store.cycle_spectrum)
+    life               one Game of Life generation on an n x n torus (run1.update,
+                       run1.Life)
+
+A case is timed like timeit.autorange: the call count is raised until one
+batch lasts --min-time, the best of --repeat batches gives the per-call
+latency, and the work each call returns gives the rate (steps, states,
+cells or calls per second). Each case runs in a fresh spawned process so
+its peak RSS (resource.getrusage, Unix only) is its own; --inline runs them
+in this process instead, where the peak only ever grows. Nothing plots, so
+the suite runs headless; cases whose modules are not installed (networkx for
+transitionGraph) are reported as skipped.
+
+Usage:
+    python benchmarks.py                               # every case, default sizes
+    python benchmarks.py --quick --compare             # small sizes, speedups per group
+    python benchmarks.py --group state-graph --sizes 12 16 --json graph.json
+    python benchmarks.py --list
+"""
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BATCH = 4096
+
+
+class Spec(NamedTuple):
+    group: str
+    backend: str
+    sizes: Tuple[int, ...]
+    quick_sizes: Tuple[int, ...]
+    unit: str                                       # what the timed call's return value counts
+    setup: Callable[[int, int], Callable[[], int]]  # (n, seed) -> timed call
+    requires: Tuple[str, ...]
+
+
+SPECS: List[Spec] = []
+
+
+def benchmark(group: str, backend: str, sizes: Sequence[int], quick_sizes: Optional[Sequence[int]] = None,
+              unit: str = "steps", requires: Sequence[str] = ()):
+    """Register setup(n, seed) -> call as a case; the first backend of a group is its baseline."""
+    def register(setup):
+        SPECS.append(Spec(group, backend, tuple(sizes), tuple(quick_sizes or sizes[:1]),
+                          unit, setup, tuple(requires)))
+        return setup
+    return register
+
+
+def _silent():
+    from instrumentation import Instrumentation
+    return Instrumentation(verbosity=0, timing=False)
+
+
+def _random_states(shape, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).integers(0, 2, size=shape, dtype=np.uint8)
+
+
+# ---------------------------------------------------------------------------
+# elementary-step: one state, rule 30, periodic
+# ---------------------------------------------------------------------------
+
+STEP_SIZES, STEP_QUICK = (16, 64, 256), (16, 64)
+
+
+@benchmark("elementary-step", "ca_step", STEP_SIZES, STEP_QUICK)
+def _step_ca_step(n, seed):
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    gen = MaximalRCAGenerator(n, instrumentation=_silent())
+    state = _random_states(n, seed).tolist()
+    return lambda: gen.ca_step(state, 30) and 1
+
+
+@benchmark("elementary-step", "evolve_once", STEP_SIZES, STEP_QUICK,
+           requires=("networkx", "matplotlib"))
+def _step_evolve_once(n, seed):
+    from transitionGraph import evolve_once, rule_to_lookup
+    lookup = rule_to_lookup(30)
+    state = tuple(_random_states(n, seed).tolist())
+    return lambda: evolve_once(state, lookup) and 1
+
+
+@benchmark("elementary-step", "apply_rule_reference", STEP_SIZES, STEP_QUICK)
+def _step_reference(n, seed):
+    from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+    engine = NonLinearRuleEngine(seed)
+    state = _random_states(n, seed).tolist()
+    return lambda: engine.apply_rule_reference(state, 30) and 1
+
+
+@benchmark("elementary-step", "apply_rule", STEP_SIZES, STEP_QUICK)
+def _step_apply_rule(n, seed):
+    from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+    engine = NonLinearRuleEngine(seed)
+    state = _random_states(n, seed).tolist()
+    return lambda: engine.apply_rule(state, 30) and 1
+
+
+@benchmark("elementary-step", "ca_step_batch", STEP_SIZES, STEP_QUICK)
+def _step_numpy(n, seed):
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    gen = MaximalRCAGenerator(n, instrumentation=_silent())
+    state = _random_states(n, seed)
+    return lambda: gen.ca_step_batch(state, 30) is not None and 1
+
+
+# ---------------------------------------------------------------------------
+# elementary-batch: BATCH states, rule 30, periodic
+# ---------------------------------------------------------------------------
+
+BATCH_SIZES, BATCH_QUICK = (16, 64), (16,)
+
+
+@benchmark("elementary-batch", "ca_step", BATCH_SIZES, BATCH_QUICK)
+def _batch_ca_step(n, seed):
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    gen = MaximalRCAGenerator(n, instrumentation=_silent())
+    states = _random_states((BATCH, n), seed).tolist()
+
+    def call():
+        for s in states:
+            gen.ca_step(s, 30)
+        return len(states)
+    return call
+
+
+@benchmark("elementary-batch", "ca_step_batch", BATCH_SIZES, BATCH_QUICK)
+def _batch_numpy(n, seed):
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    gen = MaximalRCAGenerator(n, instrumentation=_silent())
+    states = _random_states((BATCH, n), seed)
+    return lambda: len(gen.ca_step_batch(states, 30))
+
+
+@benchmark("elementary-batch", "apply_rule_batch", BATCH_SIZES, BATCH_QUICK)
+def _batch_engine(n, seed):
+    from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+    engine = NonLinearRuleEngine(seed)
+    states = _random_states((BATCH, n), seed)
+    return lambda: len(engine.apply_rule_batch(states, 30))
+
+
+@benchmark("elementary-batch", "bitslice", BATCH_SIZES, BATCH_QUICK)
+def _batch_bitslice(n, seed):
+    from bitslice import BitSlicedCA, pack_states
+    ca = BitSlicedCA.from_rules([30] * n, "periodic")
+    words = pack_states(_random_states((BATCH, n), seed))
+    return lambda: ca.step(words) is not None and BATCH
+
+
+# ---------------------------------------------------------------------------
+# nonlinear-step: rule 5050 (Extended, radius 2)
+# ---------------------------------------------------------------------------
+
+NONLINEAR_RULE = 5050
+
+
+@benchmark("nonlinear-step", "apply_rule_reference", (16, 64), (16,))
+def _nonlinear_reference(n, seed):
+    from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+    engine = NonLinearRuleEngine(seed)
+    state = _random_states(n, seed).tolist()
+    return lambda: engine.apply_rule_reference(state, NONLINEAR_RULE) and 1
+
+
+@benchmark("nonlinear-step", "apply_rule", (16, 64), (16,))
+def _nonlinear_compiled(n, seed):
+    from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+    engine = NonLinearRuleEngine(seed)
+    state = _random_states(n, seed).tolist()
+    return lambda: engine.apply_rule(state, NONLINEAR_RULE) and 1
+
+
+@benchmark("nonlinear-step", "apply_rule_batch", (16, 64), (16,))
+def _nonlinear_batch(n, seed):
+    from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+    engine = NonLinearRuleEngine(seed)
+    state = _random_states(n, seed)
+    return lambda: engine.apply_rule_batch(state, NONLINEAR_RULE) is not None and 1
+
+
+# ---------------------------------------------------------------------------
+# pick-next-rule and generate: the generators' search loops
+# ---------------------------------------------------------------------------
+
+HISTORY = 200
+SEQUENCE = 300
+
+
+def _seed_all(seed: int):
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+@benchmark("pick-next-rule", "pick_next_rule_maximal", (6, 8, 10), (6,), unit="calls")
+def _pick_linear(n, seed):
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    _seed_all(seed)
+    gen = MaximalRCAGenerator(n, instrumentation=_silent())
+    sequence = gen.generate_maximal_rca("II", max_length=HISTORY)
+    state = list(gen.state_history[-1])
+    return lambda: gen.pick_next_rule_maximal(sequence[-1], state, sequence) is not None and 1
+
+
+@benchmark("pick-next-rule", "pick_next_rule_enhanced", (6, 8, 10), (6,), unit="calls")
+def _pick_nonlinear(n, seed):
+    from MaximalRCAGeneratorNonLinear import EnhancedMaximalRCAGenerator
+    _seed_all(seed)
+    gen = EnhancedMaximalRCAGenerator(n, instrumentation=_silent())
+    sequence = gen.generate_enhanced_rca("II", max_length=HISTORY)
+    state = list(gen.state_history[-1])
+    return lambda: gen.pick_next_rule_enhanced(sequence[-1], state) is not None and 1
+
+
+@benchmark("generate", "generate_maximal_rca", (6, 8, 10), (6,))
+def _generate_linear(n, seed):
+    from MaximalRCAGenerator import MaximalRCAGenerator
+
+    def call():
+        _seed_all(seed)
+        gen = MaximalRCAGenerator(n, instrumentation=_silent())
+        return len(gen.generate_maximal_rca("II", max_length=SEQUENCE))
+    return call
+
+
+@benchmark("generate", "generate_enhanced_rca", (6, 8, 10), (6,))
+def _generate_nonlinear(n, seed):
+    from MaximalRCAGeneratorNonLinear import EnhancedMaximalRCAGenerator
+
+    def call():
+        _seed_all(seed)
+        gen = EnhancedMaximalRCAGenerator(n, instrumentation=_silent())
+        return len(gen.generate_enhanced_rca("II", max_length=SEQUENCE))
+    return call
+
+
+# ---------------------------------------------------------------------------
+# state-graph: every state of rule 30 on a ring
+# ---------------------------------------------------------------------------
+
+GRAPH_SIZES, GRAPH_QUICK = (10, 12, 14), (10,)
+
+
+@benchmark("state-graph", "transitionGraph", GRAPH_SIZES, GRAPH_QUICK, unit="states",
+           requires=("networkx", "matplotlib"))
+def _graph_networkx(n, seed):
+    from transitionGraph import build_state_graph, compute_graph_metrics
+
+    def call():
+        G, _ = build_state_graph(30, n)
+        compute_graph_metrics(G)
+        return 1 << n
+    return call
+
+
+@benchmark("state-graph", "hybrid.analyze_cycles", GRAPH_SIZES, GRAPH_QUICK, unit="states")
+def _graph_hybrid(n, seed):
+    from hybrid import analyze_cycles
+    return lambda: analyze_cycles(n, [30] * n, "periodic") is not None and 1 << n
+
+
+@benchmark("state-graph", "cycle_spectrum", GRAPH_SIZES, GRAPH_QUICK, unit="states")
+def _graph_spectrum(n, seed):
+    from bitslice import BitSlicedCA
+    from results_store import cycle_spectrum
+    return lambda: cycle_spectrum(BitSlicedCA.from_rules([30] * n, "periodic").successors()) and 1 << n
+
+
+# ---------------------------------------------------------------------------
+# life: Game of Life on an n x n torus
+# ---------------------------------------------------------------------------
+
+class _NullImage:
+    """Stands in for the matplotlib image run1.update draws into."""
+
+    def set_data(self, data):
+        pass
+
+
+@benchmark("life", "run1.update", (32, 100), (32,), unit="cells")
+def _life_loops(n, seed):
+    import run1
+    grid = _random_states((n, n), seed).astype(np.int64)
+    img = _NullImage()
+    return lambda: run1.update(0, img, grid, n) and n * n
+
+
+@benchmark("life", "run1.Life", (32, 100, 2000), (32, 100), unit="cells")
+def _life_vectorized(n, seed):
+    import run1
+    life = run1.Life(_random_states((n, n), seed))
+    return lambda: life.step() is not None and n * n
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _peak_rss_mib() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def find_spec(group: str, backend: str) -> Spec:
+    for spec in SPECS:
+        if spec.group == group and spec.backend == backend:
+            return spec
+    raise KeyError(f"No benchmark {group}/{backend}")
+
+
+def missing_requirements(spec: Spec) -> List[str]:
+    return [m for m in spec.requires if importlib.util.find_spec(m) is None]
+
+
+def run_case(group: str, backend: str, n: int, seed: int = 0,
+             min_time: float = 0.2, repeat: int = 5) -> Dict:
+    """Time one case in this process; see the module docstring."""
+    spec = find_spec(group, backend)
+    out = {"group": group, "backend": backend, "n": n, "unit": spec.unit}
+    missing = missing_requirements(spec)
+    if missing:
+        out["skipped"] = f"{', '.join(missing)} not installed"
+        return out
+    rss_before = _peak_rss_mib()
+    _seed_all(seed)
+    call = spec.setup(n, seed)
+    work = call()                       # warm-up: imports, compiled tables, caches
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        best = min(best, time.perf_counter() - start)
+
+    latency = best / number
+    out.update(work=work, calls=number * repeat, latency_s=latency, rate=work / latency,
+               peak_rss_mib=_peak_rss_mib(), rss_before_setup_mib=rss_before)
+    return out
+
+
+def run_isolated(group: str, backend: str, n: int, **kwargs) -> Dict:
+    """run_case in a fresh spawned interpreter, so peak RSS is this case's own."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, group, backend, n, **kwargs).result()
+
+
+def select(groups: Optional[Sequence[str]] = None, backends: Optional[Sequence[str]] = None) -> List[Spec]:
+    return [s for s in SPECS if (not groups or s.group in groups) and (not backends or s.backend in backends)]
+
+
+def run_suite(specs: Sequence[Spec], sizes: Optional[Sequence[int]] = None, quick: bool = False,
+              isolate: bool = True, seed: int = 0, min_time: float = 0.2, repeat: int = 5,
+              on_result: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+    results = []
+    runner = run_isolated if isolate else run_case
+    for spec in specs:
+        for n in sizes or (spec.quick_sizes if quick else spec.sizes):
+            result = runner(spec.group, spec.backend, n, seed=seed, min_time=min_time, repeat=repeat)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+
+def format_result(r: Dict) -> str:
+    head = f"{r['group']:<17} {r['backend']:<24} {r['n']:>5}"
+    if "skipped" in r:
+        return f"{head}  skipped ({r['skipped']})"
+    rss = "" if r["peak_rss_mib"] is None else f"{r['peak_rss_mib']:8.1f} MiB"
+    return (f"{head} {r['latency_s'] * 1e6:12.2f} us {r['rate']:11.4g} {r['unit'] + '/s':<8} "
+            f"{r['calls']:>8} calls {rss}")
+
+
+def compare(results: Sequence[Dict]) -> List[str]:
+    """Speedup of every backend over the first measured backend of its group, per n."""
+    lines = []
+    by_key: Dict[Tuple[str, int], List[Dict]] = {}
+    for r in results:
+        if "skipped" not in r:
+            by_key.setdefault((r["group"], r["n"]), []).append(r)
+    for (group, n), rows in by_key.items():
+        base = rows[0]
+        lines.append(f"{group} n={n} (baseline {base['backend']}):")
+        for r in rows:
+            lines.append(f"    {r['backend']:<24} {r['rate'] / base['rate']:9.2f}x")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro and macro benchmarks of the CA engines")
+    parser.add_argument("--group", nargs="*", help="groups to run (default all)")
+    parser.add_argument("--backend", nargs="*", help="backends to run (default all)")
+    parser.add_argument("--sizes", nargs="*", type=int, help="override every case's sizes")
+    parser.add_argument("--quick", action="store_true", help="smallest sizes only")
+    parser.add_argument("--compare", action="store_true", help="print speedups over each group's baseline")
+    parser.add_argument("--inline", action="store_true", help="run in this process (shared peak RSS)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed batch")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    args = parser.parse_args()
+
+    specs = select(args.group, args.backend)
+    if args.list:
+        for s in specs:
+            print(f"{s.group:<17} {s.backend:<24} n={list(s.sizes)} quick={list(s.quick_sizes)} "
+                  f"[{s.unit}]" + (f" requires {', '.join(s.requires)}" if s.requires else ""))
+        raise SystemExit(0)
+    if not specs:
+        parser.error("no benchmark matches --group/--backend")
+
+    print(f"python {platform.python_version()}, numpy {np.__version__}, {platform.machine()}, seed {args.seed}")
+    results = run_suite(specs, args.sizes, args.quick, not args.inline, args.seed,
+                        args.min_time, args.repeat, on_result=lambda r: print(format_result(r), flush=True))
+    if args.compare:
+        print()
+        print("\n".join(compare(results)))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                       "machine": platform.machine(), "seed": args.seed, "results": results}, f, indent=1)
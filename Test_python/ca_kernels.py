@@ -0,0 +1,96 @@
+"""
+NumPy kernels for table-driven 1D CA stepping.
+
+States are uint8 arrays whose last axis is the ring of cells, so a single
+state has shape (n,) and a batch of states has shape (batch, n). Rules are
+lookup tables indexed by the neighborhood packed left to right, most
+significant bit first (the elementary-rule convention):
+radius 1 -> 8 entries, radius 2 -> 32 entries.
+"""
+
+from functools import lru_cache
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+def neighborhood_index(states: np.ndarray, radius: int = 1) -> np.ndarray:
+    """
+    Packed neighborhood index of every cell on a periodic ring.
+
+    Args:
+        states: uint8 array (..., n) of 0/1 cells
+        radius: 1 for 3-cell, 2 for 5-cell neighborhoods
+
+    Returns:
+        uint8 array of the same shape with values in [0, 2**(2*radius+1))
+    """
+    states = np.asarray(states, dtype=np.uint8)
+    idx = np.zeros(states.shape, dtype=np.uint8)
+    for offset in range(-radius, radius + 1):
+        idx <<= 1
+        # roll by -offset puts cell i+offset at position i
+        idx |= np.roll(states, -offset, axis=-1)
+    return idx
+
+
+@lru_cache(maxsize=None)
+def table_array(table: Tuple[int, ...]) -> np.ndarray:
+    """Cached read-only uint8 array for a rule table tuple."""
+    arr = np.array(table, dtype=np.uint8)
+    arr.setflags(write=False)
+    return arr
+
+
+def elementary_table(rule: int) -> Tuple[int, ...]:
+    """8-entry table of an elementary rule number."""
+    return tuple((rule >> i) & 1 for i in range(8))
+
+
+def step_table(states: np.ndarray, table: Sequence[int], radius: int = 1) -> np.ndarray:
+    """
+    Advance one or many periodic states by one step of a table rule.
+
+    Args:
+        states: uint8 array (n,) or (batch, n)
+        table: 8- or 32-entry lookup table matching radius
+        radius: Neighborhood radius
+
+    Returns:
+        New uint8 array with the same shape as states
+    """
+    return table_array(tuple(table))[neighborhood_index(states, radius)]
+
+
+def widen_table(table: Sequence[int], radius: int, to_radius: int) -> Tuple[int, ...]:
+    """
+    Re-express a table over a wider neighborhood that ignores the extra cells.
+
+    A radius-1 table widened to radius 2 has 32 entries where entry j equals
+    the original entry for the middle three bits of j. The same mapping works
+    for bit masks over neighborhoods (see widen_mask).
+    """
+    shift = to_radius - radius
+    inner = (1 << (2 * radius + 1)) - 1
+    return tuple(table[(j >> shift) & inner] for j in range(1 << (2 * to_radius + 1)))
+
+
+def widen_mask(mask: int, radius: int, to_radius: int) -> int:
+    """widen_table for a neighborhood bit mask."""
+    bits = [(mask >> k) & 1 for k in range(1 << (2 * radius + 1))]
+    return sum(b << j for j, b in enumerate(widen_table(bits, radius, to_radius)))
+
+
+def step_tables(state: np.ndarray, tables: np.ndarray, radius: int = 1) -> np.ndarray:
+    """
+    Apply many rules to one periodic state in a single gather.
+
+    Args:
+        state: uint8 array (n,)
+        tables: uint8 array (rules, 2**(2*radius+1)), one table per row
+        radius: Neighborhood radius shared by all tables (see widen_table)
+
+    Returns:
+        uint8 array (rules, n); row k is the successor under tables[k]
+    """
+    return tables[:, neighborhood_index(state, radius)]
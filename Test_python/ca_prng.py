@@ -0,0 +1,290 @@
+"""
+Pseudorandom bytes from null-boundary 90/150 hybrid CAs.
+
+A CAStream runs 64 copies of one CA in the bit lanes of uint64 words, one
+word per cell, so a step is a handful of NumPy XORs over n words and yields
+64 n bits. The lanes start on the same trajectory, stride steps apart, and
+stream k starts 64 k strides further on, so workers that take different
+stream numbers read disjoint pieces of the CA's cycle (for a maximal mask
+the cycle is all 2^n - 1 non-zero states). Jumps go through
+gf2.PowerCache with the characteristic polynomial f: T^k = (x^k mod f)(T),
+evaluated by Horner's rule in n steps.
+
+A lane only stays clear of the next lane's trajectory for stride steps.
+Constructing a stream from a non-maximal mask, or one whose lanes would wrap
+around the cycle, raises ValueError (so the default stride needs n >= 17),
+and reading past stride steps warns. Output words are little-endian on every host.
+
+Usage:
+    from synthesis import maximal_mask
+    rng = CAStream(maximal_mask(64), seed=12345, stream=worker_id)
+    data = rng.read(1 << 20)
+    rng.readinto(buffer)                 # fill a caller-owned buffer in place
+
+    run_tests(rng.read(1 << 20))         # frequency, runs, serial correlation
+"""
+
+import math
+import time
+import warnings
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from gf2 import PowerCache, transition_matrix
+from gf2poly import is_primitive
+from synthesis import mask_to_poly
+
+LANES = 64
+
+# Default room: every stream number below this gets non-overlapping lanes
+MAX_STREAMS = 1024
+
+
+class CAStream:
+    """
+    Bit-sliced 90/150 CA bitstream.
+
+    Args:
+        mask: 90/150 rule per cell (null boundary), at least 2 cells
+        seed: Start of the trajectory as an int (cell 0 = MSB), non-zero
+            modulo 2^n; lane 0 of stream 0 begins one stride after it
+        stream: Substream number for parallel workers
+        stride: Steps between consecutive lanes (default: the period split
+            evenly over LANES * MAX_STREAMS lanes)
+        cells: Cells emitted each step (default all, in order); emitting
+            every other cell weakens the linear relations between neighbours
+
+    Raises:
+        ValueError: if the mask is not maximal (characteristic polynomial not
+            primitive), or the lanes of this stream would not fit in 2^n - 1 steps
+    """
+
+    def __init__(self, mask: Sequence[int], seed: int, stream: int = 0,
+                 stride: Optional[int] = None, cells: Optional[Sequence[int]] = None):
+        for rule in mask:
+            if rule not in (90, 150):
+                raise ValueError("Mask must contain only 90 or 150")
+        self.n = n = len(mask)
+        if n < 2:
+            raise ValueError("CAStream needs at least 2 cells")
+        self.mask = list(mask)
+        self._full = (1 << n) - 1
+        self._rule150_bits = sum(1 << (n - 1 - i) for i, r in enumerate(mask) if r == 150)
+        self._rule150 = np.array([~0 if r == 150 else 0 for r in mask], dtype=np.int64).view(np.uint64)
+        self.poly = mask_to_poly(mask)
+        # Lanes are only disjoint on a single cycle through every non-zero state
+        if not is_primitive(self.poly):
+            raise ValueError("Mask is not maximal: its characteristic polynomial is not primitive")
+        self._jumps = PowerCache(transition_matrix(mask, "null"), charpoly=self.poly, step=self._step_int)
+        if seed & self._full == 0:
+            raise ValueError("seed must be non-zero modulo 2^n")
+        self.stride = stride if stride is not None else self._full // (LANES * MAX_STREAMS)
+        if self.stride < 1:
+            raise ValueError(f"The default stride splits 2^n - 1 steps over {LANES * MAX_STREAMS} "
+                             f"lanes and needs n >= 17 (got {n}); pass stride explicitly")
+        if (stream + 1) * LANES * self.stride > self._full:
+            raise ValueError(f"A {n}-cell CA has period at most 2^{n} - 1, too short for {LANES} "
+                             f"disjoint lanes of stride {self.stride} in stream {stream}")
+        self.stream = stream
+        self.cells = None if cells is None else np.asarray(cells, dtype=np.intp)
+        self.out_words = n if cells is None else len(self.cells)
+        self.step_bytes = 8 * self.out_words
+
+        # Lane l starts (stream * LANES + l + 1) * stride steps after the seed, so
+        # no lane begins on a low-weight seed still spreading across the cells
+        x = self._jumps.jump(seed & self._full, (stream * LANES + 1) * self.stride)
+        lanes = []
+        for _ in range(LANES):
+            lanes.append(x)
+            x = self._jumps.jump(x, self.stride)
+        self._words = self._transpose(lanes)
+        self._tmp = np.empty(n, dtype=np.uint64)
+        self._selected = np.empty(self.out_words, dtype=np.uint64)
+        self._pending = b""
+        self._steps = 0            # steps taken since the lanes were placed
+        self._overrun = False
+
+    # -- single-lane int states (used to place the lanes) -------------------
+
+    def _step_int(self, x: int) -> int:
+        return ((x >> 1) ^ (x << 1) ^ (x & self._rule150_bits)) & self._full
+
+    def _transpose(self, lanes: Sequence[int]) -> np.ndarray:
+        """Lane ints -> one uint64 word per cell, lane l in bit l."""
+        n = self.n
+        words = [0] * n
+        for lane, x in enumerate(lanes):
+            for i in range(n):
+                if (x >> (n - 1 - i)) & 1:
+                    words[i] |= 1 << lane
+        return np.array(words, dtype=np.uint64)
+
+    def lane_states(self) -> list:
+        """Current state of every lane as an int (cell 0 = MSB)."""
+        n = self.n
+        words = [int(w) for w in self._words]
+        return [sum(((words[i] >> lane) & 1) << (n - 1 - i) for i in range(n)) for lane in range(LANES)]
+
+    # -- sliced stepping -----------------------------------------------------
+
+    def _step_into(self, src: np.ndarray, dst: np.ndarray):
+        """dst = T src for all lanes; dst must not alias src."""
+        dst[0] = src[1]
+        np.bitwise_xor(src[:-2], src[2:], out=dst[1:-1])
+        dst[-1] = src[-2]
+        np.bitwise_and(src, self._rule150, out=self._tmp)
+        dst ^= self._tmp
+
+    def _advance(self):
+        nxt = np.empty_like(self._words)
+        self._step_into(self._words, nxt)
+        self._words = nxt
+        self._steps += 1
+
+    def jump(self, k: int):
+        """Advance every lane k steps; discards buffered output."""
+        p = self._jumps.poly_power(k)
+        r = np.zeros_like(self._words)
+        nxt = np.empty_like(r)
+        for i in range(p.bit_length() - 1, -1, -1):
+            self._step_into(r, nxt)
+            r, nxt = nxt, r
+            if (p >> i) & 1:
+                r ^= self._words
+        self._words = r
+        self._pending = b""
+        self._steps += k
+
+    # -- byte output ---------------------------------------------------------
+
+    def readinto(self, buf) -> int:
+        """
+        Fill a writable buffer (bytearray, memoryview, NumPy array, ...).
+
+        Whole steps are written straight into the buffer as little-endian
+        uint64 words; only a trailing partial step goes through an internal
+        copy. Warns once the lanes have run past their stride.
+
+        Returns:
+            Number of bytes written (the buffer's size)
+        """
+        mv = memoryview(buf).cast("B")
+        total = len(mv)
+        pos = min(len(self._pending), total)
+        mv[:pos] = self._pending[:pos]
+        self._pending = self._pending[pos:]
+
+        full = (total - pos) // self.step_bytes
+        if full:
+            out = np.frombuffer(mv[pos:pos + full * self.step_bytes], dtype="<u8")
+            out = out.reshape(full, self.out_words)
+            if self.cells is None:
+                prev = self._words
+                for k in range(full):
+                    self._step_into(prev, out[k])
+                    prev = out[k]
+                self._words = prev.astype(np.uint64)
+                self._steps += full
+            else:
+                for k in range(full):
+                    self._advance()
+                    np.take(self._words, self.cells, out=self._selected)
+                    out[k] = self._selected
+            pos += full * self.step_bytes
+
+        if pos < total:
+            self._advance()
+            words = self._words if self.cells is None else self._words[self.cells]
+            chunk = words.astype("<u8").tobytes()
+            rest = total - pos
+            mv[pos:] = chunk[:rest]
+            self._pending = chunk[rest:]
+        if self._steps > self.stride and not self._overrun:
+            self._overrun = True
+            warnings.warn(f"CAStream lanes have run {self._steps} steps, past their stride of "
+                          f"{self.stride}; each lane now repeats the next lane's output", stacklevel=2)
+        return total
+
+    def read(self, nbytes: int) -> bytes:
+        buf = bytearray(nbytes)
+        self.readinto(buf)
+        return bytes(buf)
+
+
+# ---------------------------------------------------------------------------
+# Statistical tests
+# ---------------------------------------------------------------------------
+
+def _bits(data: bytes) -> np.ndarray:
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def frequency_test(data: bytes) -> float:
+    """Monobit test (NIST SP 800-22 2.1); returns the p-value."""
+    bits = _bits(data)
+    s = 2 * int(bits.sum()) - len(bits)
+    return math.erfc(abs(s) / math.sqrt(2 * len(bits)))
+
+
+def runs_test(data: bytes) -> float:
+    """Runs test (NIST SP 800-22 2.3); returns the p-value."""
+    bits = _bits(data)
+    n = len(bits)
+    pi = bits.mean()
+    if abs(pi - 0.5) >= 2 / math.sqrt(n):
+        return 0.0
+    runs = 1 + int(np.count_nonzero(bits[1:] != bits[:-1]))
+    num = abs(runs - 2 * n * pi * (1 - pi))
+    return math.erfc(num / (2 * math.sqrt(2 * n) * pi * (1 - pi)))
+
+
+def serial_correlation(data: bytes, lag: int = 1) -> float:
+    """Correlation coefficient between bytes lag apart (ideal 0)."""
+    x = np.frombuffer(data, dtype=np.uint8).astype(np.float64)
+    a, b = x[:-lag], x[lag:]
+    return float(np.corrcoef(a, b)[0, 1])
+
+
+def run_tests(data: bytes, lags: Sequence[int] = (1, 8)) -> Dict[str, float]:
+    """p-values of the frequency and runs tests plus serial correlations."""
+    results = {"frequency_p": frequency_test(data), "runs_p": runs_test(data)}
+    for lag in lags:
+        results[f"serial_corr_lag{lag}"] = serial_correlation(data, lag)
+    return results
+
+
+def throughput(stream: CAStream, nbytes: int = 1 << 24, chunk: int = 1 << 20) -> float:
+    """MB/s of readinto into a reused buffer."""
+    buf = bytearray(chunk)
+    start = time.perf_counter()
+    for _ in range(nbytes // chunk):
+        stream.readinto(buf)
+    return nbytes / (time.perf_counter() - start) / 1e6
+
+
+if __name__ == "__main__":
+    from synthesis import maximal_mask
+
+    for n in [64, 128, 512]:
+        mask = maximal_mask(n)
+        for cells in (None, range(0, n, 2)):
+            rng = CAStream(mask, seed=0x9E3779B97F4A7C15, cells=cells)
+            results = run_tests(rng.read(1 << 20))
+            label = "all cells" if cells is None else "even cells"
+            print(f"n={n:<4} {label:<10} {throughput(rng):7.1f} MB/s  "
+                  + "  ".join(f"{k}={v:.4f}" for k, v in results.items()))
+
+    # Substreams: stream 1 starts exactly LANES strides after stream 0
+    mask = maximal_mask(64)
+    a = CAStream(mask, seed=1, stride=1000)
+    b = CAStream(mask, seed=1, stride=1000, stream=1)
+    a.jump(LANES * 1000)
+    print("stream 1 == stream 0 jumped 64 strides?", a.lane_states() == b.lane_states())
+
+    # A non-maximal mask has short cycles, so its lanes could repeat each other
+    try:
+        CAStream([90] * 20, seed=1)
+        print("non-maximal mask rejected? False")
+    except ValueError:
+        print("non-maximal mask rejected? True")
@@ -1,5 +1,8 @@
+import hashlib
+
 import numpy as np
-import random
+
+from rule_tables import CLASS_NAMES as RULE_CLASS_NAMES, first_rules, last_rules
 
 # ========= Tables from your image =========
 
@@ -16,73 +19,214 @@ class_transition = {
 # This will need to be filled properly with the mappings from the table (a).
 # For now, let's implement a prototype with placeholders.
 
-# (b) First Rule Table
-first_rule_table = {
-    "I": [3, 12],
-    "II": [5, 10],
-    "III": [6, 9],
-}
-
-# (c) Last Rule Table
-last_rule_table = {
-    "I": [17, 20, 65, 68],
-    "II": [5, 20, 65, 80],
-    "III": [5, 17, 68, 80],
-    "IV": [20, 65],
-    "V": [17, 68],
-    "VI": [5, 80],
-}
+# (b) First Rule Table, class -> R0 rules, and (c) Last Rule Table (rule_tables.py)
+first_rule_table = {name: first_rules(name) for name in ("I", "II", "III")}
+last_rule_table = {name: last_rules(name) for name in RULE_CLASS_NAMES}
 
 # Helper: apply an elementary CA rule (0–255) to a neighborhood
 def apply_rule(rule, left, center, right):
     idx = (left << 2) | (center << 1) | right
     return (rule >> idx) & 1
 
-# Step update for state and rule classes
-def step(state, rules, classes):
-    n = len(state)
-    new_state = np.zeros_like(state)
-    new_rules = []
-    new_classes = []
-
-    for i in range(n):
-        left = state[(i - 1) % n]
-        center = state[i]
-        right = state[(i + 1) % n]
-
-        rule = rules[i]
-        new_state[i] = apply_rule(rule, left, center, right)
-
-        # Update rule class according to transition table
-        old_class = classes[i]
-        new_class = class_transition.get(old_class, old_class)
-
-        # Pick a new rule from the available set for that class
-        if new_class in last_rule_table:
-            rule_choices = last_rule_table[new_class]
-        else:
-            rule_choices = [rule]  # fallback: keep same rule
-
-        new_rule = random.choice(rule_choices)
-
-        new_rules.append(new_rule)
-        new_classes.append(new_class)
-
+# ========= Vectorized tables =========
+# Classes are indices into CLASS_NAMES; rules and classes are NumPy arrays.
+CLASS_NAMES = sorted(set(class_transition) | set(last_rule_table))
+CLASS_INDEX = {name: k for k, name in enumerate(CLASS_NAMES)}
+
+# next_class_of[k] = index of class_transition[CLASS_NAMES[k]]
+next_class_of = np.array([CLASS_INDEX[class_transition.get(name, name)] for name in CLASS_NAMES],
+                         dtype=np.int64)
+
+# Row k lists the candidate rules of class k, padded; 0 candidates -> keep rule
+candidate_counts = np.array([len(last_rule_table.get(name, [])) for name in CLASS_NAMES], dtype=np.int64)
+candidate_matrix = np.zeros((len(CLASS_NAMES), max(1, candidate_counts.max())), dtype=np.int64)
+for k, name in enumerate(CLASS_NAMES):
+    choices = last_rule_table.get(name, [])
+    candidate_matrix[k, :len(choices)] = choices
+
+def encode_classes(classes):
+    return np.array([CLASS_INDEX[c] for c in classes], dtype=np.int64)
+
+def decode_classes(class_idx):
+    return [CLASS_NAMES[k] for k in class_idx]
+
+# Step update for state and rule classes (periodic ring, whole vector at once)
+# classes are indices into CLASS_NAMES; class names are accepted too, and then
+# the new classes come back as names
+def step(state, rules, classes, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    state = np.asarray(state, dtype=np.uint8)
+    rules = np.asarray(rules, dtype=np.int64)
+    classes = np.asarray(classes)
+    named = classes.dtype.kind in "USO"
+    if named:
+        unknown = sorted({str(c) for c in classes.tolist()} - set(CLASS_INDEX))
+        if unknown:
+            raise ValueError(f"Unknown rule classes {unknown}; expected names from {CLASS_NAMES}")
+        classes = encode_classes(classes.tolist())
+    else:
+        classes = classes.astype(np.int64)
+    idx = (np.roll(state, 1) << 2) | (state << 1) | np.roll(state, -1)
+    new_state = ((rules >> idx) & 1).astype(np.uint8)
+
+    # Update rule classes, then pick each cell's new rule from its class
+    new_classes = next_class_of[classes]
+    counts = candidate_counts[new_classes]
+    picks = rng.integers(0, np.maximum(counts, 1))
+    new_rules = np.where(counts > 0, candidate_matrix[new_classes, picks], rules)
+
+    if named:
+        return new_state, new_rules, decode_classes(new_classes)
     return new_state, new_rules, new_classes
 
-# Run CA
-def run_ca(n=8, steps=10):
-    state = np.random.randint(0, 2, n, dtype=np.uint8)
-    classes = [random.choice(list(last_rule_table.keys())) for _ in range(n)]
-    rules = [random.choice(last_rule_table[c]) for c in classes]
+# ========= Streaming statistics =========
+# Fixed-memory accumulators for long headless runs
+class RunStats:
+    def __init__(self, n, block_size=3, max_lag=8, max_tracked=1 << 20,
+                 snapshot_path=None, snapshot_every=1000, max_snapshots=1000):
+        self.n = n
+        self.steps = 0
+        self.density_sum = 0.0
+        self.density_sq_sum = 0.0
+        self.block_size = block_size
+        self.block_counts = np.zeros(1 << block_size, dtype=np.int64)
+        self.rule_counts = np.zeros(256, dtype=np.int64)
+        self.class_counts = np.zeros(len(CLASS_NAMES), dtype=np.int64)
+
+        # Temporal autocorrelation of +-1 spins, last max_lag states in a ring buffer
+        self.max_lag = max_lag
+        self.history = np.zeros((max_lag, n), dtype=np.int8)
+        self.corr_sums = np.zeros(max_lag + 1, dtype=np.float64)
+        self.corr_counts = np.zeros(max_lag + 1, dtype=np.int64)
+
+        # Recurrence: 64-bit digest of (state, rules, classes) -> first step seen
+        self.max_tracked = max_tracked
+        self.seen = {}
+        self.recurrence = None
+
+        # Spacetime snapshots in a memory-mapped .npy file
+        self.snapshot_every = snapshot_every
+        self.snapshots = None
+        self.snapshot_count = 0
+        if snapshot_path is not None:
+            self.snapshots = np.lib.format.open_memmap(snapshot_path, mode="w+", dtype=np.uint8,
+                                                       shape=(max_snapshots, n))
+
+    def update(self, state, rules, classes):
+        t = self.steps
+        density = state.mean()
+        self.density_sum += density
+        self.density_sq_sum += density * density
+
+        idx = np.zeros(self.n, dtype=np.int64)
+        for k in range(self.block_size):
+            idx = (idx << 1) | np.roll(state, -k)
+        self.block_counts += np.bincount(idx, minlength=len(self.block_counts))
+        self.rule_counts += np.bincount(rules, minlength=256)[:256]
+        self.class_counts += np.bincount(classes, minlength=len(CLASS_NAMES))
+
+        # int64 so the dot product cannot wrap (int8 overflows from n = 128)
+        spins = state.astype(np.int64) * 2 - 1
+        self.corr_sums[0] += 1.0
+        self.corr_counts[0] += 1
+        for lag in range(1, min(self.max_lag, t) + 1):
+            past = self.history[(t - lag) % self.max_lag]
+            self.corr_sums[lag] += np.dot(spins, past) / self.n
+            self.corr_counts[lag] += 1
+        if self.max_lag:
+            self.history[t % self.max_lag] = spins
+
+        if self.recurrence is None:
+            digest = hashlib.blake2b(state.tobytes() + rules.tobytes() + classes.tobytes(),
+                                     digest_size=8).digest()
+            first = self.seen.get(digest)
+            if first is not None:
+                self.recurrence = (first, t)
+            elif len(self.seen) < self.max_tracked:
+                self.seen[digest] = t
+
+        if self.snapshots is not None and t % self.snapshot_every == 0 \
+                and self.snapshot_count < len(self.snapshots):
+            self.snapshots[self.snapshot_count] = state
+            self.snapshot_count += 1
+
+        self.steps += 1
+
+    def summary(self):
+        mean = self.density_sum / self.steps
+        p = self.block_counts / self.block_counts.sum()
+        p = p[p > 0]
+        block_entropy = float(-(p * np.log2(p)).sum())
+        # Autocovariance over the spin variance 1 - m^2; undefined (nan) for a
+        # run that never left the all-0 or all-1 state
+        mean_spin = 2 * mean - 1
+        spin_var = 1 - mean_spin ** 2
+        autocorr = [float((self.corr_sums[lag] / self.corr_counts[lag] - mean_spin ** 2) / spin_var)
+                    if spin_var > 0 else float("nan")
+                    for lag in range(1, self.max_lag + 1) if self.corr_counts[lag]]
+        if self.snapshots is not None:
+            self.snapshots.flush()
+        return {
+            "steps": self.steps,
+            "density_mean": mean,
+            "density_var": self.density_sq_sum / self.steps - mean ** 2,
+            "block_entropy": block_entropy,
+            "entropy_per_cell": block_entropy / self.block_size,
+            "rule_usage": {int(r): int(c) for r, c in enumerate(self.rule_counts) if c},
+            "class_occupancy": {CLASS_NAMES[k]: int(c) for k, c in enumerate(self.class_counts)},
+            "autocorrelation": autocorr,
+            "recurrence": self.recurrence,
+            "snapshots": self.snapshot_count,
+        }
+
+# Run CA; headless=True keeps only RunStats (stats_kwargs go to RunStats) and returns its summary
+def run_ca(n=8, steps=10, seed=None, headless=False, **stats_kwargs):
+    rng = np.random.default_rng(seed)
+    state = rng.integers(0, 2, n, dtype=np.uint8)
+    classes = encode_classes(rng.choice(list(last_rule_table.keys()), n))
+    counts = candidate_counts[classes]
+    rules = candidate_matrix[classes, rng.integers(0, counts)]
+
+    if headless:
+        # States t = 0..steps are recorded, so size the snapshot file to fit
+        # exactly and leave no all-zero padding rows
+        if stats_kwargs.get("snapshot_path") is not None:
+            every = stats_kwargs.get("snapshot_every", 1000)
+            stats_kwargs.setdefault("max_snapshots", steps // every + 1)
+        stats = RunStats(n, **stats_kwargs)
+        stats.update(state, rules, classes)
+        for t in range(steps):
+            state, rules, classes = step(state, rules, classes, rng)
+            stats.update(state, rules, classes)
+        return stats.summary()
 
     print("Initial state:", "".join(map(str, state)))
-    print("Initial rules:", rules)
-    print("Initial classes:", classes)
+    print("Initial rules:", rules.tolist())
+    print("Initial classes:", decode_classes(classes))
 
     for t in range(steps):
-        state, rules, classes = step(state, rules, classes)
-        print(f"t={t+1}: {''.join(map(str, state))} | rules={rules}")
+        state, rules, classes = step(state, rules, classes, rng)
+        print(f"t={t+1}: {''.join(map(str, state))} | rules={rules.tolist()}")
 
 if __name__ == "__main__":
     run_ca(n=8, steps=20)
+
+    # A fixed point with density 1/2 is perfectly correlated at every lag
+    n = 256
+    frozen = np.tile(np.array([1, 0], dtype=np.uint8), n // 2)
+    stats = RunStats(n)
+    for _ in range(20):
+        stats.update(frozen, np.full(n, 204, dtype=np.int64), np.zeros(n, dtype=np.int64))
+    assert np.allclose(stats.summary()["autocorrelation"], 1.0), stats.summary()["autocorrelation"]
+    # ... and so is one at any other density
+    frozen = np.tile(np.array([1, 1, 1, 0], dtype=np.uint8), n // 4)
+    stats = RunStats(n)
+    for _ in range(20):
+        stats.update(frozen, np.full(n, 204, dtype=np.int64), np.zeros(n, dtype=np.int64))
+    assert np.allclose(stats.summary()["autocorrelation"], 1.0), stats.summary()["autocorrelation"]
+    print(f"fixed points at n={n}, density 1/2 and 3/4: autocorrelation 1 at every lag")
+
+    # Long headless run: statistics only
+    summary = run_ca(n=256, steps=100_000, seed=1, headless=True)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
@@ -40,64 +40,50 @@ for r in [15, 240, 105, 150, 90, 165]:
 # ========= Rule → Next Class (from Table 2.7a) =========
 rule_to_nextclass = {}
 
+# The same table keyed by class: class_rule_transitions[cls][rule] = next class.
+# rule_to_nextclass keeps only the last class listing each rule.
+class_rule_transitions = {cls: {} for cls in ("I", "II", "III", "IV", "V", "VI")}
+
+def _add(cls, rules, next_cls):
+    for r in rules:
+        rule_to_nextclass[r] = next_cls
+        class_rule_transitions[cls][r] = next_cls
+
 # --- Class I rules ---
-for r in [51, 204, 60, 195]:
-    rule_to_nextclass[r] = "I"
-for r in [85, 90, 165, 170]:
-    rule_to_nextclass[r] = "II"
-for r in [102, 105, 150, 153]:
-    rule_to_nextclass[r] = "III"
-for r in [53, 58, 83, 92, 163, 172, 197, 202]:
-    rule_to_nextclass[r] = "IV"
-for r in [54, 57, 99, 108, 147, 156, 198, 201]:
-    rule_to_nextclass[r] = "V"
-for r in [86, 89, 101, 106, 149, 154, 166, 169]:
-    rule_to_nextclass[r] = "VI"
+_add("I", [51, 204, 60, 195], "I")
+_add("I", [85, 90, 165, 170], "II")
+_add("I", [102, 105, 150, 153], "III")
+_add("I", [53, 58, 83, 92, 163, 172, 197, 202], "IV")
+_add("I", [54, 57, 99, 108, 147, 156, 198, 201], "V")
+_add("I", [86, 89, 101, 106, 149, 154, 166, 169], "VI")
 
 # --- Class II rules ---
-for r in [15, 30, 45, 60, 75, 90, 105, 120,
-          135, 150, 165, 180, 195, 210, 225, 240]:
-    rule_to_nextclass[r] = "I"
+_add("II", [15, 30, 45, 60, 75, 90, 105, 120,
+            135, 150, 165, 180, 195, 210, 225, 240], "I")
 
 # --- Class III rules ---
-for r in [51, 204, 15, 240]:
-    rule_to_nextclass[r] = "I"
-for r in [85, 105, 150, 170]:
-    rule_to_nextclass[r] = "II"
-for r in [90, 102, 153, 165]:
-    rule_to_nextclass[r] = "III"
-for r in [23, 43, 77, 113, 142, 178, 212, 232]:
-    rule_to_nextclass[r] = "IV"
-for r in [27, 39, 78, 114, 141, 177, 216, 228]:
-    rule_to_nextclass[r] = "V"
-for r in [86, 89, 101, 106, 149, 154, 166, 169]:
-    rule_to_nextclass[r] = "VI"
+_add("III", [51, 204, 15, 240], "I")
+_add("III", [85, 105, 150, 170], "II")
+_add("III", [90, 102, 153, 165], "III")
+_add("III", [23, 43, 77, 113, 142, 178, 212, 232], "IV")
+_add("III", [27, 39, 78, 114, 141, 177, 216, 228], "V")
+_add("III", [86, 89, 101, 106, 149, 154, 166, 169], "VI")
 
 # --- Class IV rules ---
-for r in [60, 195]:
-    rule_to_nextclass[r] = "I"
-for r in [90, 165]:
-    rule_to_nextclass[r] = "IV"
-for r in [105, 150]:
-    rule_to_nextclass[r] = "V"
+_add("IV", [60, 195], "I")
+_add("IV", [90, 165], "IV")
+_add("IV", [105, 150], "V")
 
 # --- Class V rules ---
-for r in [51, 204]:
-    rule_to_nextclass[r] = "I"
-for r in [85, 170]:
-    rule_to_nextclass[r] = "II"
-for r in [102, 153]:
-    rule_to_nextclass[r] = "III"
-for r in [86, 89, 90, 101, 105, 106, 149, 150, 154, 165, 166, 169]:
-    rule_to_nextclass[r] = "V"
+_add("V", [51, 204], "I")
+_add("V", [85, 170], "II")
+_add("V", [102, 153], "III")
+_add("V", [86, 89, 90, 101, 105, 106, 149, 150, 154, 165, 166, 169], "V")
 
 # --- Class VI rules ---
-for r in [15, 240]:
-    rule_to_nextclass[r] = "I"
-for r in [105, 150]:
-    rule_to_nextclass[r] = "IV"
-for r in [90, 165]:
-    rule_to_nextclass[r] = "V"
+_add("VI", [15, 240], "I")
+_add("VI", [105, 150], "IV")
+_add("VI", [90, 165], "V")
 
 # ========= First Rule Table (Table 2.7b) =========
 # Maps R0 rule → its class
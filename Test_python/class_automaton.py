@@ -0,0 +1,265 @@
+"""
+Counting, ranking and sampling of class-valid rule vectors.
+
+classRules.py describes a finite automaton over the classes I..VI:
+
+    R_0        first_rule_table[R_0] is the class of cell 1
+    R_1..R_n-2 class_rule_transitions[c_i][R_i] is the class of cell i+1
+    R_n-1      must be in last_rule_table[c_n-1]
+
+so the number of valid vectors of length n is a sum over first rules of
+(A^(n-2) f)[c_1], where A[c][c'] counts the rules leading from c to c' and
+f[c] = len(last_rule_table[c]). Ranks follow lexicographic order of the
+rule vectors (numerically, cell 0 first), which makes unrank() a cheap way
+to cut an exhaustive sweep into equal shards.
+
+Usage:
+    automaton = ClassAutomaton()
+    automaton.count(10)                       # exact sweep size
+    for start, stop in automaton.shards(10, 8):
+        for rules in automaton.iter_vectors(10, start, stop): ...
+    automaton.iter_representatives(10)        # one vector per mirror pair
+    automaton.unrank(10, 12345)
+    automaton.sample(10, random.Random(0))
+"""
+
+import random
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from classRules import class_rule_transitions, first_rule_table, last_rule_table
+from symmetry import is_canonical
+
+Matrix = List[List[int]]
+
+CLASS_ORDER = ("I", "II", "III", "IV", "V", "VI")
+
+
+def _matmul(A: Matrix, B: Matrix) -> Matrix:
+    return [[sum(a * b for a, b in zip(row, col)) for col in zip(*B)] for row in A]
+
+
+def _matpow(A: Matrix, e: int) -> Matrix:
+    k = len(A)
+    result = [[int(i == j) for j in range(k)] for i in range(k)]
+    while e:
+        if e & 1:
+            result = _matmul(result, A)
+        A = _matmul(A, A)
+        e >>= 1
+    return result
+
+
+class ClassAutomaton:
+    """
+    The classRules tables compiled to index form.
+
+    Args:
+        first: R_0 -> class of cell 1 (default first_rule_table)
+        transitions: class -> {rule: next class} (default class_rule_transitions)
+        last: class -> accepted final rules (default last_rule_table)
+    """
+
+    def __init__(self, first: Dict[int, str] = None,
+                 transitions: Dict[str, Dict[int, str]] = None,
+                 last: Dict[str, Sequence[int]] = None):
+        first = first_rule_table if first is None else first
+        transitions = class_rule_transitions if transitions is None else transitions
+        last = last_rule_table if last is None else last
+
+        known = (set(transitions) | set(last) | set(first.values())
+                 | {c for t in transitions.values() for c in t.values()})
+        names = [c for c in CLASS_ORDER if c in known] + sorted(known - set(CLASS_ORDER))
+        self.classes = names
+        index = {c: k for k, c in enumerate(names)}
+        self.first: List[Tuple[int, int]] = sorted((r, index[c]) for r, c in first.items())
+        self.moves: List[List[Tuple[int, int]]] = [
+            sorted((r, index[c]) for r, c in transitions.get(name, {}).items()) for name in names]
+        self.last: List[List[int]] = [sorted(last.get(name, [])) for name in names]
+        self._first_map = dict(self.first)
+        self._move_maps = [dict(moves) for moves in self.moves]
+        self._last_sets = [set(rules) for rules in self.last]
+
+        k = len(names)
+        self.matrix: Matrix = [[0] * k for _ in range(k)]
+        for c, moves in enumerate(self.moves):
+            for _, nxt in moves:
+                self.matrix[c][nxt] += 1
+        self.final = [len(rules) for rules in self.last]
+        self._suffix_cache: List[List[int]] = [self.final]
+
+    # -- counting ------------------------------------------------------------
+
+    def count(self, n: int) -> int:
+        """Number of valid rule vectors of n cells (n >= 2), by matrix powers."""
+        if n < 2:
+            return 0
+        v = [sum(a * f for a, f in zip(row, self.final)) for row in _matpow(self.matrix, n - 2)]
+        return sum(v[c] for _, c in self.first)
+
+    def _suffix_counts(self, m: int) -> List[int]:
+        """Completions of m more cells (the last one included) from each class."""
+        cache = self._suffix_cache
+        while len(cache) < m:
+            prev = cache[-1]
+            cache.append([sum(prev[nxt] for _, nxt in moves) for moves in self.moves])
+        return cache[m - 1]
+
+    # -- ranking -------------------------------------------------------------
+
+    def classes_of(self, rules: Sequence[int]) -> Optional[List[str]]:
+        """Class of cells 1..n-1, or None if the vector is not valid."""
+        if len(rules) < 2:
+            return None
+        c = self._first_map.get(rules[0])
+        if c is None:
+            return None
+        seq = [c]
+        for r in rules[1:-1]:
+            c = self._move_maps[c].get(r)
+            if c is None:
+                return None
+            seq.append(c)
+        if rules[-1] not in self._last_sets[c]:
+            return None
+        return [self.classes[k] for k in seq]
+
+    def is_valid(self, rules: Sequence[int]) -> bool:
+        return self.classes_of(rules) is not None
+
+    def rank(self, rules: Sequence[int]) -> int:
+        """Position of a valid vector in lexicographic order."""
+        n = len(rules)
+        if not self.is_valid(rules):
+            raise ValueError(f"{list(rules)} is not a class-valid rule vector")
+        r = 0
+        c = None
+        for r0, c1 in self.first:
+            if r0 == rules[0]:
+                c = c1
+                break
+            r += self._suffix_counts(n - 1)[c1]
+        for i in range(1, n - 1):
+            remaining = n - 1 - i
+            for rule, nxt in self.moves[c]:
+                if rule == rules[i]:
+                    c = nxt
+                    break
+                r += self._suffix_counts(remaining)[nxt]
+        return r + self.last[c].index(rules[-1])
+
+    def unrank(self, n: int, index: int) -> List[int]:
+        """The vector at position index in lexicographic order."""
+        if not 0 <= index < self.count(n):
+            raise IndexError(f"rank {index} out of range for n={n}")
+        rules = []
+        for r0, c1 in self.first:
+            size = self._suffix_counts(n - 1)[c1]
+            if index < size:
+                rules.append(r0)
+                c = c1
+                break
+            index -= size
+        for i in range(1, n - 1):
+            remaining = n - 1 - i
+            for rule, nxt in self.moves[c]:
+                size = self._suffix_counts(remaining)[nxt]
+                if index < size:
+                    rules.append(rule)
+                    c = nxt
+                    break
+                index -= size
+        rules.append(self.last[c][index])
+        return rules
+
+    # -- enumeration and sampling -------------------------------------------
+
+    def iter_vectors(self, n: int, start: int = 0, stop: Optional[int] = None) -> Iterator[List[int]]:
+        """
+        Valid vectors with rank in [start, stop), lazily, in lexicographic order.
+
+        Subtrees entirely before start are skipped by their counts, so a shard
+        costs O(n) to reach plus O(1) amortized per vector.
+        """
+        total = self.count(n)
+        stop = total if stop is None else min(stop, total)
+        if start >= stop:
+            return
+        budget = [stop - start]
+        skip = [start]
+        prefix: List[int] = []
+
+        def walk(c: int, remaining: int) -> Iterator[List[int]]:
+            if remaining == 1:
+                for rule in self.last[c]:
+                    if skip[0]:
+                        skip[0] -= 1
+                        continue
+                    if not budget[0]:
+                        return
+                    budget[0] -= 1
+                    yield prefix + [rule]
+                return
+            sizes = self._suffix_counts(remaining - 1)
+            for rule, nxt in self.moves[c]:
+                if not budget[0]:
+                    return
+                if skip[0] >= sizes[nxt]:
+                    skip[0] -= sizes[nxt]
+                    continue
+                prefix.append(rule)
+                yield from walk(nxt, remaining - 1)
+                prefix.pop()
+
+        sizes = self._suffix_counts(n - 1)
+        for r0, c1 in self.first:
+            if not budget[0]:
+                return
+            if skip[0] >= sizes[c1]:
+                skip[0] -= sizes[c1]
+                continue
+            prefix.append(r0)
+            yield from walk(c1, n - 1)
+            prefix.pop()
+
+    def iter_representatives(self, n: int, start: int = 0,
+                             stop: Optional[int] = None) -> Iterator[List[int]]:
+        """
+        iter_vectors restricted to mirror-orbit representatives.
+
+        A vector is skipped when its mirror image is also valid and smaller;
+        symmetry.canonical_sweep expands results back to both.
+        """
+        for rules in self.iter_vectors(n, start, stop):
+            if is_canonical(rules, "null", member=self.is_valid):
+                yield rules
+
+    def shards(self, n: int, k: int) -> List[Tuple[int, int]]:
+        """Split ranks [0, count(n)) into k contiguous ranges of near-equal size."""
+        total = self.count(n)
+        return [(total * i // k, total * (i + 1) // k) for i in range(k)]
+
+    def sample(self, n: int, rng: random.Random = None) -> List[int]:
+        """A valid vector drawn uniformly at random."""
+        rng = random if rng is None else rng
+        return self.unrank(n, rng.randrange(self.count(n)))
+
+
+if __name__ == "__main__":
+    import time
+
+    automaton = ClassAutomaton()
+    for n in [2, 3, 4, 5, 8, 10, 20, 50]:
+        print(f"n={n:<3} valid rule vectors: {automaton.count(n)}")
+
+    n = 5
+    start = time.perf_counter()
+    vectors = list(automaton.iter_vectors(n))
+    elapsed = time.perf_counter() - start
+    assert all(automaton.rank(v) == i for i, v in enumerate(vectors))
+    assert vectors == sorted(vectors)
+    print(f"n={n}: enumerated {len(vectors)} vectors in {elapsed * 1e3:.0f} ms; ranks round-trip")
+
+    for start, stop in automaton.shards(10, 4):
+        first = next(automaton.iter_vectors(10, start, stop))
+        print(f"shard [{start}, {stop}) starts at {first}")
+    print("uniform sample, n=12:", automaton.sample(12, random.Random(0)))
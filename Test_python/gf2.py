@@ -0,0 +1,259 @@
+"""
+Bit-packed GF(2) matrices for linear (XOR) cellular automata.
+
+A state of n cells is an int where cell i is bit n-1-i, the same big-endian
+order as hybrid.state_to_int. A matrix is a list of n row ints in the same
+encoding: output cell i is the parity of (row i & state).
+
+Usage:
+    T = transition_matrix([90, 150, 150, 90], boundary="null")
+    T_inv = inverse(T)
+    assert apply(T_inv, apply(T, 0b1011)) == 0b1011
+
+    # Jump 2**40 steps ahead without iterating
+    x = apply(matpow(T, 1 << 40), 0b1011)
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ca_kernels import elementary_table
+
+Matrix = List[int]
+
+BOUNDARIES = ("null", "periodic")
+
+
+def parity(x: int) -> int:
+    return x.bit_count() & 1
+
+
+def pack(state: Sequence[int]) -> int:
+    """List of 0/1 cells -> int (cell 0 is the most significant bit)."""
+    x = 0
+    for bit in state:
+        x = (x << 1) | int(bit)
+    return x
+
+
+def unpack(x: int, n: int) -> List[int]:
+    """Inverse of pack."""
+    return [(x >> (n - 1 - i)) & 1 for i in range(n)]
+
+
+def identity(n: int) -> Matrix:
+    return [1 << (n - 1 - i) for i in range(n)]
+
+
+def apply(M: Matrix, x: int) -> int:
+    """Matrix-vector product M x over GF(2)."""
+    y = 0
+    for row in M:
+        y = (y << 1) | ((row & x).bit_count() & 1)
+    return y
+
+
+def matmul(A: Matrix, B: Matrix) -> Matrix:
+    """Matrix product A B, i.e. apply B first, then A."""
+    n = len(B)
+    out = []
+    for a in A:
+        r = 0
+        j = 0
+        while a:
+            if a & (1 << (n - 1 - j)):
+                r ^= B[j]
+                a ^= 1 << (n - 1 - j)
+            j += 1
+        out.append(r)
+    return out
+
+
+def inverse(M: Matrix) -> Matrix:
+    """
+    Gauss-Jordan inverse over GF(2).
+
+    Raises:
+        ValueError: if M is singular
+    """
+    n = len(M)
+    rows = list(M)
+    inv = identity(n)
+    for col in range(n):
+        bit = 1 << (n - 1 - col)
+        pivot = next((r for r in range(col, n) if rows[r] & bit), None)
+        if pivot is None:
+            raise ValueError("Matrix is singular over GF(2)")
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        inv[col], inv[pivot] = inv[pivot], inv[col]
+        for r in range(n):
+            if r != col and rows[r] & bit:
+                rows[r] ^= rows[col]
+                inv[r] ^= inv[col]
+    return inv
+
+
+def matpow(M: Matrix, k: int) -> Matrix:
+    """M**k by repeated squaring, O(n^3 log k) bit operations."""
+    if k < 0:
+        return matpow(inverse(M), -k)
+    result = identity(len(M))
+    square = M
+    while k:
+        if k & 1:
+            result = matmul(square, result)
+        k >>= 1
+        if k:
+            square = matmul(square, square)
+    return result
+
+
+class PowerCache:
+    """
+    Powers of one matrix for repeated jumps.
+
+    Squarings M**(2**j) are computed once and shared by all jumps, so jump()
+    costs O(n^2 log k) per call instead of O(n^3 log k). Full matrices for a
+    fixed stride are memoized by power(), after which each jump of that
+    stride is a single matrix-vector product.
+
+    Given M's characteristic polynomial f (gf2poly encoding), forward jumps
+    skip the squarings: M**k = (x**k mod f)(M) by Cayley-Hamilton, evaluated
+    on the state by Horner's rule in deg f applications of step (default
+    apply(M, .)). The squarings are O(n^3) each and dominate past a few
+    hundred cells; the polynomial path is O(n) steps.
+    """
+
+    def __init__(self, M: Matrix, charpoly: Optional[int] = None,
+                 step: Optional[Callable[[int], int]] = None):
+        self.n = len(M)
+        self.squares: List[Matrix] = [M]          # squares[j] = M**(2**j)
+        self._powers: Dict[int, Matrix] = {}
+        self._inverse: Optional["PowerCache"] = None
+        self.step = step or (lambda x: apply(M, x))
+        self._mod = None
+        self._polys: Dict[int, int] = {}
+        if charpoly is not None:
+            from gf2poly import Modulus
+            self._mod = Modulus(charpoly)
+
+    def poly_power(self, k: int) -> int:
+        """x**k mod the characteristic polynomial, memoized per k (k >= 0)."""
+        if self._mod is None:
+            raise ValueError("PowerCache was built without a characteristic polynomial")
+        p = self._polys.get(k)
+        if p is None:
+            p = self._polys[k] = self._mod.pow_x(k)
+        return p
+
+    def eval_poly(self, p: int, x: int) -> int:
+        """p(M) x by Horner's rule."""
+        r = 0
+        for i in range(p.bit_length() - 1, -1, -1):
+            r = self.step(r)
+            if (p >> i) & 1:
+                r ^= x
+        return r
+
+    def _square(self, j: int) -> Matrix:
+        while len(self.squares) <= j:
+            last = self.squares[-1]
+            self.squares.append(matmul(last, last))
+        return self.squares[j]
+
+    def _inverse_cache(self) -> "PowerCache":
+        if self._inverse is None:
+            self._inverse = PowerCache(inverse(self.squares[0]))
+        return self._inverse
+
+    def power(self, k: int) -> Matrix:
+        """M**k, memoized per k."""
+        if k < 0:
+            return self._inverse_cache().power(-k)
+        P = self._powers.get(k)
+        if P is None:
+            P = identity(self.n)
+            j = 0
+            while k >> j:
+                if (k >> j) & 1:
+                    P = matmul(self._square(j), P)
+                j += 1
+            self._powers[k] = P
+        return P
+
+    def jump(self, x: int, k: int) -> int:
+        """M**k x, applying the cached squarings for the set bits of k."""
+        if k < 0:
+            return self._inverse_cache().jump(x, -k)
+        if k in self._powers:
+            return apply(self._powers[k], x)
+        if self._mod is not None:
+            return self.eval_poly(self.poly_power(k), x)
+        j = 0
+        while k >> j:
+            if (k >> j) & 1:
+                x = apply(self._square(j), x)
+            j += 1
+        return x
+
+
+def linear_mask(table: Sequence[int]) -> Optional[int]:
+    """
+    Neighborhood mask of a linear rule table, or None if the rule is not linear.
+
+    A table of 2**k entries is linear when every entry is the parity of its
+    index AND a fixed k-bit mask (rules 90, 150, 60, 102, 204, ...).
+    """
+    k = len(table).bit_length() - 1
+    mask = sum(table[1 << b] << b for b in range(k))
+    if all(table[j] == parity(j & mask) for j in range(len(table))):
+        return mask
+    return None
+
+
+def rule_vector_matrix(radius: int, tables: Sequence[Sequence[int]],
+                       boundary: str = "null") -> Matrix:
+    """
+    Transition matrix of a vector of linear per-cell tables.
+
+    Args:
+        radius: Neighborhood radius shared by all tables
+        tables: One 2**(2*radius+1)-entry table per cell
+        boundary: "null" or "periodic"
+
+    Raises:
+        ValueError: if a table is not linear
+    """
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unknown boundary: {boundary}")
+    n = len(tables)
+    rows = []
+    for i, table in enumerate(tables):
+        mask = linear_mask(table)
+        if mask is None:
+            raise ValueError(f"Cell {i} has a non-linear rule table")
+        row = 0
+        for offset in range(-radius, radius + 1):
+            if not (mask >> (radius - offset)) & 1:
+                continue
+            j = i + offset
+            if boundary == "periodic":
+                j %= n
+            elif not 0 <= j < n:
+                continue
+            row ^= 1 << (n - 1 - j)
+        rows.append(row)
+    return rows
+
+
+def transition_matrix(mask: Sequence[int], boundary: str = "periodic") -> Matrix:
+    """Transition matrix of a hybrid mask of linear elementary rules (e.g. 90/150)."""
+    return rule_vector_matrix(1, [elementary_table(r) for r in mask], boundary)
+
+
+def is_linear_vector(tables: Sequence[Sequence[int]]) -> bool:
+    return all(linear_mask(t) is not None for t in tables)
+
+
+def to_lists(M: Matrix) -> List[List[int]]:
+    """Dense 0/1 rows, for printing and debugging."""
+    return [unpack(row, len(M)) for row in M]
@@ -0,0 +1,463 @@
+"""
+Polynomials over GF(2) and primitivity testing.
+
+A polynomial is an int whose bit i is the coefficient of x^i, so
+x^4 + x + 1 is 0b10011. A degree-n polynomial is primitive when it is
+irreducible and x has order 2^n - 1 modulo it; that is exactly the
+condition for a linear CA with that characteristic polynomial to cycle
+through all 2^n - 1 non-zero states.
+
+The order test needs the prime factors of 2^n - 1. They are found by
+splitting 2^n - 1 into cyclotomic (and Aurifeuillian) pieces and factoring
+those with trial division and Pollard-Brent rho. When a piece cannot be
+split within the iteration budget, its unknown prime factors are all large
+(rho finds factors below about 2^32 well within the budget), and a polynomial
+passing every other test is reported as "probable": an irreducible polynomial
+fails the order test for a prime q with probability 1/q, so the chance it is
+not primitive is about 2^-32 per unknown factor.
+
+Usage:
+    f = find_primitive(16)          # smallest-tap trinomial/pentanomial
+    poly_to_str(f)                  # 'x^16 + x^5 + x^3 + x^2 + 1'
+    primitivity(f)                  # 'primitive'
+    generate_table(512)             # rebuild primitive_polys.json (minutes)
+"""
+
+import json
+import math
+import os
+import random
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional, Tuple
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "primitive_polys.json")
+
+# Pollard-Brent iterations per composite before giving up on it
+RHO_BUDGET = 200_000
+
+
+# ---------------------------------------------------------------------------
+# Polynomial arithmetic
+# ---------------------------------------------------------------------------
+
+def degree(a: int) -> int:
+    return a.bit_length() - 1
+
+
+def poly_to_str(a: int) -> str:
+    if a == 0:
+        return "0"
+    terms = []
+    for i in range(degree(a), -1, -1):
+        if (a >> i) & 1:
+            terms.append("1" if i == 0 else "x" if i == 1 else f"x^{i}")
+    return " + ".join(terms)
+
+
+def poly_from_exponents(exponents) -> int:
+    a = 0
+    for e in exponents:
+        a ^= 1 << e
+    return a
+
+
+def poly_mul(a: int, b: int) -> int:
+    """Carry-less product."""
+    if a.bit_length() > b.bit_length():
+        a, b = b, a
+    r = 0
+    i = 0
+    while a:
+        if a & 1:
+            r ^= b << i
+        a >>= 1
+        i += 1
+    return r
+
+
+def poly_square(a: int) -> int:
+    """a^2: squaring over GF(2) spreads the bits of a apart."""
+    return int("0".join(format(a, "b")), 2) if a else 0
+
+
+def poly_divmod(a: int, b: int) -> Tuple[int, int]:
+    if b == 0:
+        raise ZeroDivisionError("polynomial division by zero")
+    lb = b.bit_length()
+    q = 0
+    while a.bit_length() >= lb:
+        shift = a.bit_length() - lb
+        q ^= 1 << shift
+        a ^= b << shift
+    return q, a
+
+
+def poly_mod(a: int, b: int) -> int:
+    return poly_divmod(a, b)[1]
+
+
+def poly_gcd(a: int, b: int) -> int:
+    while b:
+        a, b = b, poly_mod(a, b)
+    return a
+
+
+def poly_inverse_mod(a: int, f: int) -> int:
+    """a^-1 mod f by the extended Euclidean algorithm."""
+    r0, r1 = f, poly_mod(a, f)
+    s0, s1 = 0, 1
+    while r1:
+        q, r = poly_divmod(r0, r1)
+        r0, r1 = r1, r
+        s0, s1 = s1, s0 ^ poly_mul(q, s1)
+    if r0 != 1:
+        raise ValueError(f"{poly_to_str(a)} is not invertible mod {poly_to_str(f)}")
+    return s0
+
+
+def poly_derivative(a: int) -> int:
+    """Formal derivative: only odd powers survive, each dropping by one."""
+    odd = a & int("10" * ((a.bit_length() + 1) // 2), 2) if a else 0
+    return odd >> 1
+
+
+class Modulus:
+    """
+    Fast reduction modulo a fixed polynomial f.
+
+    Sparse f (trinomials, pentanomials) fold the high part back in with one
+    shift per term instead of one shift per bit; each fold lowers the degree
+    by n minus the second-highest exponent of f. Dense f use per-nibble tables
+    of x^(n+k) mod f, so reducing a product of degree < 2n takes n/4 lookups.
+    """
+
+    def __init__(self, f: int):
+        self.f = f
+        self.n = n = degree(f)
+        self.mask = (1 << n) - 1
+        self.low_terms = [i for i in range(n) if (f >> i) & 1]
+        self.sparse = n - self.low_terms[-1] >= 4 * len(self.low_terms) if self.low_terms else True
+        if not self.sparse:
+            self._tables = self._nibble_tables()
+
+    def _nibble_tables(self) -> List[List[int]]:
+        n, f = self.n, self.f
+        tables = []
+        power = f ^ (1 << n)  # x^n mod f
+        for _ in range((n + 3) // 4):
+            table = [0] * 16
+            for bit in (1, 2, 4, 8):
+                for v in range(bit):
+                    table[bit | v] = table[v] ^ power
+                power <<= 1
+                if power >> n:
+                    power ^= f
+            tables.append(table)
+        return tables
+
+    def reduce(self, a: int) -> int:
+        n = self.n
+        if not self.sparse:
+            hi = a >> n
+            if hi >> n:
+                return poly_mod(a, self.f)
+            a &= self.mask
+            for table in self._tables:
+                if not hi:
+                    break
+                a ^= table[hi & 15]
+                hi >>= 4
+            return a
+        mask, terms = self.mask, self.low_terms
+        while a >> n:
+            hi = a >> n
+            a &= mask
+            for t in terms:
+                a ^= hi << t
+        return a
+
+    def mul(self, a: int, b: int) -> int:
+        return self.reduce(poly_mul(a, b))
+
+    def square(self, a: int) -> int:
+        return self.reduce(poly_square(a))
+
+    def pow_x(self, e: int) -> int:
+        """x^e mod f; multiplying by x is a shift, so only squarings cost."""
+        r = 1
+        for bit in format(e, "b"):
+            r = self.square(r)
+            if bit == "1":
+                r = self.reduce(r << 1)
+        return r
+
+    def frobenius(self, a: int, k: int) -> int:
+        """a^(2^k) mod f."""
+        for _ in range(k):
+            a = self.square(a)
+        return a
+
+
+# ---------------------------------------------------------------------------
+# Integer factoring of 2^n - 1
+# ---------------------------------------------------------------------------
+
+_SMALL_PRIMES = [p for p in range(2, 1000) if all(p % q for q in range(2, int(p ** 0.5) + 1))]
+
+
+def is_probable_prime(m: int) -> bool:
+    """Miller-Rabin with the first 12 prime bases (deterministic below 3.3e24)."""
+    if m < 2:
+        return False
+    for p in _SMALL_PRIMES[:12]:
+        if m % p == 0:
+            return m == p
+    d, s = m - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _SMALL_PRIMES[:12]:
+        x = pow(a, d, m)
+        if x in (1, m - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % m
+            if x == m - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _pollard_brent(m: int, budget: int) -> Optional[int]:
+    """A non-trivial factor of composite m, or None if budget runs out."""
+    rng = random.Random(m)
+    spent = 0
+    while spent < budget:
+        y, c, batch = rng.randrange(1, m), rng.randrange(1, m), 128
+        g = r = q = 1
+        x = ys = y
+        while g == 1 and spent < budget:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % m
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % m
+                    q = q * abs(x - y) % m
+                g = math.gcd(q, m)
+                k += batch
+            spent += r
+            r *= 2
+        if g == m:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % m
+                g = math.gcd(abs(x - ys), m)
+        if 1 < g < m:
+            return g
+    return None
+
+
+def _factor_into(m: int, primes: set, unfactored: List[int], budget: int):
+    for p in _SMALL_PRIMES:
+        if p * p > m:
+            break
+        while m % p == 0:
+            primes.add(p)
+            m //= p
+    if m == 1:
+        return
+    if is_probable_prime(m):
+        primes.add(m)
+        return
+    d = _pollard_brent(m, budget)
+    if d is None:
+        unfactored.append(m)
+        return
+    _factor_into(d, primes, unfactored, budget)
+    _factor_into(m // d, primes, unfactored, budget)
+
+
+def _mobius(m: int) -> int:
+    result, p = 1, 2
+    while p * p <= m:
+        if m % p == 0:
+            m //= p
+            if m % p == 0:
+                return 0
+            result = -result
+        p += 1
+    return -result if m > 1 else result
+
+
+def _cyclotomic_at_2(d: int) -> int:
+    """Phi_d(2) = prod over k | d of (2^k - 1)^mu(d/k)."""
+    num = den = 1
+    for k in range(1, d + 1):
+        if d % k == 0:
+            mu = _mobius(d // k)
+            if mu == 1:
+                num *= (1 << k) - 1
+            elif mu == -1:
+                den *= (1 << k) - 1
+    return num // den
+
+
+def _cyclotomic_pieces(d: int) -> List[int]:
+    """Phi_d(2), split further by the Aurifeuillian identity when d = 4k, k odd."""
+    phi = _cyclotomic_at_2(d)
+    if d % 4 == 0 and (d // 4) % 2 == 1 and d > 4:
+        k = d // 4
+        h = (k + 1) // 2
+        # 2^(2k) + 1 = (2^k - 2^h + 1)(2^k + 2^h + 1)
+        low = math.gcd(phi, (1 << k) - (1 << h) + 1)
+        return [low, phi // low]
+    return [phi]
+
+
+@lru_cache(maxsize=None)
+def factor_mersenne(n: int, budget: int = RHO_BUDGET) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Prime factors of 2^n - 1.
+
+    Returns:
+        (sorted distinct primes found, composite cofactors left unsplit)
+    """
+    primes: set = set()
+    unfactored: List[int] = []
+    for d in range(2, n + 1):
+        if n % d == 0:
+            for piece in _cyclotomic_pieces(d):
+                _factor_into(piece, primes, unfactored, budget)
+    return tuple(sorted(primes)), tuple(sorted(unfactored))
+
+
+# ---------------------------------------------------------------------------
+# Irreducibility and primitivity
+# ---------------------------------------------------------------------------
+
+def _prime_divisors(m: int) -> List[int]:
+    out, p = [], 2
+    while p * p <= m:
+        if m % p == 0:
+            out.append(p)
+            while m % p == 0:
+                m //= p
+        p += 1
+    if m > 1:
+        out.append(m)
+    return out
+
+
+def is_irreducible(f: int) -> bool:
+    """Rabin's test: x^(2^n) = x mod f and gcd(x^(2^(n/p)) - x, f) = 1 for primes p | n."""
+    n = degree(f)
+    if n < 1:
+        return False
+    if n == 1:
+        return True
+    if not f & 1:
+        return False
+    mod = Modulus(f)
+    for p in _prime_divisors(n):
+        h = mod.frobenius(2, n // p)
+        if poly_gcd(f, h ^ 2) != 1:
+            return False
+    return mod.frobenius(2, n) == 2
+
+
+def primitivity(f: int, budget: int = RHO_BUDGET) -> Optional[str]:
+    """
+    Classify f.
+
+    Returns:
+        "primitive" if proven primitive, "probable" if primitive up to prime
+        factors of 2^n - 1 too large to find (see module docstring), or None
+        if f is not primitive
+    """
+    if not f & 1 or not is_irreducible(f):
+        return None
+    n = degree(f)
+    order = (1 << n) - 1
+    mod = Modulus(f)
+    primes, unfactored = factor_mersenne(n, budget)
+    for q in primes:
+        if mod.pow_x(order // q) == 1:
+            return None
+    # Necessary condition for the unknown primes taken together
+    for c in unfactored:
+        if mod.pow_x(order // c) == 1:
+            return None
+    return "probable" if unfactored else "primitive"
+
+
+def is_primitive(f: int, allow_probable: bool = True) -> bool:
+    result = primitivity(f)
+    return result == "primitive" or (allow_probable and result == "probable")
+
+
+def candidate_polys(n: int) -> Iterator[int]:
+    """Trinomials x^n + x^k + 1, then pentanomials, smallest taps first."""
+    for k in range(1, n):
+        yield poly_from_exponents((n, k, 0))
+    for taps in combinations(range(1, n), 3):
+        yield poly_from_exponents((n,) + tuple(reversed(taps)) + (0,))
+
+
+def find_primitive(n: int, allow_probable: bool = True) -> int:
+    """First primitive polynomial of degree n in candidate_polys order."""
+    if n == 1:
+        return 0b11
+    for f in candidate_polys(n):
+        if is_primitive(f, allow_probable):
+            return f
+    raise ValueError(f"No primitive trinomial or pentanomial of degree {n}")
+
+
+# ---------------------------------------------------------------------------
+# Generated table
+# ---------------------------------------------------------------------------
+
+def generate_table(max_n: int, path: str = TABLE_PATH) -> Dict[int, Tuple[int, str]]:
+    """
+    Find a primitive polynomial for every degree up to max_n and save them.
+
+    The JSON maps str(n) to {"poly": exponent list, "status": primitivity}.
+    """
+    table = {}
+    for n in range(1, max_n + 1):
+        f = find_primitive(n)
+        table[n] = (f, "primitive" if n == 1 else primitivity(f))
+    _write_table(table, path)
+    return table
+
+
+def _write_table(table: Dict[int, Tuple[int, str]], path: str):
+    """One degree per line, so the file diffs cleanly when regenerated."""
+    lines = []
+    for n, (f, status) in sorted(table.items()):
+        entry = {"poly": [i for i in range(degree(f), -1, -1) if (f >> i) & 1], "status": status}
+        lines.append(f" {json.dumps(str(n))}: {json.dumps(entry)}")
+    with open(path, "w") as fh:
+        fh.write("{\n" + ",\n".join(lines) + "\n}\n")
+
+
+@lru_cache(maxsize=1)
+def load_table(path: str = TABLE_PATH) -> Dict[int, Tuple[int, str]]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        raw = json.load(fh)
+    return {int(n): (poly_from_exponents(entry["poly"]), entry["status"]) for n, entry in raw.items()}
+
+
+def primitive_poly(n: int) -> int:
+    """A primitive polynomial of degree n, from the table when available."""
+    entry = load_table().get(n)
+    if entry is not None:
+        return entry[0]
+    return find_primitive(n)
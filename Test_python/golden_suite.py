@@ -0,0 +1,370 @@
+"""
+Regression and performance suite against the C tools' outputs.
+
+Correctness: the reports in Test_C are golden data.
+
+    ca_output.txt               maximal null-boundary 90/150 masks of N=4..8
+                                and their longest cycle, from
+                                CheckCA_ALLcombinations
+    Non_linear_maximal_len.txt  ca_nonlinear's class II / V replacements of
+                                those masks that keep a maximal cycle
+
+are compared with mask_search, hybrid.analyze_cycles, results_store's
+cycle spectra and maximal_pipeline. The uniform periodic engines, the
+generators' ca_step and transitionGraph (networkx) when installed, are
+checked against the bit-sliced successor tables. With --rebuild-c the three
+C tools are compiled with gcc into a scratch directory and run as a chain
+(CheckCA_ALLcombinations -> summary -> CA_filter -> ca_nonlinear) for
+fresh golden data up to the C limit of 10 cells.
+
+Performance: every engine runs a fixed workload per n; the best of
+--repeat runs gives seconds and throughput, one more run under tracemalloc
+gives the peak of Python and NumPy allocations. Each run is appended to a
+JSON history and compared with the previous entry; a workload slower by
+more than --tolerance is flagged, and any flag or failed check makes the
+exit status 1.
+
+Usage:
+    python golden_suite.py                     # checks + timings, history in golden_history.json
+    python golden_suite.py --rebuild-c --c-max-n 9
+    python golden_suite.py --no-perf
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bitslice import BitSlicedCA
+from hybrid import analyze_cycles
+from mask_search import enumerate_maximal
+from maximal_pipeline import run_unit
+from replacement_sweep import ReplacementSweep
+from results_store import compute_verdict, cycle_spectrum, parse_ca_output, parse_nonlinear
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+C_DIR = os.path.join(HERE, "..", "Test_C")
+C_TOOLS = ("CheckCA_ALLcombinations", "CA_filter", "ca_nonlinear")
+C_MAX_CELLS = 10
+
+
+class Check(NamedTuple):
+    name: str
+    ok: bool
+    detail: str
+
+
+# ---------------------------------------------------------------------------
+# Correctness
+# ---------------------------------------------------------------------------
+
+def check_ca_output(lines: Iterable[str], label: str) -> List[Check]:
+    """Maximal masks and their longest cycle against every Python engine."""
+    golden: Dict[int, Dict[Tuple[int, ...], int]] = {}
+    for rules, boundary, length in parse_ca_output(lines):
+        if boundary == "null":
+            golden.setdefault(len(rules), {})[tuple(rules)] = length
+    checks = []
+    for n, configs in sorted(golden.items()):
+        python = {tuple(m) for m in enumerate_maximal(n)}
+        target = (1 << n) - 1
+        maximal = {r for r, length in configs.items() if length == target}
+        missing, extra = maximal - python, python - maximal
+        checks.append(Check(f"{label} N={n} maximal masks", not missing and not extra,
+                            f"{len(maximal)} golden, {len(python)} mask_search"
+                            + (f"; missing {sorted(missing)[:3]}" if missing else "")
+                            + (f"; extra {sorted(extra)[:3]}" if extra else "")))
+        bad_hybrid = [r for r, length in configs.items()
+                      if max(len(c) for c in analyze_cycles(n, list(r), "null")) != length]
+        checks.append(Check(f"{label} N={n} hybrid.analyze_cycles", not bad_hybrid,
+                            f"{len(configs) - len(bad_hybrid)}/{len(configs)} agree"))
+        bad_spectrum = [r for r, length in configs.items() if compute_verdict(list(r))["max_cycle"] != length]
+        checks.append(Check(f"{label} N={n} cycle_spectrum", not bad_spectrum,
+                            f"{len(configs) - len(bad_spectrum)}/{len(configs)} agree"))
+    return checks
+
+
+def check_nonlinear(lines: Iterable[str], label: str) -> List[Check]:
+    """ca_nonlinear's hits against maximal_pipeline under C semantics."""
+    by_n: Dict[int, Tuple[set, set]] = {}
+    for block in parse_nonlinear(lines):
+        n = len(block["base"])
+        golden, _ = by_n.setdefault(n, (set(), set()))
+        golden.update(tuple(h) for h in block["hits"])
+    checks = []
+    for n, (golden, _) in sorted(by_n.items()):
+        python = set()
+        for base in enumerate_maximal(n):
+            unit = run_unit({"n": n, "unit": 0, "base": base, "require_valid": False})
+            python.update(tuple(h) for h in unit["hits"])
+        # ca_nonlinear only sees the bases that CA_filter passed on, which are
+        # exactly the ones with a class II / V middle cell, so the sets match
+        checks.append(Check(f"{label} N={n} non-linear hits", golden == python,
+                            f"{len(golden)} golden, {len(python)} maximal_pipeline"))
+        # C checks the cycle length only; the store also checks bijectivity
+        not_bijective = [h for h in golden if not compute_verdict(list(h))["reversible"]]
+        checks.append(Check(f"{label} N={n} non-linear hits reversible", not not_bijective,
+                            f"{len(golden) - len(not_bijective)}/{len(golden)} bijective"))
+    return checks
+
+
+def check_uniform_engines(ns: Sequence[int] = (5, 7, 8),
+                          rules: Sequence[int] = (30, 45, 90, 105, 110, 150, 184)) -> List[Check]:
+    """Periodic single-rule engines against the bit-sliced successor tables."""
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    from instrumentation import Instrumentation
+
+    checks = []
+    bad = []
+    for n in ns:
+        gen = MaximalRCAGenerator(n, instrumentation=Instrumentation(verbosity=0))
+        for rule in rules:
+            succ = BitSlicedCA.from_rules([rule] * n, "periodic").successors()
+            for s in range(0, 1 << n, max(1, (1 << n) // 64)):
+                state = [(s >> (n - 1 - i)) & 1 for i in range(n)]
+                nxt = int("".join(map(str, gen.ca_step(state, rule))), 2)
+                if nxt != succ[s]:
+                    bad.append((n, rule, s))
+    checks.append(Check("MaximalRCAGenerator.ca_step", not bad, f"{len(bad)} mismatching states"))
+
+    try:
+        import transitionGraph
+    except ImportError as e:
+        checks.append(Check("transitionGraph cycle lengths", True, f"skipped ({e.name} not installed)"))
+        return checks
+    bad = []
+    for n in ns:
+        for rule in rules:
+            G, _ = transitionGraph.build_state_graph(rule, n)
+            lengths = sorted(transitionGraph.compute_graph_metrics(G)["cycle_lengths"])
+            spectrum = cycle_spectrum(BitSlicedCA.from_rules([rule] * n, "periodic").successors())
+            if lengths != sorted(k for k, c in spectrum.items() for _ in range(c)):
+                bad.append((n, rule))
+    checks.append(Check("transitionGraph cycle lengths", not bad, f"mismatches: {bad[:5]}"))
+    return checks
+
+
+# ---------------------------------------------------------------------------
+# Fresh golden data from the C tools
+# ---------------------------------------------------------------------------
+
+def build_c_tools(build_dir: str, cc: str = "gcc") -> Dict[str, str]:
+    """Compile the C chain; returns tool name -> executable path."""
+    if shutil.which(cc) is None:
+        raise RuntimeError(f"{cc} not found")
+    paths = {}
+    for tool in C_TOOLS:
+        out = os.path.join(build_dir, tool)
+        subprocess.run([cc, "-O2", "-o", out, os.path.join(C_DIR, tool + ".c"), "-lm"],
+                       check=True, capture_output=True, text=True)
+        paths[tool] = out
+    return paths
+
+
+def run_c_chain(tools: Dict[str, str], n: int) -> Tuple[str, str]:
+    """(CheckCA summary, ca_nonlinear report) for n null-boundary cells."""
+    if not 1 <= n <= C_MAX_CELLS:
+        raise ValueError(f"The C tools support 1..{C_MAX_CELLS} cells")
+    raw = subprocess.run([tools["CheckCA_ALLcombinations"]], input=f"{n}\n0\n",
+                         capture_output=True, text=True, check=True).stdout
+    # CA_filter reads the summary only, headed by N=<n> as in ca_output.txt
+    summary = raw[raw.index("CONFIGURATIONS WITH MAXIMAL CYCLES"):]
+    filtered = subprocess.run([tools["CA_filter"]], input=f"N={n}\n{summary}",
+                              capture_output=True, text=True, check=True).stdout
+    report = subprocess.run([tools["ca_nonlinear"]], input=filtered,
+                            capture_output=True, text=True, check=True).stdout
+    return summary, report
+
+
+# ---------------------------------------------------------------------------
+# Performance
+# ---------------------------------------------------------------------------
+
+class Workload(NamedTuple):
+    name: str
+    n: int
+    unit: str
+    setup: Callable[[], Callable[[], int]]     # returns the timed call, which returns work done
+
+
+def _generator_workload(n: int) -> Callable[[], int]:
+    from MaximalRCAGenerator import MaximalRCAGenerator
+    from instrumentation import Instrumentation
+
+    def run():
+        random.seed(n)
+        np.random.seed(n)
+        gen = MaximalRCAGenerator(n, instrumentation=Instrumentation(verbosity=0, timing=False))
+        return len(gen.generate_maximal_rca("II", max_length=200))
+    return run
+
+
+def _transition_graph_workload(n: int) -> Callable[[], int]:
+    import transitionGraph
+
+    def run():
+        G, _ = transitionGraph.build_state_graph(30, n)
+        transitionGraph.compute_graph_metrics(G)
+        return 1 << n
+    return run
+
+
+def default_workloads(quick: bool = False) -> List[Workload]:
+    big = not quick
+    out = []
+    for n in ((10, 12) if quick else (10, 14)):
+        mask = next(enumerate_maximal(n))
+        out.append(Workload("hybrid.analyze_cycles", n, "states",
+                            lambda mask=mask, n=n: lambda: len(analyze_cycles(n, mask, "null")) and 1 << n))
+    for n in ((12, 16) if quick else (12, 16, 20)):
+        rules = [90, 150] * (n // 2)
+        rules[1] = 30
+        out.append(Workload("BitSlicedCA.successors", n, "states",
+                            lambda rules=rules, n=n: lambda: len(BitSlicedCA.from_rules(rules).successors())))
+    for n in ((10, 12) if quick else (10, 14)):
+        base = next(enumerate_maximal(n))
+
+        def sweep_setup(base=base, n=n):
+            sweep = ReplacementSweep(base)
+            return lambda: sum(1 for _ in sweep.single_replacements(range(1, n - 1), range(256)))
+        out.append(Workload("ReplacementSweep.single_replacements", n, "candidates", sweep_setup))
+    for n in ((8, 9) if quick else (9, 10)):
+        base = max(enumerate_maximal(n), key=lambda b: len([r for r in b[1:-1] if r == 90]))
+        out.append(Workload("maximal_pipeline.run_unit", n, "candidates",
+                            lambda base=base, n=n: lambda: run_unit(
+                                {"n": n, "unit": 0, "base": base, "require_valid": False})["tested"]))
+    for n in ((12,) if quick else (12, 16)):
+        rules = [90, 150] * (n // 2)
+        out.append(Workload("results_store.compute_verdict", n, "states",
+                            lambda rules=rules, n=n: lambda: compute_verdict(rules) and 1 << n))
+    for n in ((6,) if quick else (6, 8)):
+        out.append(Workload("MaximalRCAGenerator.generate_maximal_rca", n, "rules", lambda n=n: _generator_workload(n)))
+    try:
+        import networkx  # noqa: F401
+        for n in ((8,) if quick else (8, 10)):
+            out.append(Workload("transitionGraph.build+metrics", n, "states",
+                                lambda n=n: _transition_graph_workload(n)))
+    except ImportError:
+        pass
+    return out
+
+
+def measure(workload: Workload, repeat: int = 3) -> Dict:
+    call = workload.setup()
+    call()                                   # warm caches (tables, imports)
+    best, work = float("inf"), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work = call()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": best, "throughput": work / best if best else float("inf"),
+            "unit": f"{workload.unit}/s", "peak_kib": peak / 1024}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: str) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def regressions(current: Dict[str, Dict], previous: Optional[Dict[str, Dict]],
+                tolerance: float) -> List[str]:
+    """Workloads more than tolerance slower than in the previous run."""
+    if not previous:
+        return []
+    out = []
+    for key, result in current.items():
+        before = previous.get(key)
+        if before and result["seconds"] > before["seconds"] * (1 + tolerance):
+            out.append(f"{key}: {before['seconds'] * 1e3:.1f} ms -> {result['seconds'] * 1e3:.1f} ms "
+                       f"(+{result['seconds'] / before['seconds'] - 1:.0%})")
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def run_suite(rebuild_c: bool = False, c_max_n: int = 8, perf: bool = True, quick: bool = False,
+              repeat: int = 3, history_path: str = os.path.join(HERE, "golden_history.json"),
+              tolerance: float = 0.25, verbose: bool = True) -> bool:
+    """Run every check and timing; returns True when nothing failed or regressed."""
+    say = print if verbose else (lambda *a, **k: None)
+    checks: List[Check] = []
+    with open(os.path.join(C_DIR, "ca_output.txt")) as f:
+        checks += check_ca_output(f, "ca_output.txt")
+    with open(os.path.join(C_DIR, "Non_linear_maximal_len.txt")) as f:
+        checks += check_nonlinear(f, "Non_linear_maximal_len.txt")
+    checks += check_uniform_engines()
+    if rebuild_c:
+        with tempfile.TemporaryDirectory() as build_dir:
+            tools = build_c_tools(build_dir)
+            for n in range(4, min(c_max_n, C_MAX_CELLS) + 1):
+                summary, report = run_c_chain(tools, n)
+                checks += check_ca_output(summary.splitlines(), "gcc")
+                checks += check_nonlinear(report.splitlines(), "gcc")
+    for c in checks:
+        say(f"{'ok  ' if c.ok else 'FAIL'} {c.name:<48} {c.detail}")
+    failed = [c for c in checks if not c.ok]
+
+    slow: List[str] = []
+    results: Dict[str, Dict] = {}
+    if perf:
+        say()
+        for w in default_workloads(quick):
+            key = f"{w.name}[n={w.n}]"
+            results[key] = r = measure(w, repeat)
+            say(f"{key:<48} {r['seconds'] * 1e3:9.2f} ms {r['throughput']:12.3g} {r['unit']:<14} "
+                f"peak {r['peak_kib']:9.0f} KiB")
+        history = load_history(history_path)
+        previous = history[-1]["results"] if history else None
+        slow = regressions(results, previous, tolerance)
+        for line in slow:
+            say(f"REGRESSION {line}")
+        history.append({"time": datetime.datetime.now().isoformat(timespec="seconds"),
+                        "commit": _git_commit(), "python": platform.python_version(),
+                        "quick": quick, "checks_failed": [c.name for c in failed],
+                        "results": results})
+        with open(history_path, "w") as f:
+            json.dump(history, f, indent=1)
+
+    say(f"\n{len(checks) - len(failed)}/{len(checks)} checks passed, {len(slow)} regressions")
+    return not failed and not slow
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Golden-data checks and engine timings")
+    parser.add_argument("--rebuild-c", action="store_true", help="compile the C tools with gcc and compare fresh output")
+    parser.add_argument("--c-max-n", type=int, default=8, help=f"largest N for --rebuild-c (at most {C_MAX_CELLS})")
+    parser.add_argument("--no-perf", action="store_true")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--history", default=os.path.join(HERE, "golden_history.json"))
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    ok = run_suite(args.rebuild_c, args.c_max_n, not args.no_perf, args.quick, args.repeat,
+                   args.history, args.tolerance)
+    raise SystemExit(0 if ok else 1)
@@ -2,6 +2,12 @@ import numpy as np
 import random
 from collections import Counter
 
+import gf2
+from bitslice import BitSlicedCA
+from results_store import ResultsStore
+from reversibility import is_reversible
+from symmetry import canonical
+
 # Rule 90 and Rule 150 update functions
 def rule90(left, center, right):
     return left ^ right
@@ -10,13 +16,18 @@ def rule150(left, center, right):
     return left ^ center ^ right
 
 # Hybrid update function based on a mask (list of 90/150 per cell)
-def hybrid_update(state, mask):
+# boundary: "periodic" (ring) or "null" (cells outside the array are 0)
+def hybrid_update(state, mask, boundary="periodic"):
     n = len(state)
     new_state = np.zeros_like(state)
     for i in range(n):
-        left = state[(i - 1) % n]
+        if boundary == "periodic":
+            left = state[(i - 1) % n]
+            right = state[(i + 1) % n]
+        else:
+            left = state[i - 1] if i > 0 else 0
+            right = state[i + 1] if i < n - 1 else 0
         center = state[i]
-        right = state[(i + 1) % n]
         if mask[i] == 90:
             new_state[i] = rule90(left, center, right)
         elif mask[i] == 150:
@@ -25,6 +36,35 @@ def hybrid_update(state, mask):
             raise ValueError("Mask must contain only 90 or 150")
     return new_state
 
+# Backward step: cached GF(2) inverse of the mask's transition matrix
+_inverse_matrices = {}
+
+def hybrid_inverse_update(state, mask, boundary="periodic"):
+    key = (tuple(mask), boundary)
+    inv = _inverse_matrices.get(key)
+    if inv is None:
+        try:
+            inv = gf2.inverse(gf2.transition_matrix(mask, boundary))
+        except ValueError:
+            raise ValueError(f"Mask {mask} is not invertible") from None
+        _inverse_matrices[key] = inv
+    n = len(state)
+    return int_to_state(gf2.apply(inv, state_to_int(state)), n)
+
+# Jump k steps ahead (k < 0 steps back) via cached powers of the transition matrix
+_power_caches = {}
+
+def hybrid_power_cache(mask, boundary="periodic"):
+    key = (tuple(mask), boundary)
+    cache = _power_caches.get(key)
+    if cache is None:
+        cache = _power_caches[key] = gf2.PowerCache(gf2.transition_matrix(mask, boundary))
+    return cache
+
+def hybrid_jump(state, mask, k, boundary="periodic"):
+    n = len(state)
+    return int_to_state(hybrid_power_cache(mask, boundary).jump(state_to_int(state), k), n)
+
 # Convert between integer <-> binary state
 def int_to_state(x, n):
     return np.array([(x >> i) & 1 for i in reversed(range(n))], dtype=np.uint8)
@@ -33,16 +73,22 @@ def state_to_int(state):
     return int("".join(map(str, state.tolist())), 2)
 
 # Build state transition graph and analyze cycles for a given mask
-def analyze_cycles(n, mask):
+# mask is normally 90/150 per cell, but any rule vector BitSlicedCA.from_rules
+# accepts (elementary 0-255 and the non-linear rule numbers) is analyzed too;
+# unlike hybrid_update, other rules are not rejected
+def analyze_cycles(n, mask, boundary="periodic"):
+    if len(mask) != n:
+        raise ValueError(f"Mask has {len(mask)} cells, expected {n}")
+    # Successors of all 2^n states at once, 64 states per machine word
+    successor = BitSlicedCA.from_rules(mask, boundary).successors()
     visited = {}
     cycles = []
     for start in range(2**n):
         if start in visited:
             continue
         seen = {}
-        current = int_to_state(start, n)
+        idx = start
         while True:
-            idx = state_to_int(current)
             if idx in seen:
                 # cycle detected
                 cycle_start = seen[idx]
@@ -55,7 +101,7 @@ def analyze_cycles(n, mask):
                 # already known
                 break
             seen[idx] = len(seen)
-            current = hybrid_update(current, mask)
+            idx = int(successor[idx])
     return cycles
 
 # Random mask generator
@@ -69,20 +115,41 @@ if __name__ == "__main__":
     best_len = 0
     best_mask = None
     best_cycles = None
+    rejected = 0
+    # Verdicts persist across runs, one per mirror orbit (a mask and its
+    # mirror image have isomorphic state graphs)
+    store = ResultsStore("results.sqlite")
+    orbits = set()
     
     for trial in range(num_trials):
         mask = random_mask(n)
-        cycles = analyze_cycles(n, mask)
-        lengths = [len(c) for c in cycles]
-        max_len = max(lengths)
+        orbits.add(canonical(mask, "periodic"))
+        found = store.lookup(mask, "periodic")
+        reversible = found.reversible if found is not None else None
+        if reversible is None:
+            # The linear-time check first: only invertible masks get a spectrum
+            reversible = is_reversible(mask, boundary="periodic")
+            if not reversible:
+                store.record(mask, "periodic", "is_reversible", reversible=False, maximal=False)
+        # Non-invertible masks can't have a cycle through all non-zero states
+        if not reversible:
+            rejected += 1
+            continue
+        max_len = store.verdict(mask, "periodic").max_cycle
         
         if max_len > best_len:
             best_len = max_len
             best_mask = mask
-            best_cycles = cycles
+            best_cycles = analyze_cycles(n, mask)
             print(f"New best found! Cycle length = {best_len}, mask = {mask}")
     
+    print(f"\nRejected {rejected}/{num_trials} non-invertible masks")
+    print(f"{len(orbits)} distinct mask orbits for {num_trials} trials; "
+          f"{store.count(n=n, boundary='periodic')} periodic N={n} orbit members stored in {store.path}")
+    store.close()
     print("\n==== FINAL BEST RESULT ====")
+    if best_mask is None:
+        raise SystemExit("No invertible mask found; increase num_trials")
     print(f"Best mask: {best_mask}")
     print(f"Largest cycle length: {best_len}")
     print(f"Maximal length possible: {2**n - 1}")
@@ -94,3 +161,14 @@ if __name__ == "__main__":
     for state in largest[:16]:
         print(bin(state)[2:].zfill(n))
     print("... (truncated)")
+    
+    # Jumping a full cycle length ahead must land back on the start state
+    start = int_to_state(largest[0], n)
+    back = hybrid_jump(start, best_mask, len(largest))
+    print(f"Jump {len(largest)} steps returns to start? {'YES' if (back == start).all() else 'NO'}")
+    
+    # For comparison: a null-boundary mask built directly from a primitive polynomial
+    from synthesis import maximal_mask
+    built = maximal_mask(n)
+    longest = max(len(c) for c in analyze_cycles(n, built, boundary="null"))
+    print(f"\nConstructed mask (null boundary): {built}, largest cycle length {longest}")
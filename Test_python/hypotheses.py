@@ -0,0 +1,250 @@
+"""
+Label tables and vectorized criteria for neighbourhood-set hypotheses.
+
+The neighbourhood set of an elementary rule is the rule number itself read
+as an 8-bit mask: rule 30 = 0b00011110 fires on neighbourhoods {1, 2, 3, 4}.
+testing.py and testing2.py check criteria over those sets by hand for the
+eight class II rules of ca_nonlinear; here the same question is asked of
+every weight-4 rule at every cell of many maximal 90/150 bases.
+
+label() puts one rule into one cell of a base (a ReplacementSweep delta,
+then the maximal-cycle check) and records a row per case:
+
+    base, n, position, rule, cell_class, left, right, maximal
+
+where cell_class is the base's class of that cell (index into
+rule_tables.CLASS_NAMES, -1 for the boundary cells) and left/right are the
+base rules beside it. A criterion is any function of the table returning a
+boolean array, so numpy operators combine them:
+
+    refined = lambda t: ~(t.has(3) & t.has(4)) & (~t.has(5) | t.has(3) | (t.has(0) & t.has(7)))
+
+set_criterion() lifts an existing predicate over neighbourhood sets (like
+testing.py's check_maximal_pattern_refined) by evaluating it once per rule.
+
+Usage:
+    table = label(range(5, 11))                        # every maximal base, N=5..10
+    report = evaluate(table, {"refined": refined}, where=table.cell_class == CLASS_II)
+    print(format_report(report))
+"""
+
+import time
+from itertools import combinations
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from mask_search import enumerate_maximal
+from replacement_sweep import ReplacementSweep
+from rule_tables import CLASS_INDEX, CLASS_NAMES
+
+WEIGHT4_RULES = [sum(1 << k for k in ks) for ks in combinations(range(8), 4)]
+
+# The eight rules ca_nonlinear puts into class II cells
+CLASS_II_NONLINEAR = [30, 45, 75, 120, 135, 180, 210, 225]
+
+CLASS_II = CLASS_INDEX["II"]
+
+_POPCOUNT = np.array([bin(r).count("1") for r in range(256)], dtype=np.uint8)
+
+Criterion = Callable[["LabelTable"], np.ndarray]
+
+
+class LabelTable:
+    """Columns of labelled cases, one row per (base, position, rule)."""
+
+    COLUMNS = ("base", "n", "position", "rule", "cell_class", "left", "right", "maximal")
+
+    def __init__(self, bases: List[List[int]], columns: Dict[str, np.ndarray]):
+        self.bases = bases
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.rule)
+
+    @property
+    def weight(self) -> np.ndarray:
+        return _POPCOUNT[self.rule]
+
+    def has(self, k: int) -> np.ndarray:
+        """Rows whose rule fires on neighbourhood k (0-7, l c r as bits 2 1 0)."""
+        return ((self.rule >> k) & 1).astype(bool)
+
+    def row(self, i: int) -> Dict:
+        out = {name: getattr(self, name)[i].item() for name in self.COLUMNS}
+        out["cell_class"] = CLASS_NAMES[out["cell_class"]] if out["cell_class"] >= 0 else None
+        out["neighbourhoods"] = [k for k in range(8) if (out["rule"] >> k) & 1]
+        rules = list(self.bases[out["base"]])
+        rules[out["position"]] = out["rule"]
+        out["rules"] = rules
+        return out
+
+    def save(self, path: str):
+        lengths = np.array([len(b) for b in self.bases], dtype=np.int64)
+        flat = np.array([r for b in self.bases for r in b], dtype=np.int64)
+        np.savez(path, base_lengths=lengths, base_rules=flat,
+                 **{name: getattr(self, name) for name in self.COLUMNS})
+
+    @classmethod
+    def load(cls, path: str) -> "LabelTable":
+        with np.load(path) as data:
+            bounds = np.cumsum(np.concatenate(([0], data["base_lengths"])))
+            flat = data["base_rules"].tolist()
+            bases = [flat[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+            return cls(bases, {name: data[name] for name in cls.COLUMNS})
+
+
+# ---------------------------------------------------------------------------
+# Labelling
+# ---------------------------------------------------------------------------
+
+def _base_classes(base: Sequence[int]) -> List[int]:
+    """Class index per cell of a base (-1 at the ends or past an invalid cell)."""
+    from maximal_pipeline import cell_classes
+
+    classes = cell_classes(base) or []
+    out = [-1] * len(base)
+    # classes[i - 1] is the class of cell i; the last cell stays -1
+    for i in range(1, len(base) - 1):
+        if i - 1 < len(classes):
+            out[i] = CLASS_INDEX[classes[i - 1]]
+    return out
+
+
+def label(ns: Iterable[int], rules: Sequence[int] = WEIGHT4_RULES,
+          bases: Optional[Iterable[Sequence[int]]] = None,
+          positions: str = "middle", boundary: str = "null") -> LabelTable:
+    """
+    Maximality of every single-cell replacement.
+
+    Args:
+        ns: Cell counts whose maximal 90/150 masks are the bases (ignored when
+            bases is given)
+        rules: Rules to put into each cell (default all 70 of weight 4)
+        bases: Explicit base vectors instead of the maximal masks
+        positions: "middle" (cells 1..n-2, as ca_nonlinear) or "all"
+    """
+    if bases is None:
+        bases = [mask for n in ns for mask in enumerate_maximal(n)]
+    bases = [list(b) for b in bases]
+    cols = {name: [] for name in LabelTable.COLUMNS}
+    for b, base in enumerate(bases):
+        n = len(base)
+        sweep = ReplacementSweep(base, boundary)
+        classes = _base_classes(base)
+        cells = range(1, n - 1) if positions == "middle" else range(n)
+        for i, rule, ok in sweep.single_replacements(cells, rules):
+            cols["base"].append(b)
+            cols["n"].append(n)
+            cols["position"].append(i)
+            cols["rule"].append(rule)
+            cols["cell_class"].append(classes[i])
+            cols["left"].append(base[i - 1] if i else -1)
+            cols["right"].append(base[i + 1] if i + 1 < n else -1)
+            cols["maximal"].append(ok)
+        sweep.clear_cache()
+    dtypes = {"base": np.int32, "n": np.int16, "position": np.int16, "rule": np.uint8,
+              "cell_class": np.int8, "left": np.int16, "right": np.int16, "maximal": bool}
+    return LabelTable(bases, {k: np.array(v, dtype=dtypes[k]) for k, v in cols.items()})
+
+
+# ---------------------------------------------------------------------------
+# Criteria
+# ---------------------------------------------------------------------------
+
+def has(k: int) -> Criterion:
+    return lambda t: t.has(k)
+
+
+def weight(w: int) -> Criterion:
+    return lambda t: t.weight == w
+
+
+def set_criterion(predicate: Callable[[int, List[int]], object]) -> Criterion:
+    """
+    Lift predicate(rule, neighbourhoods) -> bool or (bool, reason) to a
+    criterion, evaluating it once per distinct rule.
+    """
+    def criterion(t: LabelTable) -> np.ndarray:
+        lookup = np.zeros(256, dtype=bool)
+        for rule in np.unique(t.rule).tolist():
+            result = predicate(rule, [k for k in range(8) if (rule >> k) & 1])
+            lookup[rule] = bool(result[0] if isinstance(result, tuple) else result)
+        return lookup[t.rule]
+    return criterion
+
+
+class Evaluation(NamedTuple):
+    name: str
+    cases: int
+    accuracy: float
+    true_pos: int
+    false_pos: int
+    false_neg: int
+    true_neg: int
+    counterexamples: List[Dict]
+
+
+def evaluate(table: LabelTable, criteria: Dict[str, Criterion],
+             where: Optional[np.ndarray] = None, examples: int = 5) -> List[Evaluation]:
+    """
+    Score each criterion as a predictor of maximality.
+
+    Args:
+        where: Boolean row filter (e.g. table.cell_class == CLASS_II)
+        examples: Counterexamples kept per criterion (false positives first)
+    """
+    keep = np.ones(len(table), dtype=bool) if where is None else np.asarray(where, dtype=bool)
+    actual = table.maximal[keep]
+    rows = np.flatnonzero(keep)
+    out = []
+    for name, criterion in criteria.items():
+        predicted = np.asarray(criterion(table), dtype=bool)[keep]
+        fp = rows[predicted & ~actual]
+        fn = rows[~predicted & actual]
+        tp = int(np.count_nonzero(predicted & actual))
+        tn = int(np.count_nonzero(~predicted & ~actual))
+        cases = len(actual)
+        wrong = np.concatenate((fp, fn))[:examples]
+        out.append(Evaluation(name, cases, (tp + tn) / cases if cases else float("nan"),
+                              tp, len(fp), len(fn), tn, [table.row(int(i)) for i in wrong]))
+    return out
+
+
+def format_report(evaluations: Sequence[Evaluation]) -> str:
+    lines = [f"{'criterion':<24} {'cases':>7} {'accuracy':>9} {'TP':>6} {'FP':>6} {'FN':>6} {'TN':>6}"]
+    for e in evaluations:
+        lines.append(f"{e.name:<24} {e.cases:>7} {e.accuracy:>9.3f} {e.true_pos:>6} "
+                     f"{e.false_pos:>6} {e.false_neg:>6} {e.true_neg:>6}")
+        for c in e.counterexamples[:2]:
+            kind = "FP" if not c["maximal"] else "FN"
+            lines.append(f"    {kind}: rule {c['rule']} {c['neighbourhoods']} at cell {c['position']} "
+                         f"of {c['rules']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    table = label(range(4, 10))
+    elapsed = time.perf_counter() - start
+    print(f"labelled {len(table)} cases on {len(table.bases)} bases in {elapsed:.1f} s "
+          f"({np.count_nonzero(table.maximal)} maximal)")
+
+    # testing.py's criteria, as vectorized expressions
+    initial = lambda t: (t.weight == 4) & ~(t.has(3) & t.has(4)) & ~t.has(5) & (
+        t.has(0) | t.has(1) | t.has(2) | t.has(6))
+    refined = lambda t: (t.weight == 4) & ~(t.has(3) & t.has(4)) & (
+        ~t.has(5) | t.has(3) | (t.has(0) & t.has(7)))
+    criteria = {"initial pattern": initial, "refined pattern": refined,
+                "in the 5 maximal of 8": set_criterion(lambda r, _: r in (30, 45, 75, 210, 225))}
+
+    class_ii = table.cell_class == CLASS_II
+    eight = np.isin(table.rule, CLASS_II_NONLINEAR)
+    for label_, where in (("the 8 class II rules in class II cells", class_ii & eight),
+                          ("all weight-4 rules in class II cells", class_ii),
+                          ("all weight-4 rules in every middle cell", None)):
+        start = time.perf_counter()
+        report = evaluate(table, criteria, where=where)
+        print(f"\n{label_} ({(time.perf_counter() - start) * 1e3:.0f} ms):")
+        print(format_report(report))
@@ -0,0 +1,128 @@
+"""
+Lightweight instrumentation for the generator hot loops.
+
+Replaces ad-hoc print calls with:
+- a verbosity level (0 = quiet, 1 = banners/progress, 2 = detailed tables)
+- structured events delivered to an optional callback
+- per-phase counters and wall-clock timers, exportable as JSON
+
+Timers are plain perf_counter deltas accumulated into dicts, cheap enough to
+leave enabled for production sweeps.
+
+Usage:
+    instr = Instrumentation(verbosity=0, callback=events.append)
+    gen = EnhancedMaximalRCAGenerator(6, instrumentation=instr)
+    gen.generate_enhanced_rca("I")
+    print(instr.to_json())
+"""
+
+import json
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+
+# Phase names used by the generators
+PHASES = ("candidate_generation", "stepping", "scoring", "bookkeeping")
+
+
+class _PhaseTimer:
+    """Reusable context manager that accumulates time for one phase."""
+    __slots__ = ("instr", "name", "start")
+
+    def __init__(self, instr: "Instrumentation", name: str):
+        self.instr = instr
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.instr.timers[self.name] += time.perf_counter() - self.start
+        self.instr.calls[self.name] += 1
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instrumentation:
+    def __init__(self, verbosity: int = 1,
+                 callback: Optional[Callable[[Dict], None]] = None,
+                 timing: bool = True):
+        """
+        Args:
+            verbosity: 0 = silent, 1 = banners and progress, 2 = detailed
+            callback: Called with one dict per structured event
+            timing: Whether phase() records timings (False = no-op timers)
+        """
+        self.verbosity = verbosity
+        self.callback = callback
+        self.timing = timing
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._phase_timers: Dict[str, _PhaseTimer] = {}
+
+    def log(self, level: int, message: str):
+        """Print message if verbosity is at least level."""
+        if self.verbosity >= level:
+            print(message)
+
+    def event(self, kind: str, **data):
+        """Count an event and forward it to the callback, if any."""
+        self.counters[f"event.{kind}"] += 1
+        if self.callback is not None:
+            data["event"] = kind
+            self.callback(data)
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def phase(self, name: str):
+        """
+        Context manager timing one phase. Timers are reused per name, so a
+        phase must not be nested inside itself.
+        """
+        if not self.timing:
+            return _NULL_TIMER
+        timer = self._phase_timers.get(name)
+        if timer is None:
+            timer = self._phase_timers[name] = _PhaseTimer(self, name)
+        return timer
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+        self.calls.clear()
+
+    def snapshot(self) -> Dict:
+        """Counters and per-phase totals as a plain dict."""
+        phases = {
+            name: {
+                "seconds": self.timers[name],
+                "calls": self.calls[name],
+                "mean_us": 1e6 * self.timers[name] / self.calls[name] if self.calls[name] else 0.0,
+            }
+            for name in self.timers
+        }
+        return {"counters": dict(self.counters), "phases": phases}
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Serialize snapshot() as JSON, optionally writing it to path."""
+        text = json.dumps(self.snapshot(), indent=2, sort_keys=True)
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
@@ -0,0 +1,169 @@
+"""
+Backward stepping for reversible rule vectors.
+
+compile_inverse derives the inverse map of a reversible per-cell rule vector
+once, after which each backward step costs about as much as a forward one:
+- linear vectors (90/150 and other XOR rules) get the GF(2) inverse matrix,
+  so a backward step is one matrix-vector product on the packed state;
+- other vectors get per-cell reconstruction tables. The predecessor is
+  rebuilt left to right: the tables list, for every 2r-bit window and target
+  output bit, which next bits keep the cell's output consistent, and the
+  single surviving path is read back at the end.
+
+Usage:
+    inv = compile_inverse([90, 150, 150, 90], boundary="null")
+    prev = inv.step(state)
+"""
+
+import itertools
+from typing import Dict, List, Sequence, Tuple
+
+import gf2
+from reversibility import compile_rule_vector, is_reversible_compiled, step_state
+
+
+class LinearInverse:
+    """Inverse of a linear rule vector as a GF(2) matrix."""
+
+    def __init__(self, matrix: gf2.Matrix):
+        self.n = len(matrix)
+        self.matrix = matrix
+
+    def step_int(self, x: int) -> int:
+        return gf2.apply(self.matrix, x)
+
+    def step(self, state: Sequence[int]) -> List[int]:
+        return gf2.unpack(gf2.apply(self.matrix, gf2.pack(state)), self.n)
+
+
+class ReconstructionInverse:
+    """Inverse of a non-linear rule vector via left-to-right reconstruction."""
+
+    def __init__(self, radius: int, tables: List[Tuple[int, ...]], boundary: str):
+        self.n = len(tables)
+        self.radius = radius
+        self.boundary = boundary
+        W = 2 * radius
+        window_mask = (1 << W) - 1
+        # succ[i][y][window] -> ((bit, next_window), ...) keeping cell i's output at y
+        self.succ = []
+        for table in tables:
+            by_output = ([], [])
+            for w in range(1 << W):
+                for y in (0, 1):
+                    by_output[y].append(tuple(
+                        (b, ((w << 1) | b) & window_mask)
+                        for b in (0, 1) if table[(w << 1) | b] == y))
+            self.succ.append(by_output)
+        # Rings shorter than 2r wrap onto themselves; just tabulate them
+        self._lookup: Dict[Tuple[int, ...], List[int]] = {}
+        if boundary == "periodic" and self.n < W:
+            for bits in itertools.product((0, 1), repeat=self.n):
+                self._lookup[tuple(step_state(bits, radius, tables, boundary))] = list(bits)
+
+    def step_int(self, x: int) -> int:
+        return gf2.pack(self.step(gf2.unpack(x, self.n)))
+
+    def step(self, state: Sequence[int]) -> List[int]:
+        if self._lookup:
+            return list(self._lookup[tuple(state)])
+        if self.boundary == "null":
+            return self._step_null(state)
+        return self._step_periodic(state)
+
+    @staticmethod
+    def _backtrack(layers, key):
+        bits = []
+        for layer in reversed(layers):
+            key, b = layer[key]
+            bits.append(b)
+        bits.reverse()
+        return key, bits
+
+    def _step_null(self, state: Sequence[int]) -> List[int]:
+        n, r = self.n, self.radius
+        # Windows start as r boundary zeros followed by cells 0..r-1
+        frontier = range(1 << r)
+        layers = []
+        for c in range(n):
+            rows = self.succ[c][state[c]]
+            at_boundary = c + r >= n          # next bit is past the right edge
+            nxt = {}
+            for w in frontier:
+                for b, w2 in rows[w]:
+                    if at_boundary and b:
+                        continue
+                    if w2 not in nxt:
+                        nxt[w2] = (w, b)
+            layers.append(nxt)
+            frontier = nxt
+        (end,) = frontier
+        start, bits = self._backtrack(layers, end)
+        # bits[c] is cell c + r; the first r cells come from the start window
+        return [(start >> (r - 1 - k)) & 1 for k in range(r)] + bits[:n - r]
+
+    def _step_periodic(self, state: Sequence[int]) -> List[int]:
+        n, r = self.n, self.radius
+        W = 2 * r
+        # Keys are (guessed first 2r cells, current window); the prefix is fed
+        # back in at the end to close the ring.
+        frontier = [(p, p) for p in range(1 << W)]
+        layers = []
+        for c in range(r, n + r):
+            cell = c % n
+            rows = self.succ[cell][state[cell]]
+            wrap = c >= n - r
+            nxt = {}
+            for key in frontier:
+                prefix, w = key
+                forced = (prefix >> (W - 1 - (c - n + r))) & 1 if wrap else None
+                for b, w2 in rows[w]:
+                    if forced is not None and b != forced:
+                        continue
+                    key2 = (prefix, w2)
+                    if key2 not in nxt:
+                        nxt[key2] = (key, b)
+            layers.append(nxt)
+            frontier = nxt
+        (end,) = frontier
+        prefix = end[0]
+        _, bits = self._backtrack(layers, end)
+        return [(prefix >> (W - 1 - k)) & 1 for k in range(W)] + bits[:n - W]
+
+
+def compile_inverse(rules: Sequence[int], boundary: str = "null"):
+    """
+    Compile the backward step of a reversible rule vector.
+
+    Args:
+        rules: Rule number per cell (anything NonLinearRuleEngine compiles)
+        boundary: "null" or "periodic"
+
+    Returns:
+        LinearInverse or ReconstructionInverse; both expose step(state) on
+        0/1 lists and step_int(x) on packed ints
+
+    Raises:
+        ValueError: if the vector is not reversible
+    """
+    radius, tables = compile_rule_vector(rules)
+    if not is_reversible_compiled(radius, tables, boundary):
+        raise ValueError(f"Rule vector {list(rules)} is not reversible ({boundary} boundary)")
+    if gf2.is_linear_vector(tables):
+        return LinearInverse(gf2.inverse(gf2.rule_vector_matrix(radius, tables, boundary)))
+    return ReconstructionInverse(radius, tables, boundary)
+
+
+if __name__ == "__main__":
+    import random
+
+    random.seed(0)
+    for rules, boundary in [([90, 150, 150, 90, 150, 90], "null"),
+                            ([150] * 7, "periodic"),
+                            ([19, 90, 90, 51, 90, 90, 156, 51], "null")]:
+        inv = compile_inverse(rules, boundary)
+        radius, tables = compile_rule_vector(rules)
+        state = [random.randint(0, 1) for _ in rules]
+        prev = inv.step(state)
+        ok = step_state(prev, radius, tables, boundary) == state
+        print(f"{type(inv).__name__:<22} {boundary:<9} {rules}: {state} <- {prev} ({'ok' if ok else 'MISMATCH'})")
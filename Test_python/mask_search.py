@@ -0,0 +1,221 @@
+"""
+Exhaustive and local search over null-boundary 90/150 masks.
+
+The characteristic polynomial of a mask is the continuant of its diagonal
+(see synthesis.py). Writing P_i for the continuant of cells 0..i-1 and S_j
+for that of cells j..n-1, expanding the determinant along cell i gives
+
+    f = (x + d_i) P_i S_{i+1} + P_{i-1} S_{i+1} + P_i S_{i+2}
+
+so flipping d_i between 90 and 150 changes f by exactly P_i * S_{i+1}.
+MaskWalker keeps both continuant tables and recomputes only the entries a
+flip invalidates, lazily, when a later flip needs them. Walking all masks in
+Gray-code order with the fastest-changing bit on the right end makes each
+step cost O(1) continuant updates on average plus one polynomial product.
+
+A mask and its mirror image have the same polynomial, so the exhaustive
+walk tests only the smaller of each pair. Candidates go through cheap
+filters (f(0) = 1, f(1) = 1, x^(2^n) = x mod f) before the full primitivity
+test; the last one fails for every reducible f with a factor whose degree
+does not divide n.
+
+Usage:
+    count_maximal(16)                   # 4096, all masks walked
+    expected_maximal_count(16)          # 4096, from phi(2^n - 1)
+    mask = local_search(200)            # random single-flip walk
+"""
+
+import random
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from gf2poly import Modulus, factor_mersenne, is_primitive, poly_mul
+
+
+def _times_linear(d: int, p: int) -> int:
+    """(x + d) * p."""
+    return (p << 1) ^ p if d else p << 1
+
+
+class MaskWalker:
+    """A 90/150 mask whose characteristic polynomial is updated in place on each flip."""
+
+    def __init__(self, mask: Sequence[int]):
+        for rule in mask:
+            if rule not in (90, 150):
+                raise ValueError("Mask must contain only 90 or 150")
+        self.n = n = len(mask)
+        self.d = [1 if rule == 150 else 0 for rule in mask]
+        # The mask as an int (cell 0 most significant) and its mirror image
+        self.bits = sum(d << (n - 1 - i) for i, d in enumerate(self.d))
+        self.mirror_bits = sum(d << i for i, d in enumerate(self.d))
+        # prefix[i] = P_i, valid for i <= self._prefix_valid
+        self.prefix = [1] + [0] * n
+        self._prefix_valid = 0
+        # suffix[j] = S_j, valid for j >= self._suffix_valid
+        self.suffix = [0] * n + [1]
+        self._suffix_valid = n
+        self.poly = self._prefix_upto(n)
+
+    @property
+    def mask(self) -> List[int]:
+        return [150 if d else 90 for d in self.d]
+
+    def _prefix_upto(self, i: int) -> int:
+        P, d = self.prefix, self.d
+        for j in range(self._prefix_valid, i):
+            P[j + 1] = _times_linear(d[j], P[j]) ^ (P[j - 1] if j else 0)
+        self._prefix_valid = max(self._prefix_valid, i)
+        return P[i]
+
+    def _suffix_from(self, j: int) -> int:
+        S, d, n = self.suffix, self.d, self.n
+        for k in range(self._suffix_valid - 1, j - 1, -1):
+            S[k] = _times_linear(d[k], S[k + 1]) ^ (S[k + 2] if k + 2 <= n else 0)
+        self._suffix_valid = min(self._suffix_valid, j)
+        return S[j]
+
+    def flip(self, i: int) -> int:
+        """Toggle cell i between 90 and 150 and return the new polynomial."""
+        self.poly ^= poly_mul(self._prefix_upto(i), self._suffix_from(i + 1))
+        self.d[i] ^= 1
+        self.bits ^= 1 << (self.n - 1 - i)
+        self.mirror_bits ^= 1 << i
+        self._prefix_valid = min(self._prefix_valid, i)
+        self._suffix_valid = max(self._suffix_valid, i + 1)
+        return self.poly
+
+
+# ---------------------------------------------------------------------------
+# Filters
+# ---------------------------------------------------------------------------
+
+def passes_cheap_filters(f: int, n: int) -> bool:
+    """Necessary conditions for a degree-n f to be primitive."""
+    if not f & 1 or not f.bit_count() & 1:
+        return n == 1
+    return Modulus(f).frobenius(0b10, n) == 0b10
+
+
+def is_maximal_poly(f: int, n: int, allow_probable: bool = True) -> bool:
+    return passes_cheap_filters(f, n) and is_primitive(f, allow_probable)
+
+
+# ---------------------------------------------------------------------------
+# Exhaustive search
+# ---------------------------------------------------------------------------
+
+def gray_walk(n: int) -> Iterator[MaskWalker]:
+    """
+    Visit all 2^n masks of n cells in Gray-code order.
+
+    Yields the same walker each time; copy walker.mask to keep a mask.
+    Cell n-1 flips every other step, cell 0 once.
+    """
+    walker = MaskWalker([90] * n)
+    yield walker
+    for t in range(1, 1 << n):
+        walker.flip(n - 1 - ((t & -t).bit_length() - 1))
+        yield walker
+
+
+def _canonical_walk(n: int) -> Iterator[MaskWalker]:
+    """gray_walk restricted to masks no larger than their mirror image."""
+    for walker in gray_walk(n):
+        if walker.bits <= walker.mirror_bits:
+            yield walker
+
+
+def enumerate_maximal(n: int, allow_probable: bool = True) -> Iterator[List[int]]:
+    """All null-boundary 90/150 masks of n cells with a maximal cycle."""
+    for walker in _canonical_walk(n):
+        if is_maximal_poly(walker.poly, n, allow_probable):
+            mask = walker.mask
+            yield mask
+            if walker.bits != walker.mirror_bits:
+                yield mask[::-1]
+
+
+def count_maximal(n: int, allow_probable: bool = True) -> int:
+    """Number of maximal masks of n cells, by walking half of all 2^n masks."""
+    count = 0
+    for walker in _canonical_walk(n):
+        if is_maximal_poly(walker.poly, n, allow_probable):
+            count += 1 if walker.bits == walker.mirror_bits else 2
+    return count
+
+
+def expected_maximal_count(n: int) -> Optional[int]:
+    """
+    2 * phi(2^n - 1) / n: each irreducible polynomial of degree n >= 2 is the
+    characteristic polynomial of exactly two 90/150 masks, mirror images of
+    each other. None if 2^n - 1 is not fully factored.
+    """
+    if n == 1:
+        return 1
+    primes, unfactored = factor_mersenne(n)
+    if unfactored:
+        return None
+    phi = (1 << n) - 1
+    for p in primes:
+        phi = phi // p * (p - 1)
+    return 2 * phi // n
+
+
+# ---------------------------------------------------------------------------
+# Local search
+# ---------------------------------------------------------------------------
+
+def maximal_neighbours(mask: Sequence[int], allow_probable: bool = True) -> List[int]:
+    """Cells whose single flip turns mask into a maximal one."""
+    walker = MaskWalker(mask)
+    n = walker.n
+    out = []
+    for i in range(n):
+        if is_maximal_poly(walker.flip(i), n, allow_probable):
+            out.append(i)
+        walker.flip(i)
+    return out
+
+
+def local_search(n: int, max_flips: int = 1_000_000, seed: Optional[int] = None,
+                 start: Optional[Sequence[int]] = None,
+                 allow_probable: bool = True) -> Tuple[List[int], int]:
+    """
+    Random single-flip walk until the mask is maximal.
+
+    About one mask in n is maximal, so the walk ends after O(n) flips.
+
+    Returns:
+        (mask, flips taken)
+
+    Raises:
+        RuntimeError: if max_flips run out
+    """
+    rng = random.Random(seed)
+    walker = MaskWalker(start if start is not None else [rng.choice((90, 150)) for _ in range(n)])
+    for flips in range(max_flips + 1):
+        if is_maximal_poly(walker.poly, n, allow_probable):
+            return walker.mask, flips
+        walker.flip(rng.randrange(n))
+    raise RuntimeError(f"No maximal mask of {n} cells within {max_flips} flips")
+
+
+if __name__ == "__main__":
+    import time
+
+    from synthesis import mask_to_poly
+
+    for n in range(2, 21):
+        start = time.perf_counter()
+        count = count_maximal(n)
+        elapsed = time.perf_counter() - start
+        expected = expected_maximal_count(n)
+        print(f"n={n:<3} maximal masks {count:>7} (expected {expected}) "
+              f"in {elapsed:.2f} s, {(1 << n) / elapsed / 1e3:.0f}k masks/s")
+
+    for n in [64, 256]:
+        start = time.perf_counter()
+        mask, flips = local_search(n, seed=n)
+        elapsed = time.perf_counter() - start
+        assert is_primitive(mask_to_poly(mask))
+        print(f"n={n:<3} local search: maximal mask after {flips} flips in {elapsed * 1e3:.0f} ms")
@@ -0,0 +1,257 @@
+"""
+In-process catalogue of maximal null-boundary rule vectors.
+
+Replaces the C chain CheckCA_ALLcombinations -> CA_filter -> ca_nonlinear:
+
+  1. base:    maximal 90/150 masks of n cells (mask_search, by primitivity)
+  2. filter:  class sequence from the classRules automaton; masks with a
+              middle cell in class II or V go on
+  3. replace: every class II / V cell gets each rule of NONLINEAR_CLASS_II /
+              NONLINEAR_CLASS_V, as ca_nonlinear does; a candidate must be
+              class-valid (optional) and have a single cycle through 2^n - 1
+              states (incremental successor tables from replacement_sweep,
+              then one orbit walk)
+
+Under a null boundary the first cell never sees a left neighbour and the last
+never sees a right one, so the class automaton is run on the vector with
+R_0 & 0x0F and R_n-1 & 0x55 (the same reduction CA_filter applies to R_0).
+
+Each (n, base mask) is one work unit. Units run on a process pool, their hits
+are appended to out_dir/maximal_N<n>.jsonl as they finish, and the unit is
+then logged to out_dir/progress.jsonl, so a rerun skips finished units.
+With --db, every candidate is looked up in that results store first and
+only unknown ones get the cycle check; new verdicts are recorded there.
+
+Usage:
+    python maximal_pipeline.py 4 20 --out catalogue --workers 8
+    python maximal_pipeline.py 4 12 --db results.sqlite
+    rows = load_catalogue("catalogue", 6)
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from bitslice import BitSlicedCA
+from class_automaton import ClassAutomaton
+from mask_search import enumerate_maximal
+from replacement_sweep import ReplacementSweep, has_maximal_cycle
+from results_store import ResultsStore
+from reversibility import compile_rule_vector, is_reversible_compiled
+
+# Replacement rules per class, as in ca_nonlinear.c
+NONLINEAR_CLASS_II = [30, 45, 75, 120, 135, 180, 210, 225]
+NONLINEAR_CLASS_V = [51, 204, 85, 170, 102, 153, 86, 89, 101, 106, 149, 154, 166, 169]
+REPLACEMENTS = {"II": NONLINEAR_CLASS_II, "V": NONLINEAR_CLASS_V}
+
+_automaton = ClassAutomaton()
+
+
+def null_boundary_reduced(rules: Sequence[int]) -> List[int]:
+    """Rules with the bits a null boundary can never select cleared."""
+    reduced = list(rules)
+    reduced[0] &= 0x0F
+    reduced[-1] &= 0x55
+    return reduced
+
+
+def cell_classes(rules: Sequence[int]) -> Optional[List[str]]:
+    """Class of cells 1..n-1 under a null boundary, or None if not class-valid."""
+    return _automaton.classes_of(null_boundary_reduced(rules))
+
+
+def replaceable_positions(rules: Sequence[int]) -> List[Tuple[int, str]]:
+    """Middle cells in class II or V (CA_filter's criterion), with their class."""
+    classes = cell_classes(rules)
+    if classes is None:
+        return []
+    # classes[i - 1] is the class of cell i; the last cell is "don't care"
+    return [(i, classes[i - 1]) for i in range(1, len(rules) - 1) if classes[i - 1] in REPLACEMENTS]
+
+
+def is_maximal(rules: Sequence[int], boundary: str = "null", store: ResultsStore = None) -> bool:
+    """
+    True if the global map is a bijection with a cycle through 2^n - 1 states.
+
+    With a store, a stored verdict answers first and a new one is saved.
+    """
+    if store is not None:
+        return store.is_maximal(rules, boundary)
+    radius, tables = compile_rule_vector(rules)
+    if not is_reversible_compiled(radius, tables, boundary):
+        return False
+    return has_maximal_cycle(BitSlicedCA(tables, radius, boundary).successors())
+
+
+def candidates(base: Sequence[int], require_valid: bool = True) -> Iterator[List[int]]:
+    """Non-linear variants of a base mask, replacing all class II / V cells at once."""
+    positions = replaceable_positions(base)
+    if not positions:
+        return
+    choices = [REPLACEMENTS[cls] for _, cls in positions]
+    for combo in itertools.product(*choices):
+        rules = list(base)
+        for (i, _), rule in zip(positions, combo):
+            rules[i] = rule
+        if require_valid and cell_classes(rules) is None:
+            continue
+        yield rules
+
+
+def run_unit(unit: Dict) -> Dict:
+    """
+    Test every candidate of one base mask; returns the unit with its hits.
+
+    Candidates share the base's successor table and differ from it only in
+    the replaced cells, so they go through ReplacementSweep; its cycle check
+    also rejects non-bijective maps, standing in for the reversibility test.
+    With unit["db"] set, a candidate whose maximality is already in that
+    results store skips the cycle check, and the candidates that failed it
+    are returned as "misses" for the caller to record.
+    """
+    base = unit["base"]
+    start = time.perf_counter()
+    store = ResultsStore(unit["db"]) if unit.get("db") else None
+    hits, misses, tested, known = [], [], 0, 0
+    positions = replaceable_positions(base)
+    if positions:
+        sweep = ReplacementSweep(base)
+        choices = [(i, REPLACEMENTS[cls]) for i, cls in positions]
+        for rules, succ in sweep.product(choices):
+            if unit["require_valid"] and cell_classes(rules) is None:
+                continue
+            tested += 1
+            found = store.lookup(rules, "null") if store is not None else None
+            if found is not None and found.maximal is not None:
+                known += 1
+                maximal = found.maximal
+            else:
+                maximal = has_maximal_cycle(succ)
+                if not maximal and store is not None:
+                    misses.append(rules)
+            if maximal:
+                hits.append(rules)
+    if store is not None:
+        store.close()
+    out = dict(unit)
+    out.update(hits=hits, misses=misses, tested=tested, known=known,
+               elapsed_s=time.perf_counter() - start)
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Catalogue files
+# ---------------------------------------------------------------------------
+
+def _catalogue_path(out_dir: str, n: int) -> str:
+    return os.path.join(out_dir, f"maximal_N{n}.jsonl")
+
+
+def _progress_path(out_dir: str) -> str:
+    return os.path.join(out_dir, "progress.jsonl")
+
+
+def load_progress(out_dir: str) -> Set[Tuple[int, int]]:
+    """(n, unit index) of every finished unit."""
+    path = _progress_path(out_dir)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {(row["n"], row["unit"]) for row in map(json.loads, f) if row}
+
+
+def load_catalogue(out_dir: str, n: int) -> List[Dict]:
+    """Rows of maximal_N<n>.jsonl, de-duplicated (a crash can repeat a unit's rows)."""
+    path = _catalogue_path(out_dir, n)
+    if not os.path.exists(path):
+        return []
+    seen, rows = set(), []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            key = tuple(row["rules"])
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+    return rows
+
+
+def run_pipeline(ns: Sequence[int], out_dir: str, max_workers: Optional[int] = None,
+                 require_valid: bool = True, verbose: bool = True,
+                 store: ResultsStore = None) -> Dict[int, int]:
+    """
+    Build or resume the catalogue for every n in ns.
+
+    With a store, workers look each candidate up before checking its cycle,
+    and every new verdict (hits and misses) is recorded in it. A ":memory:"
+    store cannot be shared with the workers, so it is only written to.
+
+    Returns:
+        Hits written per n in this call (base masks included)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = load_progress(out_dir)
+    db = store.path if store is not None and store.path != ":memory:" else None
+    written = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool, \
+            open(_progress_path(out_dir), "a") as progress:
+        for n in ns:
+            start = time.perf_counter()
+            bases = list(enumerate_maximal(n))
+            units = [{"n": n, "unit": k, "base": base, "require_valid": require_valid, "db": db}
+                     for k, base in enumerate(bases) if (n, k) not in done]
+            count = tested = known = 0
+            with open(_catalogue_path(out_dir, n), "a") as out:
+                futures = [pool.submit(run_unit, unit) for unit in units]
+                for future in as_completed(futures):
+                    result = future.result()
+                    rows = [{"n": n, "base": result["base"], "rules": result["base"], "linear": True}]
+                    rows += [{"n": n, "base": result["base"], "rules": r, "linear": False}
+                             for r in result["hits"]]
+                    for row in rows:
+                        out.write(json.dumps(row) + "\n")
+                    out.flush()
+                    if store is not None:
+                        for row in rows:
+                            store.record(row["rules"], "null", "maximal_pipeline", max_cycle=(1 << n) - 1,
+                                         reversible=True, maximal=True, commit=False)
+                        for rules in result["misses"]:
+                            store.record(rules, "null", "maximal_pipeline", maximal=False, commit=False)
+                        store.db.commit()
+                    progress.write(json.dumps({"n": n, "unit": result["unit"],
+                                               "tested": result["tested"],
+                                               "hits": len(result["hits"])}) + "\n")
+                    progress.flush()
+                    count += len(rows)
+                    tested += result["tested"]
+                    known += result["known"]
+            written[n] = count
+            if verbose:
+                print(f"N={n:<3} {len(bases)} maximal 90/150 masks, {len(units)} units run, "
+                      f"{tested} non-linear candidates tested ({known} from the store), {count} rows written "
+                      f"in {time.perf_counter() - start:.1f}s")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Catalogue maximal null-boundary rule vectors")
+    parser.add_argument("n_min", type=int)
+    parser.add_argument("n_max", type=int)
+    parser.add_argument("--out", default="catalogue")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--allow-invalid", action="store_true",
+                        help="keep replacements that break the class sequence (as ca_nonlinear does)")
+    parser.add_argument("--db", default=None,
+                        help="results store to consult and record verdicts in (results_store.py)")
+    args = parser.parse_args()
+    store = ResultsStore(args.db) if args.db else None
+    run_pipeline(range(args.n_min, args.n_max + 1), args.out, args.workers,
+                 require_valid=not args.allow_invalid, store=store)
+    if store is not None:
+        store.close()
@@ -0,0 +1,225 @@
+"""
+Incremental successor tables for rule-replacement sweeps.
+
+Cell i of a rule vector contributes one bit to every successor, so the
+successor table over all 2^n states is the XOR of n independent bit planes,
+
+    succ[s] = XOR_i  table_i[window_i(s)] << (n - 1 - i)
+
+Replacing the rule of cell i changes plane i only. ReplacementSweep keeps the
+successor table of a base vector and, per (cell, rule), the delta plane
+(table_new ^ table_base)[window_i] << (n - 1 - i); a candidate's table is the
+base table XORed with the deltas of its replaced cells. Sweeping a product of
+replacements in odometer order changes one cell on most steps, so each
+candidate costs about one XOR over 2^n words before the cycle check.
+
+A vector is maximal when its map has a cycle through 2^n - 1 states and the
+one state left over is a fixed point; has_maximal_cycle() walks that cycle
+and stops at the first repeat, which is early for most rejects.
+
+Usage:
+    sweep = ReplacementSweep([90, 150, 90, 150])
+    hits = [(i, r) for i, r, ok in sweep.single_replacements([1, 2], [30, 45, 75]) if ok]
+    succ = sweep.successors({1: 30, 2: 75})
+    for rules, succ in sweep.product([(1, [30, 45]), (2, [75, 120])]): ...
+"""
+
+import itertools
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from reversibility import BOUNDARIES, compile_rule_vector
+
+
+def has_maximal_cycle(succ: np.ndarray) -> bool:
+    """True if the map succ has a cycle through 2^n - 1 states and fixes the other one."""
+    item = succ.item
+    size = len(succ)
+    target = size - 1
+    # Start off the fixed point, if there is one; the orbit must cover the rest
+    start = 0 if item(0) != 0 else 1
+    x, length, seen = item(start), 1, start
+    while x != start:
+        seen ^= x
+        x = item(x)
+        length += 1
+        if length > target:
+            return False
+    if length != target:
+        return False
+    # The XOR of 0..2^n - 1 is 0 for n >= 2, so the state off the cycle is seen
+    left = seen if size > 2 else 1 - start
+    return item(left) == left
+
+
+class ReplacementSweep:
+    """
+    Successor table of a base rule vector, updated per replaced cell.
+
+    Args:
+        base: Rule number per cell
+        boundary: "null" or "periodic"
+        radius: Neighbourhood radius of the planes (default that of base);
+            replacement rules must not need a larger one
+    """
+
+    def __init__(self, base: Sequence[int], boundary: str = "null", radius: int = None):
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary: {boundary}")
+        self.n = n = len(base)
+        if n > 32:
+            raise ValueError("ReplacementSweep enumerates 2^n states; n must be at most 32")
+        self.base = list(base)
+        self.boundary = boundary
+        base_radius, tables = compile_rule_vector(base)
+        self.radius = base_radius if radius is None else radius
+        if self.radius < base_radius:
+            raise ValueError(f"Base rules need radius {base_radius}")
+        self._tables = [self._table(rule) for rule in base]
+        self._windows: Dict[int, np.ndarray] = {}
+        self._deltas: Dict[Tuple[int, int], np.ndarray] = {}
+
+        self.base_successors = np.zeros(1 << n, dtype=np.int64)
+        for i in range(n):
+            self.base_successors ^= self._plane(i, self._tables[i])
+
+    # -- planes --------------------------------------------------------------
+
+    def _table(self, rule: int) -> np.ndarray:
+        from ca_kernels import widen_table
+
+        radius, (table,) = compile_rule_vector([rule], self.n)
+        if radius > self.radius:
+            raise ValueError(f"Rule {rule} needs radius {radius}, sweep has {self.radius}")
+        return np.array(widen_table(table, radius, self.radius), dtype=np.int64)
+
+    def _window(self, i: int) -> np.ndarray:
+        """Table index of cell i's neighbourhood for every state (cell 0 = MSB)."""
+        w = self._windows.get(i)
+        if w is None:
+            n = self.n
+            states = np.arange(1 << n, dtype=np.int64)
+            w = np.zeros(1 << n, dtype=np.int64)
+            for offset in range(-self.radius, self.radius + 1):
+                j = i + offset
+                if self.boundary == "periodic":
+                    j %= n
+                w <<= 1
+                if 0 <= j < n:
+                    w |= (states >> (n - 1 - j)) & 1
+            w = w.astype(np.uint8 if self.radius <= 3 else np.int64)
+            self._windows[i] = w
+        return w
+
+    def _plane(self, i: int, table: np.ndarray) -> np.ndarray:
+        plane = table[self._window(i)]
+        plane <<= self.n - 1 - i
+        return plane
+
+    def _delta(self, i: int, rule: int) -> np.ndarray:
+        return self._plane(i, self._table(rule) ^ self._tables[i])
+
+    def delta(self, i: int, rule: int) -> np.ndarray:
+        """Successor-table change from giving cell i the rule (cached; do not modify)."""
+        key = (i, rule)
+        d = self._deltas.get(key)
+        if d is None:
+            d = self._deltas[key] = self._delta(i, rule)
+        return d
+
+    def clear_cache(self):
+        """Drop cached windows and the deltas of successors() and product() (8 * 2^n bytes each)."""
+        self._windows.clear()
+        self._deltas.clear()
+
+    # -- candidates ----------------------------------------------------------
+
+    def successors(self, replacements: Dict[int, int] = None) -> np.ndarray:
+        """Successor table of the base with cell i given rule replacements[i]."""
+        succ = self.base_successors.copy()
+        for i, rule in (replacements or {}).items():
+            succ ^= self.delta(i, rule)
+        return succ
+
+    def rules_with(self, replacements: Dict[int, int]) -> List[int]:
+        rules = list(self.base)
+        for i, rule in replacements.items():
+            rules[i] = rule
+        return rules
+
+    def single_replacements(self, positions: Sequence[int],
+                            rules: Sequence[int]) -> Iterator[Tuple[int, int, bool]]:
+        """
+        (position, rule, maximal?) for every single-cell replacement.
+
+        Each delta is used once, so none is cached: memory stays at a few
+        2^n tables however many cells and rules are swept.
+        """
+        succ = np.empty_like(self.base_successors)
+        for i in positions:
+            for rule in rules:
+                np.bitwise_xor(self.base_successors, self._delta(i, rule), out=succ)
+                yield i, rule, has_maximal_cycle(succ)
+
+    def product(self, choices: Sequence[Tuple[int, Sequence[int]]]
+                ) -> Iterator[Tuple[List[int], np.ndarray]]:
+        """
+        Every combination of rules for several cells, in odometer order.
+
+        Args:
+            choices: (position, rules) per replaced cell
+
+        Yields:
+            (rule vector, successor table); the table is updated in place on
+            the next step, so copy it to keep it
+        """
+        if not choices:
+            yield list(self.base), self.base_successors.copy()
+            return
+        positions = [i for i, _ in choices]
+        succ = self.base_successors.copy()
+        current = [None] * len(choices)
+        rules = list(self.base)
+        for combo in itertools.product(*(r for _, r in choices)):
+            for k, rule in enumerate(combo):
+                if rule == current[k]:
+                    continue
+                i = positions[k]
+                if current[k] is not None:
+                    succ ^= self.delta(i, current[k])
+                succ ^= self.delta(i, rule)
+                current[k] = rule
+                rules[i] = rule
+            yield list(rules), succ
+
+
+if __name__ == "__main__":
+    import time
+
+    from bitslice import BitSlicedCA
+
+    base = [90, 150, 90, 150]
+    sweep = ReplacementSweep(base)
+    hits = [sweep.rules_with({i: r}) for i, r, ok in
+            sweep.single_replacements(range(1, 3), [30, 45, 75, 120, 135, 180, 210, 225]) if ok]
+    print(f"{base}: maximal single replacements {hits}")
+
+    # Against a full rebuild of every candidate's table
+    n = 14
+    base = [90, 150] * (n // 2)
+    rules = [30, 45, 75, 120, 135, 180, 210, 225]
+    sweep = ReplacementSweep(base)
+    start = time.perf_counter()
+    for i in range(n):
+        for r in rules:
+            incremental = sweep.successors({i: r})
+    t_inc = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(n):
+        for r in rules:
+            rebuilt = BitSlicedCA.from_rules(sweep.rules_with({i: r})).successors()
+    t_full = time.perf_counter() - start
+    assert np.array_equal(incremental, rebuilt)
+    print(f"n={n}: {n * len(rules)} single replacements, incremental {t_inc * 1e3:.0f} ms, "
+          f"rebuilt {t_full * 1e3:.0f} ms")
@@ -0,0 +1,416 @@
+"""
+Persistent store of maximality verdicts, keyed by canonical rule vector.
+
+Cycle spectra, maximal cycle lengths and reversibility used to live in the C
+tools' text reports and in throwaway dicts; this keeps them in one SQLite
+file so a question already answered is a lookup. Rows are keyed by the
+orbit representative under symmetry.py (the mirror for a null boundary,
+mirror and complement for periodic), since every member has the same state
+graph, and every member vector is indexed by its cells so queries like
+"rule 30 at cell 1 of N=6" find mirrored entries too.
+
+    verdicts   one row per (canonical rules, boundary): n, family, number of
+               non-linear cells, max cycle, spectrum (JSON {length: count}),
+               reversible, maximal, source. Fields a source does not report
+               stay NULL (the C reports give the longest cycle only).
+    members    every orbit member of a verdict
+    cells      (member, position, rule), indexed by (rule, position)
+
+A rule counts as linear when its algebraic normal form has degree at most 1
+(90, 150, 60, 102, their complements, ...); a vector's family is "linear"
+when all its rules are, "nonlinear" otherwise.
+
+maximal always means reversible with a cycle through 2^n - 1 states, as in
+compute_verdict. The C tools check the cycle length only, so an imported
+cycle of 2^n - 1 sets maximal for linear vectors (a linear map that cycles
+through every non-zero state fixes 0 and is bijective) and leaves it NULL
+for non-linear ones until resolve() computes their verdicts; a shorter
+cycle sets maximal to false.
+
+Usage:
+    store = ResultsStore("results.sqlite")
+    store.import_ca_output("../Test_C/ca_output.txt")
+    store.import_nonlinear("../Test_C/Non_linear_maximal_len.txt")
+    v = store.verdict([90, 30, 90, 150])           # computed once, then read back
+    store.resolve()                                # verdicts for imported non-linear rows
+    store.query(n=6, family="nonlinear", maximal=True, cells={1: 30})
+"""
+
+import json
+import os
+import re
+import sqlite3
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bitslice import BitSlicedCA, anf
+from symmetry import orbit
+
+BOUNDARIES = ("null", "periodic")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    id INTEGER PRIMARY KEY,
+    rules TEXT NOT NULL,
+    boundary TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    family TEXT NOT NULL,
+    nonlinear_cells INTEGER NOT NULL,
+    max_cycle INTEGER,
+    spectrum TEXT,
+    reversible INTEGER,
+    maximal INTEGER,
+    source TEXT,
+    UNIQUE (rules, boundary)
+);
+CREATE INDEX IF NOT EXISTS verdicts_n ON verdicts (n, boundary, maximal);
+CREATE INDEX IF NOT EXISTS verdicts_family ON verdicts (family, n);
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY,
+    verdict_id INTEGER NOT NULL REFERENCES verdicts (id),
+    rules TEXT NOT NULL,
+    UNIQUE (verdict_id, rules)
+);
+CREATE TABLE IF NOT EXISTS cells (
+    member_id INTEGER NOT NULL REFERENCES members (id),
+    position INTEGER NOT NULL,
+    rule INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cells_rule ON cells (rule, position);
+"""
+
+
+class Verdict(NamedTuple):
+    rules: List[int]
+    boundary: str
+    n: int
+    family: str
+    max_cycle: Optional[int]
+    spectrum: Optional[Dict[int, int]]
+    reversible: Optional[bool]
+    maximal: Optional[bool]
+    source: Optional[str]
+
+
+def _key(rules: Sequence[int]) -> str:
+    return ",".join(map(str, rules))
+
+
+def _unkey(text: str) -> List[int]:
+    return [int(r) for r in text.split(",")]
+
+
+@lru_cache(maxsize=None)
+def is_linear_rule(rule: int) -> bool:
+    """ANF of degree at most 1 (elementary rules only; others count as non-linear)."""
+    if not 0 <= rule <= 255:
+        return False
+    return all(bin(m).count("1") <= 1 for m, c in enumerate(anf([(rule >> i) & 1 for i in range(8)])) if c)
+
+
+def _orbit(rules: Sequence[int], boundary: str) -> List[tuple]:
+    try:
+        return orbit(rules, boundary)
+    except ValueError:
+        # Rules outside 0-255 have no symmetry tables; the vector is its own orbit
+        return [tuple(rules)]
+
+
+def cycle_spectrum(succ: np.ndarray) -> Dict[int, int]:
+    """{cycle length: number of cycles} of the map state -> succ[state]."""
+    succ = succ.tolist()
+    mark = bytearray(len(succ))        # 0 unseen, 1 on the current path, 2 done
+    spectrum: Dict[int, int] = {}
+    for start in range(len(succ)):
+        if mark[start]:
+            continue
+        path = []
+        x = start
+        while not mark[x]:
+            mark[x] = 1
+            path.append(x)
+            x = succ[x]
+        if mark[x] == 1:
+            length = len(path) - path.index(x)
+            spectrum[length] = spectrum.get(length, 0) + 1
+        for y in path:
+            mark[y] = 2
+    return spectrum
+
+
+def _imported_flags(rules: Sequence[int], max_cycle: int) -> Dict:
+    """reversible / maximal implied by a reported longest cycle (see the module docstring)."""
+    if max_cycle < (1 << len(rules)) - 1:
+        return {"maximal": False}
+    if all(is_linear_rule(r) for r in rules):
+        return {"reversible": True, "maximal": True}
+    return {}
+
+
+def compute_verdict(rules: Sequence[int], boundary: str = "null") -> Dict:
+    """Spectrum, longest cycle and reversibility from the full successor table."""
+    n = len(rules)
+    succ = BitSlicedCA.from_rules(rules, boundary).successors()
+    spectrum = cycle_spectrum(succ)
+    reversible = bool(np.bincount(succ, minlength=1 << n).max() == 1)
+    max_cycle = max(spectrum)
+    return {"max_cycle": max_cycle, "spectrum": spectrum, "reversible": reversible,
+            "maximal": reversible and max_cycle == (1 << n) - 1}
+
+
+# ---------------------------------------------------------------------------
+# C report parsers
+# ---------------------------------------------------------------------------
+
+def parse_ca_output(lines: Iterable[str]) -> Iterator[Tuple[List[int], str, int]]:
+    """
+    (rules, boundary, max cycle length) per 'Configuration k:' entry of a
+    CheckCA_ALLcombinations summary; the per-configuration state dumps
+    before the summary carry no 'Max cycle length' line and are skipped.
+    """
+    rules = boundary = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith("Rules:"):
+            rules = [int(r) for r in line.split(":", 1)[1].split()]
+        elif line.startswith("Boundary:"):
+            boundary = line.split(":", 1)[1].strip().lower()
+        elif line.startswith("Max cycle length:") and rules:
+            yield rules, boundary or "null", int(line.split(":", 1)[1])
+            rules = boundary = None
+
+
+def parse_nonlinear(lines: Iterable[str]) -> Iterator[Dict]:
+    """{"base": rules, "hits": [rules, ...]} per 'Original config:' block of ca_nonlinear."""
+    block = None
+    found = False
+    for line in lines:
+        line = line.strip()
+        if line.startswith("Original config:"):
+            if block is not None:
+                yield block
+            block = {"base": [int(r) for r in line.split(":", 1)[1].split()], "hits": []}
+            found = False
+        elif line.startswith("Found"):
+            found = True
+        elif found and block is not None and re.fullmatch(r"\d+( \d+)+", line):
+            block["hits"].append([int(r) for r in line.split()])
+        elif line.startswith("="):
+            found = False
+    if block is not None:
+        yield block
+
+
+class ResultsStore:
+    """
+    SQLite file of verdicts.
+
+    Args:
+        path: Database file (created if missing); ":memory:" for a scratch store
+    """
+
+    def __init__(self, path: str = "results.sqlite"):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.db.commit()
+        self.close()
+
+    # -- writing -------------------------------------------------------------
+
+    def record(self, rules: Sequence[int], boundary: str = "null", source: str = "computed",
+               max_cycle: int = None, spectrum: Dict[int, int] = None,
+               reversible: bool = None, maximal: bool = None, commit: bool = True):
+        """
+        Insert or complete the verdict of rules' orbit.
+
+        Known fields are kept; a field is only filled where it is NULL, except
+        that a computed verdict replaces imported ones.
+        """
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Unknown boundary: {boundary}")
+        members = _orbit(rules, boundary)
+        canon = _key(members[0])
+        nonlinear = sum(not is_linear_rule(r) for r in rules)
+        family = "nonlinear" if nonlinear else "linear"
+        values = (max_cycle, None if spectrum is None else json.dumps(sorted(spectrum.items())),
+                  None if reversible is None else int(reversible),
+                  None if maximal is None else int(maximal), source)
+        cur = self.db.cursor()
+        cur.execute("SELECT id FROM verdicts WHERE rules = ? AND boundary = ?", (canon, boundary))
+        row = cur.fetchone()
+        if row is None:
+            cur.execute("INSERT INTO verdicts (rules, boundary, n, family, nonlinear_cells, max_cycle, "
+                        "spectrum, reversible, maximal, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (canon, boundary, len(rules), family, nonlinear) + values)
+            verdict_id = cur.lastrowid
+            for member in members:
+                cur.execute("INSERT INTO members (verdict_id, rules) VALUES (?, ?)", (verdict_id, _key(member)))
+                member_id = cur.lastrowid
+                cur.executemany("INSERT INTO cells (member_id, position, rule) VALUES (?, ?, ?)",
+                                [(member_id, i, r) for i, r in enumerate(member)])
+        elif source == "computed":
+            cur.execute("UPDATE verdicts SET max_cycle = ?, spectrum = ?, reversible = ?, maximal = ?, "
+                        "source = ? WHERE id = ?", values + (row[0],))
+        else:
+            cur.execute("UPDATE verdicts SET max_cycle = COALESCE(max_cycle, ?), "
+                        "spectrum = COALESCE(spectrum, ?), reversible = COALESCE(reversible, ?), "
+                        "maximal = COALESCE(maximal, ?), source = COALESCE(source, ?) WHERE id = ?",
+                        values + (row[0],))
+        if commit:
+            self.db.commit()
+
+    # -- reading -------------------------------------------------------------
+
+    def _row_to_verdict(self, row, rules: Sequence[int] = None) -> Verdict:
+        canon, boundary, n, family, max_cycle, spectrum, reversible, maximal, source = row
+        return Verdict(list(rules) if rules is not None else _unkey(canon), boundary, n, family,
+                       max_cycle,
+                       None if spectrum is None else {int(k): v for k, v in json.loads(spectrum)},
+                       None if reversible is None else bool(reversible),
+                       None if maximal is None else bool(maximal), source)
+
+    def lookup(self, rules: Sequence[int], boundary: str = "null") -> Optional[Verdict]:
+        """Stored verdict of rules' orbit, or None."""
+        canon = _key(_orbit(rules, boundary)[0])
+        row = self.db.execute("SELECT rules, boundary, n, family, max_cycle, spectrum, reversible, "
+                              "maximal, source FROM verdicts WHERE rules = ? AND boundary = ?",
+                              (canon, boundary)).fetchone()
+        return None if row is None else self._row_to_verdict(row, rules)
+
+    def verdict(self, rules: Sequence[int], boundary: str = "null") -> Verdict:
+        """Full verdict, computed and stored on the first request for the orbit."""
+        found = self.lookup(rules, boundary)
+        if found is not None and found.spectrum is not None:
+            return found
+        self.record(rules, boundary, **compute_verdict(rules, boundary))
+        return self.lookup(rules, boundary)
+
+    def is_maximal(self, rules: Sequence[int], boundary: str = "null") -> bool:
+        """Maximality only; imported verdicts answer without computing."""
+        found = self.lookup(rules, boundary)
+        if found is not None and found.maximal is not None:
+            return found.maximal
+        return self.verdict(rules, boundary).maximal
+
+    def query(self, n: int = None, boundary: str = "null", family: str = None,
+              maximal: bool = None, cells: Dict[int, int] = None) -> Iterator[Verdict]:
+        """
+        Stored vectors matching every given filter, one per orbit member.
+
+        Args:
+            cells: {position: rule} the member must have
+        """
+        where, args = ["v.boundary = ?"], [boundary]
+        if n is not None:
+            where.append("v.n = ?")
+            args.append(n)
+        if family is not None:
+            where.append("v.family = ?")
+            args.append(family)
+        if maximal is not None:
+            where.append("v.maximal = ?")
+            args.append(int(maximal))
+        for k, (pos, rule) in enumerate((cells or {}).items()):
+            where.append(f"EXISTS (SELECT 1 FROM cells c{k} WHERE c{k}.member_id = m.id "
+                         f"AND c{k}.rule = ? AND c{k}.position = ?)")
+            args += [rule, pos]
+        sql = ("SELECT m.rules, v.rules, v.boundary, v.n, v.family, v.max_cycle, v.spectrum, "
+               "v.reversible, v.maximal, v.source FROM verdicts v JOIN members m ON m.verdict_id = v.id "
+               "WHERE " + " AND ".join(where) + " ORDER BY v.n, m.rules")
+        for row in self.db.execute(sql, args):
+            yield self._row_to_verdict(row[1:], _unkey(row[0]))
+
+    def count(self, **filters) -> int:
+        return sum(1 for _ in self.query(**filters))
+
+    # -- importers for the C reports and the pipeline catalogue --------------
+
+    def import_ca_output(self, path: str) -> int:
+        """CheckCA_ALLcombinations reports (see parse_ca_output)."""
+        name = os.path.basename(path)
+        count = 0
+        with open(path) as f:
+            for rules, boundary, length in parse_ca_output(f):
+                self.record(rules, boundary, name, max_cycle=length, commit=False,
+                            **_imported_flags(rules, length))
+                count += 1
+        self.db.commit()
+        return count
+
+    def import_nonlinear(self, path: str) -> int:
+        """ca_nonlinear reports: every base and every 'Found' configuration has a (2^n - 1)-cycle (null boundary)."""
+        name = os.path.basename(path)
+        count = 0
+        with open(path) as f:
+            for block in parse_nonlinear(f):
+                for rules in [block["base"]] + block["hits"]:
+                    length = (1 << len(rules)) - 1
+                    self.record(rules, "null", name, max_cycle=length, commit=False,
+                                **_imported_flags(rules, length))
+                    count += 1
+        self.db.commit()
+        return count
+
+    def resolve(self, n: int = None) -> int:
+        """Compute the verdict of every stored orbit whose maximality is unknown; returns how many."""
+        sql = "SELECT rules, boundary FROM verdicts WHERE maximal IS NULL"
+        rows = self.db.execute(sql + ("" if n is None else " AND n = ?"),
+                               () if n is None else (n,)).fetchall()
+        for canon, boundary in rows:
+            self.record(_unkey(canon), boundary, commit=False, **compute_verdict(_unkey(canon), boundary))
+        self.db.commit()
+        return len(rows)
+
+    def import_catalogue(self, out_dir: str, ns: Sequence[int]) -> int:
+        """maximal_N<n>.jsonl files written by maximal_pipeline."""
+        from maximal_pipeline import load_catalogue
+
+        count = 0
+        for n in ns:
+            for row in load_catalogue(out_dir, n):
+                # has_maximal_cycle also checks the fixed point, so these are bijective
+                self.record(row["rules"], "null", "maximal_pipeline", max_cycle=(1 << n) - 1,
+                            reversible=True, maximal=True, commit=False)
+                count += 1
+        self.db.commit()
+        return count
+
+
+if __name__ == "__main__":
+    import time
+
+    from symmetry import mirror
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    c_dir = os.path.join(here, "..", "Test_C")
+    with ResultsStore(":memory:") as store:
+        print("ca_output.txt rows:", store.import_ca_output(os.path.join(c_dir, "ca_output.txt")))
+        print("Non_linear_maximal_len.txt rows:",
+              store.import_nonlinear(os.path.join(c_dir, "Non_linear_maximal_len.txt")))
+        print("non-linear rows confirmed by computing their verdicts:", store.resolve())
+        for n in range(4, 9):
+            print(f"N={n}: {store.count(n=n, maximal=True)} maximal stored, "
+                  f"{store.count(n=n, family='nonlinear', maximal=True)} non-linear")
+        print("rule 30 at cell 1:", [v.rules for v in store.query(cells={1: 30}, maximal=True)][:4])
+
+        rules = [90, 30, 90, 150]
+        start = time.perf_counter()
+        v = store.verdict(rules)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        w = store.verdict(list(mirror(rules)))
+        second = time.perf_counter() - start
+        assert w.spectrum == v.spectrum
+        print(f"{rules}: max cycle {v.max_cycle}, spectrum {v.spectrum}, reversible {v.reversible}; "
+              f"computed in {first * 1e3:.1f} ms, mirror {w.rules} read back in {second * 1e3:.2f} ms")
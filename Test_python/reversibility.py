@@ -0,0 +1,185 @@
+"""
+Reversibility check for per-cell rule vectors.
+
+A configuration (one rule per cell, null or periodic boundary) is reversible
+iff its global map is injective. Instead of enumerating all 2^n states, we
+walk the pair graph: two candidate preimages are built left to right, one bit
+per cell, keeping only the last 2r bits of each (r = neighborhood radius) and
+a flag recording whether they have differed yet. An edge exists when both
+windows give the same output at the cell being completed. The map is
+non-injective iff a path that has diverged reaches the end, so the check is
+linear in n with at most 2 * 4^(2r) live states per cell.
+
+Rules are any rule numbers understood by NonLinearRuleEngine (elementary
+0-255, 90/150, and the deterministic non-linear families).
+
+Usage:
+    is_reversible([90, 150, 90, 150], boundary="null")      # True
+    is_reversible([30] * 8, boundary="periodic")             # False
+"""
+
+import itertools
+from typing import Iterable, List, Sequence, Tuple
+
+from MaximalRCAGeneratorNonLinear import NonLinearRuleEngine
+
+# Only compile_rule is used, which draws no random numbers; the fixed seed
+# keeps the global random stream untouched either way
+_engine = NonLinearRuleEngine(seed=0)
+
+BOUNDARIES = ("null", "periodic")
+
+
+def compile_rule_vector(rules: Sequence[int], n: int = None) -> Tuple[int, List[Tuple[int, ...]]]:
+    """
+    Compile a rule vector to per-cell tables over one shared radius.
+
+    Args:
+        rules: Rule number per cell
+        n: Ring size used to pick each rule's radius (default len(rules))
+
+    Returns:
+        (radius, tables) with every table widened to 2**(2*radius+1) entries
+
+    Raises:
+        ValueError: if a rule breaks ties randomly (no fixed global map)
+    """
+    from ca_kernels import widen_table
+
+    n = len(rules) if n is None else n
+    compiled = [_engine.compile_rule(r, n) for r in rules]
+    for rule, c in zip(rules, compiled):
+        if c.random_mask:
+            raise ValueError(f"Rule {rule} breaks ties randomly and has no fixed global map")
+    radius = max(c.radius for c in compiled)
+    tables = [widen_table(c.table, c.radius, radius) for c in compiled]
+    return radius, tables
+
+
+def step_state(state: Sequence[int], radius: int, tables: List[Tuple[int, ...]],
+               boundary: str = "null") -> List[int]:
+    """One step of a compiled rule vector (list of 0/1 cells)."""
+    n = len(state)
+    new_state = [0] * n
+    for i in range(n):
+        idx = 0
+        for offset in range(-radius, radius + 1):
+            j = i + offset
+            if boundary == "periodic":
+                bit = state[j % n]
+            else:
+                bit = state[j] if 0 <= j < n else 0
+            idx = (idx << 1) | bit
+        new_state[i] = tables[i][idx]
+    return new_state
+
+
+def _is_injective_bruteforce(radius, tables, boundary) -> bool:
+    n = len(tables)
+    images = set()
+    for bits in itertools.product((0, 1), repeat=n):
+        image = tuple(step_state(bits, radius, tables, boundary))
+        if image in images:
+            return False
+        images.add(image)
+    return True
+
+
+def _advance(pairs, table, full_mask, window_mask, bits_a, bits_b):
+    """
+    Extend every pair of windows by one bit each and keep the consistent ones.
+
+    pairs is a set of (window_a, window_b, diverged) tuples; bits_a/bits_b are
+    the allowed next bits (a fixed bit for boundaries and wrap-around).
+    """
+    nxt = set()
+    for a, b, diverged in pairs:
+        for u in bits_a:
+            wa = ((a << 1) | u) & full_mask
+            out = table[wa]
+            for v in bits_b:
+                wb = ((b << 1) | v) & full_mask
+                if table[wb] == out:
+                    nxt.add((wa & window_mask, wb & window_mask, diverged or u != v))
+    return nxt
+
+
+def is_reversible_compiled(radius: int, tables: List[Tuple[int, ...]],
+                           boundary: str = "null") -> bool:
+    """is_reversible for a vector already compiled by compile_rule_vector."""
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unknown boundary: {boundary}")
+    n = len(tables)
+    W = 2 * radius                      # bits of history kept per preimage
+    full_mask = (1 << (W + 1)) - 1
+    window_mask = (1 << W) - 1
+    free = (0, 1)
+
+    if boundary == "null":
+        # Windows start as r boundary zeros followed by the first r free cells
+        pairs = {(u, v, u != v) for u in range(1 << radius) for v in range(1 << radius)}
+        for p in range(W, n + W):
+            cell = p - W
+            bits = free if p - radius < n else (0,)
+            pairs = _advance(pairs, tables[cell], full_mask, window_mask, bits, bits)
+            if not pairs:
+                return True
+        return not any(diverged for _, _, diverged in pairs)
+
+    if n < W:
+        return _is_injective_bruteforce(radius, tables, boundary)
+
+    # Periodic: guess the first 2r cells of both preimages, run to the end,
+    # then wrap around by feeding the guessed prefixes back in.
+    for pa in range(1 << W):
+        for pb in range(1 << W):
+            pairs = {(pa, pb, pa != pb)}
+            for j in range(W, n):
+                pairs = _advance(pairs, tables[j - radius], full_mask, window_mask, free, free)
+                if not pairs:
+                    break
+            for k in range(W):
+                if not pairs:
+                    break
+                ua = ((pa >> (W - 1 - k)) & 1,)
+                ub = ((pb >> (W - 1 - k)) & 1,)
+                pairs = _advance(pairs, tables[(n - radius + k) % n], full_mask, window_mask, ua, ub)
+            if any(diverged for _, _, diverged in pairs):
+                return False
+    return True
+
+
+def is_reversible(rules: Sequence[int], boundary: str = "null") -> bool:
+    """
+    Check whether a per-cell rule vector defines a bijective global map.
+
+    Args:
+        rules: Rule number per cell
+        boundary: "null" (cells outside the array are 0) or "periodic"
+
+    Returns:
+        True if every state has exactly one predecessor
+    """
+    radius, tables = compile_rule_vector(rules)
+    return is_reversible_compiled(radius, tables, boundary)
+
+
+def filter_reversible(configs: Iterable[Sequence[int]], boundary: str = "null"):
+    """Yield only the reversible rule vectors from configs (pre-filter for cycle analysis)."""
+    for rules in configs:
+        if is_reversible(rules, boundary):
+            yield rules
+
+
+if __name__ == "__main__":
+    examples = [
+        ([90, 150, 90, 150], "null"),
+        ([150, 150, 90, 150], "null"),
+        ([90, 30, 90, 150], "null"),
+        ([90] * 6, "null"),
+        ([150] * 6, "periodic"),
+        ([30] * 8, "periodic"),
+        ([204] * 8, "periodic"),
+    ]
+    for rules, boundary in examples:
+        print(f"{str(rules):<32} {boundary:<9} reversible={is_reversible(rules, boundary)}")
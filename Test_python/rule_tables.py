@@ -0,0 +1,284 @@
+"""
+Class tables of the reversible-CA synthesis, as 256-entry NumPy arrays.
+
+Two versions of the tables are in use and they do not agree:
+
+  * classRules.py transcribes Table 2.7 exactly. The next class depends on
+    the current class as well as the rule (rule 90 leads I -> II but
+    III -> III), so it is a (6, 256) array.
+  * The generators (MaximalRCAGenerator, MaximalRCAGeneratorNonLinear) use
+    one class set and one next class per rule. Their set also lists the
+    last-cell rules 5, 17, 20, 65, 68, 80, 196 and differs from Table 2.7a
+    for 85, 105, 150, 165, 170, 195, 201 and 204. The single copy of those
+    dicts now lives here as GENERATOR_RULE_TO_CLASSES and friends, so both
+    generators keep their results.
+
+Class sets are 6-bit masks (bit k = CLASS_NAMES[k]), classes are int8
+indices and -1 means "no such class". The arrays are built once and saved
+to rule_tables.npz beside this file, keyed by a digest of the source
+tables, so later imports only load the file.
+
+Usage:
+    RULE_CLASSES[90]                          # 0b111111, allowed in every class
+    NEXT_CLASS[class_index("III"), 90]        # class_index("III")
+    rules_in(class_mask("II", "V"))           # rules usable in class II or V
+    class_sequences([[5, 150, 90, 20]])       # class of cells 1..n-1 per vector
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from classRules import class_rule_transitions, first_rule_table, last_rule_table
+
+CLASS_NAMES = ("I", "II", "III", "IV", "V", "VI")
+CLASS_INDEX = {name: k for k, name in enumerate(CLASS_NAMES)}
+NO_CLASS = -1
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule_tables.npz")
+
+# ========= Generator tables (one class set and one next class per rule) =========
+# Insertion order is kept: the generators draw candidates in this order.
+GENERATOR_RULE_TO_CLASSES = {
+    15: {"II", "III", "VI"}, 20: {"III"}, 23: {"III"}, 27: {"III"}, 30: {"II"}, 39: {"III"}, 43: {"III"}, 45: {"II"},
+    51: {"I", "III", "V"}, 53: {"I"}, 54: {"I"}, 57: {"I"}, 58: {"I"}, 60: {"I", "II", "IV"}, 65: {"III"}, 68: {"III"},
+    75: {"II"}, 77: {"III"}, 78: {"III"}, 80: {"III"}, 83: {"I"}, 85: {"I", "II", "III", "V"}, 86: {"I", "III", "V"}, 89: {"I", "III", "V"},
+    90: {"I", "II", "III", "IV", "V", "VI"}, 92: {"I"}, 99: {"I"}, 101: {"I", "III", "V"}, 102: {"I", "III", "V"}, 105: {"I", "III", "IV", "V", "VI"},
+    106: {"I", "III", "V"}, 108: {"I"}, 113: {"III"}, 114: {"III"}, 120: {"II"}, 135: {"II"}, 141: {"III"}, 142: {"III"},
+    147: {"I"}, 149: {"I", "III", "V"}, 150: {"II", "III", "IV", "V", "VI"}, 153: {"I", "III", "V"}, 154: {"I", "III", "V"},
+    156: {"I"}, 163: {"I"}, 165: {"I", "II", "III", "V", "VI"}, 166: {"I", "III", "V"}, 169: {"I", "III", "V"},
+    170: {"I", "II", "V"}, 172: {"I"}, 177: {"III"}, 178: {"III"}, 180: {"II"}, 195: {"I", "IV"}, 196: {"III"},
+    197: {"I"}, 198: {"I"}, 201: {"I", "V"}, 202: {"I"}, 204: {"I", "III"}, 210: {"II"}, 212: {"III"}, 216: {"III"},
+    225: {"II"}, 228: {"III"}, 232: {"III"}, 240: {"II", "III", "VI"}, 5: {"II", "III", "VI"}, 17: {"I", "V"},
+}
+
+GENERATOR_RULE_TO_NEXTCLASS = {
+    15: "II", 20: "III", 23: "III", 27: "III", 30: "II", 39: "III", 43: "III", 45: "II",
+    51: "I", 53: "I", 54: "I", 57: "I", 58: "I", 60: "IV", 65: "III", 68: "III",
+    75: "II", 77: "III", 78: "III", 80: "III", 83: "I", 85: "II", 86: "I", 89: "I",
+    90: "IV", 92: "I", 99: "I", 101: "I", 102: "III", 105: "IV", 106: "I", 108: "I",
+    113: "III", 114: "III", 120: "II", 135: "II", 141: "III", 142: "III", 147: "I",
+    149: "I", 150: "IV", 153: "III", 154: "I", 156: "I", 163: "I", 165: "II",
+    166: "I", 169: "I", 170: "II", 172: "I", 177: "III", 178: "III", 180: "II",
+    195: "IV", 196: "III", 197: "I", 198: "I", 201: "I", 202: "I", 204: "I",
+    210: "II", 212: "III", 216: "III", 225: "II", 228: "III", 232: "III", 240: "II",
+    5: "II", 17: "I"
+}
+
+# Candidate rules per class, precomputed once so hot loops do not rescan
+# GENERATOR_RULE_TO_CLASSES (and forked batch workers share it copy-on-write)
+GENERATOR_CLASS_TO_CANDIDATES = {
+    cls: [r for r, classes in GENERATOR_RULE_TO_CLASSES.items() if cls in classes]
+    for cls in last_rule_table
+}
+
+
+# ---------------------------------------------------------------------------
+# Masks
+# ---------------------------------------------------------------------------
+
+def class_index(name: str) -> int:
+    return CLASS_INDEX[name]
+
+
+def class_mask(*names: str) -> int:
+    """6-bit mask of the named classes."""
+    mask = 0
+    for name in names:
+        mask |= 1 << CLASS_INDEX[name]
+    return mask
+
+
+def class_names(mask: int) -> List[str]:
+    return [name for k, name in enumerate(CLASS_NAMES) if (mask >> k) & 1]
+
+
+# ---------------------------------------------------------------------------
+# Building and caching
+# ---------------------------------------------------------------------------
+
+def _source_digest() -> str:
+    source = {
+        "transitions": {c: sorted(t.items()) for c, t in class_rule_transitions.items()},
+        "first": sorted(first_rule_table.items()),
+        "last": {c: sorted(r) for c, r in last_rule_table.items()},
+        "generator_classes": [(r, sorted(c)) for r, c in GENERATOR_RULE_TO_CLASSES.items()],
+        "generator_next": sorted(GENERATOR_RULE_TO_NEXTCLASS.items()),
+    }
+    return hashlib.blake2b(json.dumps(source).encode(), digest_size=16).hexdigest()
+
+
+def _build() -> Dict[str, np.ndarray]:
+    next_class = np.full((len(CLASS_NAMES), 256), NO_CLASS, dtype=np.int8)
+    for cls, moves in class_rule_transitions.items():
+        for rule, nxt in moves.items():
+            next_class[CLASS_INDEX[cls], rule] = CLASS_INDEX[nxt]
+    rule_classes = np.zeros(256, dtype=np.uint8)
+    for k in range(len(CLASS_NAMES)):
+        rule_classes |= np.where(next_class[k] != NO_CLASS, 1 << k, 0).astype(np.uint8)
+
+    first_class = np.full(256, NO_CLASS, dtype=np.int8)
+    for rule, cls in first_rule_table.items():
+        first_class[rule] = CLASS_INDEX[cls]
+    last_classes = np.zeros(256, dtype=np.uint8)
+    for cls, rules in last_rule_table.items():
+        last_classes[list(rules)] |= 1 << CLASS_INDEX[cls]
+
+    generator_classes = np.zeros(256, dtype=np.uint8)
+    generator_next = np.full(256, NO_CLASS, dtype=np.int8)
+    for rule, classes in GENERATOR_RULE_TO_CLASSES.items():
+        generator_classes[rule] = class_mask(*classes)
+    for rule, cls in GENERATOR_RULE_TO_NEXTCLASS.items():
+        generator_next[rule] = CLASS_INDEX[cls]
+
+    return {"next_class": next_class, "rule_classes": rule_classes,
+            "first_class": first_class, "last_classes": last_classes,
+            "generator_classes": generator_classes, "generator_next": generator_next}
+
+
+def load_tables(path: str = CACHE_PATH, rebuild: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Arrays from the cache file, rebuilt (and the file rewritten) when it is
+    missing, stale or unreadable. A read-only directory only skips the save.
+    The file is written under a unique temporary name and renamed into
+    place, so concurrent importers (process pools) never see a torn file.
+    """
+    digest = _source_digest()
+    if not rebuild and os.path.exists(path):
+        try:
+            with np.load(path) as cached:
+                if str(cached["digest"]) == digest:
+                    return {k: cached[k] for k in cached.files if k != "digest"}
+        except Exception:
+            # Truncated or garbage files raise zipfile.BadZipFile, EOFError, ...;
+            # this runs at import time, so any failure falls back to a rebuild
+            pass
+    tables = _build()
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, digest=np.array(digest), **tables)
+        os.replace(tmp, path)
+        tmp = None
+    except OSError:
+        pass
+    finally:
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+    return tables
+
+
+_tables = load_tables()
+for _array in _tables.values():
+    _array.setflags(write=False)
+
+# NEXT_CLASS[c, r]: class of cell i+1 when cell i is in class c and has rule r
+NEXT_CLASS: np.ndarray = _tables["next_class"]
+# RULE_CLASSES[r]: mask of the classes in which r may be used (Table 2.7a)
+RULE_CLASSES: np.ndarray = _tables["rule_classes"]
+# FIRST_CLASS[R_0]: class of cell 1 (Table 2.7b)
+FIRST_CLASS: np.ndarray = _tables["first_class"]
+# LAST_CLASSES[R_n-1]: mask of the classes of cell n-1 accepting it (Table 2.7c)
+LAST_CLASSES: np.ndarray = _tables["last_classes"]
+# The generators' tables in array form
+GENERATOR_RULE_CLASSES: np.ndarray = _tables["generator_classes"]
+GENERATOR_NEXT_CLASS: np.ndarray = _tables["generator_next"]
+
+
+# ---------------------------------------------------------------------------
+# Vectorized queries
+# ---------------------------------------------------------------------------
+
+def rules_in(mask: int, table: np.ndarray = RULE_CLASSES) -> np.ndarray:
+    """Rules whose class mask intersects mask, ascending."""
+    return np.flatnonzero(table & np.uint8(mask))
+
+
+def first_rules(cls: str) -> List[int]:
+    """R_0 values putting cell 1 in class cls."""
+    return np.flatnonzero(FIRST_CLASS == CLASS_INDEX[cls]).tolist()
+
+
+def last_rules(cls: str) -> List[int]:
+    """R_n-1 values accepted after a cell of class cls."""
+    return rules_in(class_mask(cls), LAST_CLASSES).tolist()
+
+
+def next_classes(classes, rules) -> np.ndarray:
+    """NEXT_CLASS for matching arrays of class indices and rules; -1 stays -1."""
+    classes = np.asarray(classes, dtype=np.int64)
+    rules = np.asarray(rules, dtype=np.int64)
+    out = NEXT_CLASS[np.maximum(classes, 0), rules]
+    return np.where(classes < 0, NO_CLASS, out).astype(np.int8)
+
+
+def class_sequences(rule_vectors) -> np.ndarray:
+    """
+    Class of cells 1..n-1 for a batch of rule vectors (R_0 and R_n-1 in the
+    reduced forms of Table 2.7b/c).
+
+    Args:
+        rule_vectors: (k, n) or (n,) array of rules, n >= 2
+
+    Returns:
+        (k, n-1) or (n-1,) int8 array; -1 from the first cell whose rule is
+        not allowed in its class onwards
+    """
+    vectors = np.asarray(rule_vectors, dtype=np.int64)
+    flat = vectors.ndim == 1
+    if flat:
+        vectors = vectors[None, :]
+    k, n = vectors.shape
+    out = np.empty((k, n - 1), dtype=np.int8)
+    c = FIRST_CLASS[vectors[:, 0]].astype(np.int64)
+    out[:, 0] = c
+    for i in range(1, n - 1):
+        c = next_classes(c, vectors[:, i]).astype(np.int64)
+        out[:, i] = c
+    return out[0] if flat else out
+
+
+def valid_vectors(rule_vectors) -> np.ndarray:
+    """Boolean per vector: class sequence complete and R_n-1 accepted."""
+    vectors = np.atleast_2d(np.asarray(rule_vectors, dtype=np.int64))
+    last_class = class_sequences(vectors)[:, -1].astype(np.int64)
+    accepted = (LAST_CLASSES[vectors[:, -1]] >> np.maximum(last_class, 0)) & 1
+    return (last_class >= 0) & (accepted == 1)
+
+
+def generator_drift() -> Dict[int, Dict[str, List[str]]]:
+    """Rules whose generator class set differs from Table 2.7a."""
+    diff = np.flatnonzero(GENERATOR_RULE_CLASSES != RULE_CLASSES)
+    return {int(r): {"generator": class_names(int(GENERATOR_RULE_CLASSES[r])),
+                     "table": class_names(int(RULE_CLASSES[r]))} for r in diff}
+
+
+if __name__ == "__main__":
+    import time
+
+    from class_automaton import ClassAutomaton
+
+    start = time.perf_counter()
+    load_tables()
+    print(f"load from {os.path.basename(CACHE_PATH)}: {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    print("rules usable in class II or V:", rules_in(class_mask("II", "V")).size)
+    print("rule 90 classes:", class_names(int(RULE_CLASSES[90])),
+          "next:", {c: CLASS_NAMES[NEXT_CLASS[k, 90]] for k, c in enumerate(CLASS_NAMES)})
+    print("generator tables differ from Table 2.7a for rules", sorted(generator_drift()))
+
+    # Batch validity against the automaton, on every vector of 4 cells
+    automaton = ClassAutomaton()
+    vectors = np.array(list(automaton.iter_vectors(4)))
+    assert valid_vectors(vectors).all()
+    rng = np.random.default_rng(0)
+    randoms = vectors.copy()
+    randoms[:, 1:3] = rng.integers(0, 256, (len(vectors), 2))
+    expected = np.array([automaton.is_valid(v.tolist()) for v in randoms])
+    assert np.array_equal(valid_vectors(randoms), expected)
+    print(f"valid_vectors agrees with ClassAutomaton on {2 * len(vectors)} vectors")
@@ -1,13 +1,69 @@
+import sys
+
 import numpy as np
-import matplotlib.pyplot as plt # type = ignore
-import matplotlib.animation as animation # type = ignore
 
 # Grid size
 N = 100
 
-# Random initial state
-grid = np.random.choice([0, 1], size=(N, N))
+class Life:
+    """
+    Game of Life on a torus, vectorized.
+
+    The grid lives in the interior of a (rows+2, cols+2) buffer whose border
+    is refreshed with the opposite edges before each generation, so neighbour
+    counts are plain slice sums: a 3-wide sum along each row, then a 3-tall
+    sum of those (a separable 3x3 box filter that includes the cell itself).
+    A cell is alive next generation when its box sum is 3, or 4 and it is
+    alive now. Two padded buffers are swapped every generation and all
+    intermediates have preallocated outputs, so step() allocates nothing.
+    """
+
+    def __init__(self, grid):
+        grid = np.asarray(grid)
+        rows, cols = grid.shape
+        self._front = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+        self._back = np.zeros_like(self._front)
+        self._front[1:-1, 1:-1] = grid != 0
+        self._row_sums = np.empty((rows + 2, cols), dtype=np.uint8)
+        self._counts = np.empty((rows, cols), dtype=np.uint8)
+        self._born = np.empty((rows, cols), dtype=bool)
+        self._kept = np.empty((rows, cols), dtype=bool)
+        self.generation = 0
+
+    @property
+    def grid(self):
+        """Current generation, a view that step() overwrites two generations later."""
+        return self._front[1:-1, 1:-1]
+
+    def _wrap(self, buf):
+        buf[0, 1:-1] = buf[-2, 1:-1]
+        buf[-1, 1:-1] = buf[1, 1:-1]
+        # Columns after rows, so the corners pick up the diagonal cells
+        buf[:, 0] = buf[:, -2]
+        buf[:, -1] = buf[:, 1]
+
+    def step(self):
+        front, back = self._front, self._back
+        self._wrap(front)
+        rs, counts = self._row_sums, self._counts
+        np.add(front[:, :-2], front[:, 1:-1], out=rs)
+        np.add(rs, front[:, 2:], out=rs)
+        np.add(rs[:-2], rs[1:-1], out=counts)
+        np.add(counts, rs[2:], out=counts)
+        np.equal(counts, 3, out=self._born)
+        np.equal(counts, 4, out=self._kept)
+        np.logical_and(self._kept, front[1:-1, 1:-1], out=self._kept)
+        np.logical_or(self._born, self._kept, out=back[1:-1, 1:-1])
+        self._front, self._back = back, front
+        self.generation += 1
+        return self.grid
 
+    def run(self, generations):
+        for _ in range(generations):
+            self.step()
+        return self.grid
+
+# Per-cell loops, kept as the reference for Life
 def update(frameNum, img, grid, N):
     newGrid = grid.copy()
     for i in range(N):
@@ -26,8 +82,24 @@ def update(frameNum, img, grid, N):
     grid[:] = newGrid[:]
     return img,
 
-# Animation
-fig, ax = plt.subplots()
-img = ax.imshow(grid, interpolation='nearest', cmap='binary')
-ani = animation.FuncAnimation(fig, update, fargs=(img, grid, N), interval=100, save_count=50)
-plt.show()
+def update_vectorized(frameNum, img, life):
+    img.set_data(life.step())
+    return img,
+
+if __name__ == "__main__":
+    # Plotting is only needed for the animation; Life and update() run headless
+    import matplotlib.pyplot as plt # type = ignore
+    import matplotlib.animation as animation # type = ignore
+
+    # python run1.py [N]
+    if len(sys.argv) > 1:
+        N = int(sys.argv[1])
+
+    # Random initial state
+    life = Life(np.random.choice([0, 1], size=(N, N)))
+
+    # Animation
+    fig, ax = plt.subplots()
+    img = ax.imshow(life.grid, interpolation='nearest', cmap='binary')
+    ani = animation.FuncAnimation(fig, update_vectorized, fargs=(img, life), interval=100, save_count=50)
+    plt.show()
@@ -0,0 +1,64 @@
+"""
+Scoring constants for the maximal RCA generators.
+
+These used to be hard-coded inside pick_next_rule_maximal, score_rule_candidate
+and the generation loops. Collecting them in one object lets the tuning
+harness (tuning.py) search over them and lets a run record exactly which
+settings produced it.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, asdict, fields
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class ScoringParams:
+    """
+    Tunable scoring weights and stopping limits.
+
+    Fields prefixed with nl_ are only read by EnhancedMaximalRCAGenerator;
+    the rest belong to MaximalRCAGenerator. Defaults reproduce the original
+    hand-tuned values.
+    """
+    # MaximalRCAGenerator.pick_next_rule_maximal
+    new_state_bonus: float = 10.0       # x coverage_bonus for an unvisited state
+    diversity_scale: float = 5.0        # x diversity_weight x mean Hamming distance
+    repeat_penalty: float = 2.0         # x coverage_bonus per use in the last 5 rules
+    consecutive_penalty: float = 3.0    # x coverage_bonus for repeating the last rule
+    unused_rule_bonus: float = 0.5      # x coverage_bonus for a rule not yet used
+    overuse_penalty: float = 0.1        # per previous use of the rule
+    history_window: int = 10            # recent states used for diversity
+
+    # MaximalRCAGenerator.generate_maximal_rca stopping limits
+    stagnation_limit_full: int = 200
+    stagnation_limit_partial: int = 100
+    no_progress_limit_full: int = 150
+    no_progress_limit_partial: int = 75
+
+    # EnhancedMaximalRCAGenerator.score_rule_candidate
+    nl_revisit_bonus: float = 0.1       # x coverage_bonus / (1 + revisits)
+    nl_history_window: int = 20
+    nl_type_diversity_bonus: float = 0.5
+    nl_usage_penalty: float = 0.1
+    nl_coverage_threshold: float = 0.8  # coverage ratio where the endgame bonus starts
+    nl_full_coverage_weight: float = 2.0
+
+    # EnhancedMaximalRCAGenerator.generate_enhanced_rca stopping limits
+    nl_stagnation_limit_full: int = 150
+    nl_stagnation_limit_partial: int = 75
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> "ScoringParams":
+        """Build params from a dict, ignoring keys that are not fields."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in values.items() if k in names})
+
+    def key(self) -> str:
+        """Stable short hash of the parameter values (for result caches)."""
+        blob = json.dumps(self.to_dict(), sort_keys=True)
+        return hashlib.sha1(blob.encode()).hexdigest()[:16]
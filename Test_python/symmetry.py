@@ -0,0 +1,161 @@
+"""
+Mirror and complement symmetries of elementary rule vectors.
+
+Two maps turn a rule vector into one with an isomorphic state graph:
+
+    mirror      read the vector backwards and reflect every rule (l <-> r);
+                states correspond by reversing the cells
+    complement  replace every rule f by f*(l, c, r) = 1 - f(1-l, 1-c, 1-r);
+                states correspond by complementing every cell
+
+Mirroring keeps a null or periodic boundary. Complementing turns the null
+boundary's constant 0 into a constant 1, so it is a symmetry of periodic
+vectors only. Cycle lengths, reversibility and maximality are the same on
+every member of an orbit, so a sweep needs to evaluate one representative
+(the lexicographically smallest member) and can copy its result to the rest.
+
+Rule 90 and 150 are their own mirror; 150 is its own complement, 90 and 165
+are each other's. The class tables hold null-boundary reduced R_0 and R_n-1
+(R_0 & 0x0F, R_n-1 & 0x55), and mirroring maps one form onto the other.
+
+Usage:
+    canonical([90, 30, 90, 150])                       # orbit representative
+    orbit([90, 30, 90, 150], boundary="periodic")      # every member
+    for rules, result in canonical_sweep(vectors, evaluate, member=valid): ...
+"""
+
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+BOUNDARIES = ("null", "periodic")
+
+Vector = Tuple[int, ...]
+
+
+def _check_rule(rule: int):
+    if not 0 <= rule <= 255:
+        raise ValueError(f"Symmetries are defined for elementary rules 0-255, got {rule}")
+
+
+def reflect_rule(rule: int) -> int:
+    """Rule with left and right neighbours swapped."""
+    _check_rule(rule)
+    out = 0
+    for idx in range(8):
+        if (rule >> idx) & 1:
+            # (l, c, r) -> (r, c, l)
+            out |= 1 << (((idx & 1) << 2) | (idx & 2) | (idx >> 2))
+    return out
+
+
+def complement_rule(rule: int) -> int:
+    """Rule conjugated by complementing every cell."""
+    _check_rule(rule)
+    return sum((1 - ((rule >> (7 - idx)) & 1)) << idx for idx in range(8))
+
+
+def mirror(rules: Sequence[int]) -> Vector:
+    return tuple(reflect_rule(r) for r in reversed(rules))
+
+
+def complement(rules: Sequence[int]) -> Vector:
+    return tuple(complement_rule(r) for r in rules)
+
+
+def orbit(rules: Sequence[int], boundary: str = "null",
+          member: Optional[Callable[[Vector], bool]] = None) -> List[Vector]:
+    """
+    Distinct images of rules under the symmetries of the boundary, sorted.
+
+    Args:
+        member: Restrict to vectors of the swept set (rules itself is kept)
+    """
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"Unknown boundary: {boundary}")
+    rules = tuple(rules)
+    images = {rules, mirror(rules)}
+    if boundary == "periodic":
+        images |= {complement(v) for v in images}
+    if member is not None:
+        images = {v for v in images if v == rules or member(v)}
+    return sorted(images)
+
+
+def canonical(rules: Sequence[int], boundary: str = "null",
+              member: Optional[Callable[[Vector], bool]] = None) -> Vector:
+    """Smallest member of the orbit of rules."""
+    return orbit(rules, boundary, member)[0]
+
+
+def is_canonical(rules: Sequence[int], boundary: str = "null",
+                 member: Optional[Callable[[Vector], bool]] = None) -> bool:
+    return canonical(rules, boundary, member) == tuple(rules)
+
+
+def canonical_sweep(vectors: Iterable[Sequence[int]], evaluate: Callable[[List[int]], object],
+                    boundary: str = "null",
+                    member: Optional[Callable[[Vector], bool]] = None
+                    ) -> Iterator[Tuple[List[int], object]]:
+    """
+    Evaluate only orbit representatives and report every member.
+
+    vectors must be closed under the symmetries within member (an exhaustive
+    sweep is); non-representatives are skipped and come back as copies of
+    their representative's result, which must therefore be an invariant
+    (cycle lengths, maximality, ...), not a list of states.
+
+    Yields:
+        (rules, result) once per member of every orbit met
+    """
+    for rules in vectors:
+        members = orbit(rules, boundary, member)
+        if members[0] != tuple(rules):
+            continue
+        result = evaluate(list(rules))
+        for v in members:
+            yield list(v), result
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from bitslice import BitSlicedCA
+    from class_automaton import ClassAutomaton
+    from hybrid import analyze_cycles
+    from replacement_sweep import has_maximal_cycle
+
+    print("reflect:", {r: reflect_rule(r) for r in (30, 45, 90, 150)})
+    print("complement:", {r: complement_rule(r) for r in (30, 45, 90, 150)})
+
+    # Every orbit member has the same cycle lengths
+    rng = random.Random(1)
+    for boundary in BOUNDARIES:
+        for _ in range(20):
+            n = rng.randrange(3, 9)
+            rules = [rng.randrange(256) for _ in range(n)]
+            spectra = {tuple(sorted(len(c) for c in analyze_cycles(n, list(v), boundary)))
+                       for v in orbit(rules, boundary)}
+            assert len(spectra) == 1, (rules, boundary)
+    print("cycle lengths agree across every orbit (null and periodic)")
+
+    automaton = ClassAutomaton()
+    for n in (3, 4, 5):
+        total = automaton.count(n)
+        reps = sum(1 for _ in automaton.iter_representatives(n))
+        print(f"n={n:<3} class-valid vectors {total}, mirror representatives {reps} "
+              f"({total / reps:.2f}x fewer evaluations)")
+
+    def is_maximal(rules):
+        return has_maximal_cycle(BitSlicedCA.from_rules(rules).successors())
+
+    n = 4
+    start = time.perf_counter()
+    full = {tuple(v) for v in automaton.iter_vectors(n) if is_maximal(v)}
+    t_full = time.perf_counter() - start
+    start = time.perf_counter()
+    swept = {tuple(v) for v, ok in canonical_sweep(automaton.iter_representatives(n), is_maximal,
+                                                     member=automaton.is_valid) if ok}
+    t_canon = time.perf_counter() - start
+    assert swept == full
+    print(f"n={n}: {len(full)} maximal class-valid vectors; full sweep {t_full:.2f} s, "
+          f"representatives only {t_canon:.2f} s")
@@ -0,0 +1,121 @@
+"""
+Maximal-length 90/150 hybrid CAs from primitive polynomials.
+
+A null-boundary 90/150 CA has a tridiagonal transition matrix: ones on both
+off-diagonals and d_i on the diagonal (0 for rule 90, 1 for rule 150). Its
+characteristic polynomial is the continuant
+
+    D_0 = 1,  D_1 = x + d_1,  D_k = (x + d_k) D_{k-1} + D_{k-2}
+
+and the CA visits all 2^n - 1 non-zero states exactly when D_n is primitive.
+
+poly_to_mask inverts this with the Cattell-Muzio construction: for an
+irreducible f, let s = (x^2 + x) f'(x) mod f and solve y^2 + s y + 1 = 0 in
+GF(2)[x]/f. Running Euclid's algorithm on (f, y) yields n linear quotients
+x + d_k, which are the diagonal of a tridiagonal matrix with characteristic
+polynomial f.
+
+Usage:
+    mask = maximal_mask(500)            # guaranteed maximal, no search
+    f = mask_to_poly([150, 90, 150])
+"""
+
+from typing import List, Sequence
+
+from gf2poly import (Modulus, degree, poly_derivative, poly_divmod,
+                     poly_inverse_mod, poly_mul, poly_to_str, primitive_poly)
+
+
+def mask_to_poly(mask: Sequence[int]) -> int:
+    """Characteristic polynomial of a null-boundary 90/150 mask."""
+    prev, cur = 0, 1
+    for rule in mask:
+        if rule not in (90, 150):
+            raise ValueError("Mask must contain only 90 or 150")
+        d = 1 if rule == 150 else 0
+        prev, cur = cur, poly_mul(0b10 | d, cur) ^ prev
+    return cur
+
+
+def _solve_artin_schreier(c: int, mod: Modulus) -> int:
+    """
+    Solve z^2 + z = c in GF(2)[x]/f.
+
+    z -> z^2 + z is GF(2)-linear with kernel {0, 1}, so this is an n x n
+    linear system over the basis 1, x, ..., x^(n-1).
+    """
+    basis = {}  # leading bit -> (image, combination of basis elements)
+    for i in range(mod.n):
+        v, combo = mod.square(1 << i) ^ (1 << i), 1 << i
+        while v:
+            lead = v.bit_length() - 1
+            if lead not in basis:
+                basis[lead] = (v, combo)
+                break
+            bv, bc = basis[lead]
+            v ^= bv
+            combo ^= bc
+    z = 0
+    while c:
+        lead = c.bit_length() - 1
+        if lead not in basis:
+            raise ValueError("z^2 + z = c has no solution (trace of c is 1)")
+        bv, bc = basis[lead]
+        c ^= bv
+        z ^= bc
+    return z
+
+
+def poly_to_mask(f: int) -> List[int]:
+    """
+    Null-boundary 90/150 mask whose characteristic polynomial is f.
+
+    The construction always succeeds for irreducible f; the final check makes
+    any mask it returns correct for reducible f as well.
+
+    Raises:
+        ValueError: if the construction fails (f is then reducible)
+    """
+    n = degree(f)
+    if n == 1:
+        return [150 if f & 1 else 90]
+    mod = Modulus(f)
+    s = mod.reduce(poly_mul(0b110, poly_derivative(f)))
+    # y = s z with z^2 + z = 1 / s^2 turns y^2 + s y + 1 = 0 into Artin-Schreier form
+    z = _solve_artin_schreier(poly_inverse_mod(mod.square(s), f), mod)
+    y = mod.mul(s, z)
+    mask = []
+    a, b = f, y
+    while b:
+        q, r = poly_divmod(a, b)
+        mask.append(150 if q & 1 else 90)
+        a, b = b, r
+    if a != 1 or len(mask) != n:
+        raise ValueError(f"Euclid on {poly_to_str(f)} did not produce {n} linear quotients")
+    return mask
+
+
+def maximal_mask(n: int) -> List[int]:
+    """A null-boundary 90/150 mask of n cells with a cycle through all non-zero states."""
+    return poly_to_mask(primitive_poly(n))
+
+
+if __name__ == "__main__":
+    import time
+
+    from hybrid import analyze_cycles
+
+    for n in [4, 8, 12]:
+        mask = maximal_mask(n)
+        longest = max(len(c) for c in analyze_cycles(n, mask, boundary="null"))
+        print(f"n={n:<3} mask={mask}")
+        print(f"      poly={poly_to_str(mask_to_poly(mask))}, longest cycle {longest} / {2**n - 1}")
+
+    for n in [64, 128, 500]:
+        start = time.perf_counter()
+        f = primitive_poly(n)
+        mask = poly_to_mask(f)
+        elapsed = time.perf_counter() - start
+        assert mask_to_poly(mask) == f
+        print(f"n={n:<3} {poly_to_str(f)}: {mask.count(150)} x 150, {mask.count(90)} x 90 "
+              f"in {elapsed * 1e3:.1f} ms")
@@ -0,0 +1,242 @@
+"""
+Hyperparameter search for the generator scoring weights.
+
+Searches over the constructor weights (coverage_bonus, diversity_weight,
+nonlinear_weight) and the ScoringParams constants, scoring each candidate by
+state coverage per second of generation time. Runs are fanned out through
+batch_runner, every evaluated run is cached on disk by the hash of its config,
+and the best settings per n_cells can be exported as JSON.
+
+Usage:
+    cache = EvalCache("tuning_cache.jsonl")
+    ranked = successive_halving(n_cells=6, cache=cache)
+    export_best({6: ranked[0]}, "best_params.json")
+"""
+
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional, Tuple
+
+import batch_runner
+from scoring_params import ScoringParams
+
+# name -> (kind, low, high); kind is "float" or "int"
+SEARCH_SPACE = {
+    "coverage_bonus": ("float", 0.5, 8.0),
+    "diversity_weight": ("float", 0.0, 1.0),
+    "nonlinear_weight": ("float", 0.0, 4.0),
+    "new_state_bonus": ("float", 1.0, 20.0),
+    "diversity_scale": ("float", 0.0, 10.0),
+    "repeat_penalty": ("float", 0.0, 5.0),
+    "consecutive_penalty": ("float", 0.0, 6.0),
+    "unused_rule_bonus": ("float", 0.0, 2.0),
+    "stagnation_limit_full": ("int", 50, 400),
+    "stagnation_limit_partial": ("int", 25, 200),
+    "nl_revisit_bonus": ("float", 0.0, 0.5),
+    "nl_type_diversity_bonus": ("float", 0.0, 2.0),
+    "nl_coverage_threshold": ("float", 0.5, 0.95),
+    "nl_full_coverage_weight": ("float", 0.0, 5.0),
+    "nl_stagnation_limit_full": ("int", 50, 400),
+}
+
+# Candidate keys passed to the generator constructors rather than ScoringParams
+CONSTRUCTOR_WEIGHTS = ("coverage_bonus", "diversity_weight", "nonlinear_weight")
+
+R1_CLASSES = ("I", "II", "III", "IV", "V", "VI")
+
+
+def config_key(config: Dict) -> str:
+    """Stable hash of a run config, used as the cache key."""
+    blob = json.dumps(config, sort_keys=True)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+
+class EvalCache:
+    """Append-only JSON-lines cache of evaluated run configs."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.rows: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.rows[entry["key"]] = entry["row"]
+
+    def get(self, config: Dict) -> Optional[Dict]:
+        return self.rows.get(config_key(config))
+
+    def put(self, config: Dict, row: Dict):
+        key = config_key(config)
+        self.rows[key] = row
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "row": row}) + "\n")
+
+
+def sample_candidate(rng: random.Random, space: Dict = SEARCH_SPACE) -> Dict:
+    """Draw one candidate uniformly from the search space."""
+    candidate = {}
+    for name, (kind, low, high) in space.items():
+        if kind == "int":
+            candidate[name] = rng.randint(low, high)
+        else:
+            candidate[name] = round(rng.uniform(low, high), 4)
+    return candidate
+
+
+def candidate_configs(candidate: Dict, n_cells: int, budget: int,
+                      generator: str = "nonlinear",
+                      max_length: Optional[int] = None) -> List[Dict]:
+    """
+    Expand a candidate into the batch_runner configs it is evaluated on.
+
+    The budget is the number of runs; run i uses seed i and cycles through
+    the R1 classes, so a larger budget always extends a smaller one.
+    """
+    weights = {k: candidate[k] for k in CONSTRUCTOR_WEIGHTS if k in candidate}
+    params = {k: v for k, v in candidate.items() if k not in CONSTRUCTOR_WEIGHTS}
+    configs = []
+    for i in range(budget):
+        config = dict(batch_runner.DEFAULT_CONFIG)
+        config.update(weights)
+        config.update({
+            "generator": generator,
+            "n_cells": n_cells,
+            "R1_class": R1_CLASSES[i % len(R1_CLASSES)],
+            "max_length": max_length,
+            "seed": i,
+            "params": ScoringParams.from_dict(params).to_dict(),
+        })
+        configs.append(config)
+    return configs
+
+
+def coverage_per_second(row: Dict) -> float:
+    if "error" in row:
+        return 0.0
+    return row["state_coverage"] / max(row["elapsed_s"], 1e-9)
+
+
+def evaluate_candidates(candidates: List[Dict], n_cells: int, budget: int,
+                        cache: Optional[EvalCache] = None,
+                        generator: str = "nonlinear",
+                        max_length: Optional[int] = None,
+                        max_workers: Optional[int] = None) -> List[float]:
+    """
+    Score candidates by mean coverage per second over `budget` runs each.
+
+    Runs already in the cache are reused; the rest are executed in one
+    parallel batch. Failed runs score 0 but are not cached.
+
+    Returns:
+        One score per candidate, in input order
+    """
+    cache = cache or EvalCache()
+    per_candidate = [candidate_configs(c, n_cells, budget, generator, max_length)
+                     for c in candidates]
+
+    pending = {}
+    for configs in per_candidate:
+        for config in configs:
+            if cache.get(config) is None:
+                pending[config_key(config)] = config
+
+    # Failed runs score 0 for this call only; they stay out of the cache so
+    # a transient failure is retried on the next run
+    failed = {}
+    for row in batch_runner.run_configs(list(pending.values()), max_workers):
+        config = {k: row[k] for k in batch_runner.GRID_AXES}
+        if "error" in row:
+            failed[config_key(config)] = {"error": row["error"]}
+            continue
+        cache.put(config, {"state_coverage": row.get("state_coverage", 0.0),
+                           "elapsed_s": row.get("elapsed_s", 0.0)})
+
+    scores = []
+    for configs in per_candidate:
+        values = [coverage_per_second(failed.get(config_key(config)) or cache.get(config))
+                  for config in configs]
+        scores.append(sum(values) / len(values))
+    return scores
+
+
+def random_search(n_cells: int, n_trials: int = 32, budget: int = 3,
+                  cache: Optional[EvalCache] = None, seed: int = 0,
+                  **kwargs) -> List[Tuple[float, Dict]]:
+    """
+    Plain random search.
+
+    Returns:
+        (score, candidate) pairs, best first
+    """
+    rng = random.Random(seed)
+    candidates = [sample_candidate(rng) for _ in range(n_trials)]
+    scores = evaluate_candidates(candidates, n_cells, budget, cache, **kwargs)
+    return sorted(zip(scores, candidates), key=lambda sc: -sc[0])
+
+
+def successive_halving(n_cells: int, n_candidates: int = 27, min_budget: int = 1,
+                       eta: int = 3, cache: Optional[EvalCache] = None,
+                       seed: int = 0, **kwargs) -> List[Tuple[float, Dict]]:
+    """
+    Successive halving: evaluate many candidates cheaply, keep the top 1/eta,
+    multiply their budget by eta and repeat until one candidate is left.
+
+    Returns:
+        (score, candidate) pairs from the final round, best first
+    """
+    rng = random.Random(seed)
+    survivors = [sample_candidate(rng) for _ in range(n_candidates)]
+    budget = min_budget
+    while True:
+        scores = evaluate_candidates(survivors, n_cells, budget, cache, **kwargs)
+        ranked = sorted(zip(scores, survivors), key=lambda sc: -sc[0])
+        if len(ranked) <= 1:
+            return ranked
+        keep = max(1, len(ranked) // eta)
+        survivors = [c for _, c in ranked[:keep]]
+        budget *= eta
+
+
+def export_best(best_by_n: Dict[int, Tuple[float, Dict]], path: str):
+    """Write the best (score, candidate) per n_cells to a JSON file."""
+    out = {}
+    for n_cells, (score, candidate) in sorted(best_by_n.items()):
+        params = {k: v for k, v in candidate.items() if k not in CONSTRUCTOR_WEIGHTS}
+        out[str(n_cells)] = {
+            "coverage_per_second": score,
+            "weights": {k: candidate[k] for k in CONSTRUCTOR_WEIGHTS if k in candidate},
+            "params": ScoringParams.from_dict(params).to_dict(),
+        }
+    with open(path, "w") as f:
+        json.dump(out, f, indent=2)
+
+
+def load_best(path: str, n_cells: int) -> Tuple[Dict, ScoringParams]:
+    """
+    Load exported settings for one n_cells.
+
+    Returns:
+        (constructor weight kwargs, ScoringParams)
+    """
+    with open(path) as f:
+        entry = json.load(f)[str(n_cells)]
+    return entry["weights"], ScoringParams.from_dict(entry["params"])
+
+
+if __name__ == "__main__":
+    cache = EvalCache("tuning_cache.jsonl")
+    best_by_n = {}
+    for n_cells in [4, 5, 6]:
+        ranked = successive_halving(n_cells, n_candidates=9, eta=3, cache=cache)
+        best_by_n[n_cells] = ranked[0]
+        score, candidate = ranked[0]
+        print(f"n_cells={n_cells}: best coverage/s = {score:.2f}")
+        print(f"  weights: { {k: candidate[k] for k in CONSTRUCTOR_WEIGHTS} }")
+
+    export_best(best_by_n, "best_params.json")
+    print("\nExported best settings to best_params.json")